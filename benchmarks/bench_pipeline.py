@@ -0,0 +1,266 @@
+# FILE: benchmarks/bench_pipeline.py
+# Benchmark por etapas del pipeline de main.py sobre datos sintéticos (sin red, determinista).
+#
+# Uso:
+#   python -m benchmarks.bench_pipeline                       # 1k, 100k y 10M barras
+#   python -m benchmarks.bench_pipeline --sizes 1000 100000 --output outputs/bench.json
+#   python -m benchmarks.bench_pipeline --compare base.json new.json --tolerance 0.2
+#   python -m benchmarks.bench_pipeline --sizes 2000000 --pipeline-rss   # + pico de RSS del Pipeline
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import warnings
+import contextlib
+import subprocess
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import make_market_data
+from quant_stat.indicators import compute_indicators
+from quant_stat.find_vix_tops import find_vix_tops
+from quant_stat.vix_spike_indicator import find_vix_quiet_days
+from strat_OM.strat_vix_long import simulate_vix_long_trades
+from strat_OM.strat_hedging_cross import strat_hedging_cross
+from strat_OM.strat_hedging_ema import generate_ema_short_hedging_signals
+from strat_OM.strats_outputs_join import strats_outputs_join
+
+warnings.filterwarnings("ignore")
+
+DEFAULT_SIZES = [1_000, 100_000, 10_000_000]
+CHART_MAX_BARS = 200_000
+TOPS_COLUMNS = ['tag', 'index_top_pos', 'VIX_top', 'top_confirm']
+RSS_STAGES = ['indicators', 'tops', 'hedge_cross', 'hedge_ema', 'long_trades', 'combined_trades', 'portfolio']
+RSS_MODES = ['data', 'default', 'compact']
+
+
+# ====================================================
+# Etapas: cada una lee/escribe en el contexto `ctx`
+# ====================================================
+def stage_indicators(ctx):
+    ctx['df'] = compute_indicators(ctx['market'].copy())
+
+
+def stage_quiet_days(ctx):
+    ctx['df']['vix_spike'] = find_vix_quiet_days(ctx['df']).values
+
+
+def stage_vix_tops(ctx):
+    ctx['tops_df'] = pd.DataFrame(find_vix_tops(ctx['df'], window_top=15, factor_top=1.2), columns=TOPS_COLUMNS)
+
+
+def stage_strat_vix_long(ctx):
+    ctx['result'] = simulate_vix_long_trades(ctx['df'], ctx['tops_df'])
+
+
+def stage_hedging_cross(ctx):
+    ctx['hedge_cross'] = strat_hedging_cross(df=ctx['df'], fast_ma_col='sma_fast', slow_ma_col='sma_slow')
+
+
+def stage_hedging_ema(ctx):
+    ctx['hedge_ema'] = generate_ema_short_hedging_signals(ctx['df'])
+
+
+def stage_outputs_join(ctx):
+    ctx['combined'] = strats_outputs_join(ctx['result'], ctx['hedge_cross'], ctx['hedge_ema'])
+
+
+def stage_charts(ctx):
+    from chart_volume import plot_nasdaq_and_vix
+    from chart_active_trades import plot_vix_and_price_only
+
+    df = ctx['df'].reset_index()
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            plot_nasdaq_and_vix(symbol='BENCH', timeframe='synthetic', df=df, tops_df=ctx['tops_df'],
+                                trades_df=ctx['result'], hedge_trades_df=ctx['hedge_cross'],
+                                hedge_trades_df_slow_ema=ctx['hedge_ema'], open_browser=False)
+            plot_vix_and_price_only(symbol='BENCH', timeframe='synthetic', df=df, tops_df=ctx['tops_df'].copy(),
+                                    open_browser=False)
+    finally:
+        os.chdir(cwd)
+
+
+STAGES = [
+    ('indicators', stage_indicators),
+    ('find_vix_quiet_days', stage_quiet_days),
+    ('find_vix_tops', stage_vix_tops),
+    ('strat_vix_long', stage_strat_vix_long),
+    ('strat_hedging_cross', stage_hedging_cross),
+    ('strat_hedging_ema', stage_hedging_ema),
+    ('strats_outputs_join', stage_outputs_join),
+    ('charts', stage_charts),
+]
+
+
+# ====================================================
+# Medición
+# ====================================================
+def _measure(stage_fn, ctx, track_memory):
+    """Ejecuta una etapa y devuelve (segundos, pico de memoria en MB o None)."""
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stage_fn(ctx)
+    elapsed = time.perf_counter() - start
+    peak_mb = None
+    if track_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return elapsed, peak_mb
+
+
+def run_benchmarks(sizes=None, seed=42, repeat=1, track_memory=True, chart_max_bars=CHART_MAX_BARS):
+    """
+    Ejecuta todas las etapas para cada tamaño y devuelve una lista de resultados.
+
+    El tiempo es el mejor de `repeat` ejecuciones sin trazar memoria; el pico de memoria
+    se mide en una ejecución adicional con tracemalloc.
+    """
+    results = []
+    for n_bars in sizes or DEFAULT_SIZES:
+        print(f"⏱️  {n_bars:,} barras")
+        ctx = {'market': make_market_data(n_bars, seed=seed)}
+        for name, stage_fn in STAGES:
+            if name == 'charts' and n_bars > chart_max_bars:
+                print(f"   {name:<22} omitido (> {chart_max_bars:,} barras)")
+                continue
+            timings = [_measure(stage_fn, ctx, False)[0] for _ in range(repeat)]
+            peak_mb = _measure(stage_fn, ctx, True)[1] if track_memory else None
+            results.append({'stage': name, 'bars': n_bars, 'seconds': min(timings), 'peak_mb': peak_mb})
+            mem = f"{peak_mb:10.1f} MB" if peak_mb is not None else ""
+            print(f"   {name:<22} {min(timings):10.4f} s {mem}")
+    return results
+
+
+# ====================================================
+# Pico de RSS del Pipeline (modo normal vs compacto)
+# ====================================================
+def _rss_child(n_bars, seed, mode):
+    """
+    Proceso hijo: genera los datos y, salvo con mode='data' (referencia), pide al Pipeline
+    todas las etapas de `RSS_STAGES`. Imprime el pico de RSS del proceso en MB.
+    """
+    import resource
+    from pipeline import Pipeline
+
+    market = make_market_data(n_bars, seed=seed)
+    if mode != 'data':
+        bt = Pipeline(data=market, hedging_enabled=True, compact=(mode == 'compact'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for stage in RSS_STAGES:
+                bt.get(stage)
+    # ru_maxrss: KB en Linux, bytes en macOS
+    scale = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale)
+
+
+def pipeline_peak_rss(sizes=None, seed=42):
+    """
+    Pico de RSS (MB) de `RSS_STAGES` del Pipeline en modo normal y compacto, cada uno en un
+    proceso nuevo (el pico no se puede reiniciar dentro del mismo proceso). 'above_data_mb'
+    descuenta el pico de un proceso que sólo genera los datos de mercado (sólo Unix).
+    """
+    results = []
+    for n_bars in sizes or DEFAULT_SIZES:
+        peaks = {}
+        for mode in RSS_MODES:
+            out = subprocess.check_output([sys.executable, '-m', 'benchmarks.bench_pipeline', '--rss-child',
+                                           str(n_bars), str(seed), mode], text=True)
+            peaks[mode] = float(out.strip().splitlines()[-1])
+        for mode in RSS_MODES[1:]:
+            results.append({'mode': mode, 'bars': n_bars, 'peak_rss_mb': peaks[mode],
+                            'above_data_mb': peaks[mode] - peaks['data']})
+            print(f"   pipeline {mode:<8} {n_bars:>12,} barras {peaks[mode]:10.1f} MB "
+                  f"({peaks[mode] - peaks['data']:+.1f} MB sobre los datos)")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results, output_path, seed, rss=None):
+    payload = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': pd.Timestamp.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'seed': seed,
+        },
+        'results': results,
+    }
+    if rss:
+        payload['pipeline_rss'] = rss
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as fh:
+        json.dump(payload, fh, indent=2)
+    print(f"💾 Resultados del benchmark guardados en: '{output_path}'")
+
+
+def compare_results(base_path, new_path, tolerance=0.2):
+    """
+    Compara dos ficheros de resultados. Devuelve un DataFrame con el ratio nuevo/base
+    y la columna 'regression' (True si el tiempo empeora más que `tolerance`).
+    """
+    def load(path):
+        with open(path) as fh:
+            return pd.DataFrame(json.load(fh)['results']).set_index(['stage', 'bars'])
+
+    base, new = load(base_path), load(new_path)
+    table = base[['seconds']].join(new[['seconds']], lsuffix='_base', rsuffix='_new', how='inner')
+    table['ratio'] = table['seconds_new'] / table['seconds_base']
+    table['regression'] = table['ratio'] > 1 + tolerance
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del pipeline VIX/NASDAQ.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="no medir el pico de memoria")
+    parser.add_argument('--chart-max-bars', type=int, default=CHART_MAX_BARS)
+    parser.add_argument('--output', default='outputs/benchmark_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="comparar dos ficheros de resultados")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--pipeline-rss', action='store_true',
+                        help="medir también el pico de RSS del Pipeline (normal y compacto)")
+    parser.add_argument('--rss-child', nargs=3, metavar=('BARS', 'SEED', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.rss_child:
+        n_bars, seed, mode = args.rss_child
+        _rss_child(int(n_bars), int(seed), mode)
+        return 0
+
+    if args.compare:
+        table = compare_results(*args.compare, tolerance=args.tolerance)
+        print(table.round(4))
+        return 1 if table['regression'].any() else 0
+
+    results = run_benchmarks(args.sizes, seed=args.seed, repeat=args.repeat,
+                             track_memory=not args.no_memory, chart_max_bars=args.chart_max_bars)
+    rss = pipeline_peak_rss(args.sizes, seed=args.seed) if args.pipeline_rss else None
+    write_results(results, args.output, args.seed, rss)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
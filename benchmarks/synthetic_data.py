@@ -0,0 +1,48 @@
+# FILE: benchmarks/synthetic_data.py
+# Generador determinista de series sintéticas NASDAQ (QQQ x10) + VIX para los benchmarks.
+# No usa red: mismas columnas que produce market_data.load_market_data.
+
+import numpy as np
+import pandas as pd
+
+
+def _ar1(shocks, phi):
+    """Proceso AR(1) x_t = phi * x_{t-1} + e_t calculado en C con ewm (sin bucle Python)."""
+    alpha = 1.0 - phi
+    return pd.Series(shocks).ewm(alpha=alpha, adjust=False).mean().to_numpy() / alpha
+
+
+def make_market_data(n_bars, seed=42, start='2000-01-03', freq='min'):
+    """
+    Devuelve un DataFrame indexado por 'date' con 'open_nasdaq', 'nasdaq', 'high_nasdaq',
+    'low_nasdaq', 'nasdaq_volume_M' y 'VIX'.
+
+    El VIX es un proceso con reversión a la media y saltos esporádicos que decaen, para
+    que aparezcan techos y días tranquilos; el NASDAQ cae cuando el VIX salta. La apertura
+    parte del cierre anterior con un gap aleatorio, acotada al rango [low, high] de la barra
+    (se genera al final, así que el resto de columnas no cambia con la misma semilla).
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_bars, freq=freq, name='date')
+
+    jumps = np.where(rng.random(n_bars) < 0.005, rng.uniform(5, 25, n_bars), 0.0)
+    vix = 18 + _ar1(rng.normal(0, 0.8, n_bars), 0.97) + _ar1(jumps, 0.9)
+    vix = np.clip(vix, 9, None).round(2)
+
+    returns = rng.normal(0.0003, 0.01, n_bars) - 0.002 * np.diff(vix, prepend=vix[0])
+    close = 1000 * np.exp(np.cumsum(returns))
+    high = close * (1 + np.abs(rng.normal(0, 0.005, n_bars)))
+    low = close * (1 - np.abs(rng.normal(0, 0.005, n_bars)))
+
+    volume = rng.uniform(20, 80, n_bars).round(2)
+    prev_close = np.concatenate([close[:1], close[:-1]])
+    bar_open = np.clip(prev_close * (1 + rng.normal(0, 0.004, n_bars)), low, high)
+
+    return pd.DataFrame({
+        'open_nasdaq': (bar_open.round(2) * 10),
+        'nasdaq': (close.round(2) * 10),
+        'high_nasdaq': (high.round(2) * 10),
+        'low_nasdaq': (low.round(2) * 10),
+        'nasdaq_volume_M': volume,
+        'VIX': vix,
+    }, index=index)
@@ -4,30 +4,43 @@ import webbrowser
 import pandas as pd
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
+from chart_downsample import DEFAULT_MAX_POINTS, downsample_frame, keep_mask_for_dates
 
-def plot_vix_and_price_only(symbol, timeframe, df, tops_df=None):
+def plot_vix_and_price_only(symbol, timeframe, df, tops_df=None, open_browser=True,
+                            max_points=DEFAULT_MAX_POINTS, downsample_method='minmax'):
     """
     Genera un único gráfico con el NASDAQ y el VIX superpuestos, con control de cuadrícula y puntos de picos en ambas curvas.
+    Con `open_browser=False` sólo escribe el HTML (modo headless). Las líneas se reducen a
+    `max_points` puntos (None = sin reducir) conservando extremos, picos y techos del VIX.
     """
     # --- 1. Preparación de Datos ---
-    df = df.rename(columns=str.lower)
+    df = df.rename(columns=str.lower, copy=False)
     df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date')
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date')
 
     html_path = f'charts/nasdaq_vix_overlay_{symbol}_{timeframe}.html'
     os.makedirs(os.path.dirname(html_path), exist_ok=True)
 
+    keep = keep_mask_for_dates(
+        df['date'], *([tops_df['index_top_pos'], tops_df['top_confirm']] if tops_df is not None and not tops_df.empty else [])
+    )
+    for col in ['vix_spike', 'vix_quiet']:
+        if col in df.columns:
+            keep |= df[col].fillna(False).to_numpy(dtype=bool)
+    plot_df = downsample_frame(df, ['nasdaq', 'vix'], max_points=max_points, keep=keep, method=downsample_method)
+
     # --- 2. Creación de la Figura con Eje Y Secundario ---
     fig = make_subplots(specs=[[{"secondary_y": True}]])
 
     # --- 3. Añadir las Líneas Principales ---
     fig.add_trace(go.Scatter(
-        x=df['date'], y=df['nasdaq'], mode='lines',
+        x=plot_df['date'], y=plot_df['nasdaq'], mode='lines',
         name='NASDAQ', line=dict(color='blue', width=1.5)
     ), secondary_y=False)
 
     fig.add_trace(go.Scatter(
-        x=df['date'], y=df['vix'], mode='lines',
+        x=plot_df['date'], y=plot_df['vix'], mode='lines',
         name='VIX', line=dict(color='red', width=1.2)
     ), secondary_y=True)
 
@@ -56,7 +69,7 @@ def plot_vix_and_price_only(symbol, timeframe, df, tops_df=None):
 
     # --- 5. AÑADIR LOS PUNTOS DE 'tops_df' EN AMBAS CURVAS ---
     if tops_df is not None and not tops_df.empty:
-        tops_df['index_top_pos'] = pd.to_datetime(tops_df['index_top_pos'])
+        tops_df = tops_df.assign(index_top_pos=pd.to_datetime(tops_df['index_top_pos']))
         merged_tops = pd.merge(tops_df, df[['date', 'nasdaq']], left_on='index_top_pos', right_on='date', how='inner')
 
         if not merged_tops.empty:
@@ -100,4 +113,6 @@ def plot_vix_and_price_only(symbol, timeframe, df, tops_df=None):
     # --- 7. Guardar y Mostrar el Gráfico ---
     fig.write_html(html_path, config={"scrollZoom": True})
     print(f"✅ Gráfico Plotly guardado como HTML: '{html_path}'")
-    webbrowser.open('file://' + os.path.realpath(html_path))
\ No newline at end of file
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(html_path))
+    return fig
@@ -0,0 +1,99 @@
+# FILE: chart_downsample.py
+# Reducción de puntos para los gráficos: cada serie se limita a un presupuesto de puntos
+# (del orden de los píxeles del gráfico) conservando los extremos.
+#
+# - 'minmax': en cada cubo se conservan el mínimo y el máximo (vectorizado).
+# - 'lttb':   Largest-Triangle-Three-Buckets, conserva mejor la forma visual.
+# Los índices obligatorios (picos del VIX, techos, entradas/salidas) se añaden siempre,
+# igual que los bordes de los huecos (NaN) para que las líneas cortadas sigan cortadas.
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_POINTS = 4000
+
+
+def minmax_indices(values, n_buckets):
+    """Índices del mínimo y del máximo de cada uno de `n_buckets` cubos (más el primero y el último)."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.full(size * (-(-n // size)), np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(-1, size)
+    nan = np.isnan(blocks)
+    base = np.arange(len(blocks)) * size
+    lo = base + np.where(nan, np.inf, blocks).argmin(axis=1)
+    hi = base + np.where(nan, -np.inf, blocks).argmax(axis=1)
+    idx = np.concatenate([[0, n - 1], lo, hi])
+    return np.unique(idx[idx < n])
+
+
+def lttb_indices(values, n_out):
+    """Índices seleccionados por Largest-Triangle-Three-Buckets (eje x = posición)."""
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        next_stop = edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = (stop + next_stop - 1) / 2.0
+        avg_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        xs = np.arange(start, stop)
+        area = np.abs((a - avg_x) * (y[start:stop] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = selected[b + 1] = start + int(area.argmax())
+    return selected
+
+
+def _gap_edges(values):
+    """Índices a ambos lados de cada transición dato/NaN."""
+    nan = np.isnan(np.asarray(values, dtype=float))
+    change = np.flatnonzero(nan[1:] != nan[:-1])
+    return np.concatenate([change, change + 1])
+
+
+def downsample_frame(df, columns, max_points=DEFAULT_MAX_POINTS, keep=None, method='minmax'):
+    """
+    Devuelve las filas de `df` necesarias para dibujar `columns` con ~`max_points` puntos por serie.
+
+    Args:
+        df: DataFrame con las series (todas comparten el eje x).
+        columns: columnas a preservar (se une la selección de cada una).
+        max_points: presupuesto de puntos por serie; None desactiva la reducción.
+        keep: máscara booleana (array/Series) de filas que deben conservarse siempre.
+        method: 'minmax' o 'lttb'.
+    """
+    n = len(df)
+    if max_points is None or n <= max_points:
+        return df
+    columns = [col for col in columns if col in df.columns]
+    parts = [np.array([0, n - 1])]
+    for col in columns:
+        values = df[col].to_numpy(dtype=float)
+        if method == 'lttb':
+            parts.append(lttb_indices(values, max_points))
+        else:
+            parts.append(minmax_indices(values, max_points // 2))
+        parts.append(_gap_edges(values))
+        if not np.isnan(values).all():
+            parts.append(np.array([np.nanargmin(values), np.nanargmax(values)]))
+    if keep is not None:
+        parts.append(np.flatnonzero(np.asarray(keep, dtype=bool)))
+    return df.iloc[np.unique(np.concatenate(parts))]
+
+
+def keep_mask_for_dates(dates, *date_groups):
+    """Máscara de las filas cuya fecha aparece en alguno de los grupos de fechas dados."""
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    wanted = [pd.to_datetime(pd.Series(group)).dropna().to_numpy() for group in date_groups if group is not None]
+    if not wanted:
+        return np.zeros(len(dates), dtype=bool)
+    return np.isin(dates, np.concatenate(wanted))
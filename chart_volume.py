@@ -2,31 +2,96 @@
 # VERSIÓN ACTUALIZADA: Plotea el ATR Trailing Stop para largos (verde) y para cortos (rojo).
 
 import os
+import importlib.util
 import webbrowser
 import pandas as pd
 import numpy as np
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
+from strat_OM.signal_engine import in_position_mask
+from chart_downsample import DEFAULT_MAX_POINTS, downsample_frame, keep_mask_for_dates
+
+WEBGL_THRESHOLD = 50_000   # A partir de este nº de barras (antes de reducir) las series se dibujan con WebGL (Scattergl)
+
+
+def _trade_traces(entry_dates, entry_prices, exit_dates, exit_prices, profits, exit_size, line_color, name):
+    """
+    Dos trazos para TODO un conjunto de operaciones (en lugar de dos por operación):
+    - las líneas entrada-salida como segmentos separados por None,
+    - las salidas como marcadores con un color por punto (verde si ganó, rojo si perdió).
+    """
+    n = len(entry_dates)
+    seg_x = np.empty(3 * n, dtype=object)
+    seg_y = np.empty(3 * n, dtype=object)
+    seg_x[0::3], seg_x[1::3], seg_x[2::3] = list(entry_dates), list(exit_dates), None
+    seg_y[0::3], seg_y[1::3], seg_y[2::3] = list(entry_prices), list(exit_prices), None
+    colors = np.where(np.asarray(profits, dtype=float) > 0, 'green', 'red')
+
+    exits = go.Scatter(
+        x=list(exit_dates), y=list(exit_prices), mode='markers', name=name,
+        marker=dict(symbol='square', size=exit_size, color=colors, line=dict(width=1, color='black')),
+        showlegend=False
+    )
+    lines = go.Scatter(
+        x=seg_x, y=seg_y, mode='lines', line=dict(color=line_color, width=1, dash='solid'),
+        connectgaps=False, showlegend=False, hoverinfo='skip'
+    )
+    return exits, lines
+
+
+def plot_nasdaq_and_vix(symbol, timeframe, df, tops_df=None, trades_df=None, hedge_trades_df=None, hedge_trades_df_slow_ema= None,
+                        open_browser=True, static_path=None, webgl_threshold=WEBGL_THRESHOLD,
+                        max_points=DEFAULT_MAX_POINTS, downsample_method='minmax'):
+    """
+    Gráfico principal: NASDAQ, medias, ATR trailing stop, VIX, volumen y las operaciones
+    de todas las estrategias.
+
+    Cada conjunto de operaciones se dibuja con un número fijo de trazos, así que el
+    tamaño del HTML y el tiempo de render no crecen con el número de operaciones.
+
+    Args:
+        open_browser: si False no abre el navegador (modo headless / batch).
+        static_path: si se indica, guarda además una imagen estática (png/svg/pdf; requiere kaleido).
+        webgl_threshold: nº de barras de `df` (antes de la reducción de puntos) a partir del cual
+            las series usan Scattergl, que sigue fluido al hacer zoom sobre historias largas.
+        max_points: puntos por serie tras la reducción (None = todas las barras). Los
+            picos del VIX, los techos y las fechas de las operaciones se conservan siempre.
+        downsample_method: 'minmax' o 'lttb' (ver chart_downsample).
+    """
+    if static_path and importlib.util.find_spec('kaleido') is None:
+        raise ImportError("static_path requiere el paquete 'kaleido' para exportar imágenes (pip install kaleido).")
 
-def plot_nasdaq_and_vix(symbol, timeframe, df, tops_df=None, trades_df=None, hedge_trades_df=None, hedge_trades_df_slow_ema= None):
     html_path = f'charts/nasdaq_vix_chart_{symbol}_{timeframe}.html'
     os.makedirs(os.path.dirname(html_path), exist_ok=True)
 
-    df = df.rename(columns=str.lower)
+    df = df.rename(columns=str.lower, copy=False)
     df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date')
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date')
 
     # --- Prepara el ATR dinámico para plotear (para la estrategia de LARGOS) ---
     if trades_df is not None and not trades_df.empty and 'atr_trailing_stop' in df.columns:
-        df['active_atr_stop'] = np.nan
-        for _, trade in trades_df.iterrows():
-            if pd.notna(trade['exit_date']) and pd.notna(trade['entry_date']):
-                mask = (df['date'] >= trade['entry_date']) & (df['date'] <= trade['exit_date'])
-                prices_in_window = df.loc[mask, 'nasdaq']
-                stops_in_window = df.loc[mask, 'atr_trailing_stop']
-                valid_stops = stops_in_window.where(stops_in_window <= prices_in_window, np.nan)
-                df.loc[mask, 'active_atr_stop'] = valid_stops
+        # Barras dentro de alguna operación (una sola pasada sobre los intervalos)
+        in_trade = in_position_mask(df['date'], pd.to_datetime(trades_df['entry_date']), pd.to_datetime(trades_df['exit_date']))
+        stops = df['atr_trailing_stop']
+        df['active_atr_stop'] = stops.where(in_trade & (stops <= df['nasdaq']).to_numpy(), np.nan)
     
+    # --- Reducción de puntos de las series (los marcadores usan siempre `df` completo) ---
+    keep = keep_mask_for_dates(
+        df['date'],
+        *[frame[col] for frame, cols in [(tops_df, ['index_top_pos', 'top_confirm']),
+                                         (trades_df, ['entry_date', 'exit_date']),
+                                         (hedge_trades_df, ['hedge_entry_date', 'hedge_exit_date']),
+                                         (hedge_trades_df_slow_ema, ['hedge_entry_date', 'hedge_exit_date'])]
+          if frame is not None and not frame.empty for col in cols if col in frame.columns]
+    )
+    if 'vix_spike' in df.columns:
+        keep |= df['vix_spike'].fillna(False).to_numpy(dtype=bool)
+    plot_df = downsample_frame(df, ['nasdaq', 'sma_slow', 'sma_fast', 'active_atr_stop', 'vix', 'nasdaq_volume_m'],
+                               max_points=max_points, keep=keep, method=downsample_method)
+
+    Line = go.Scattergl if len(df) > webgl_threshold else go.Scatter
+
     fig = make_subplots(
         rows=2, cols=1, shared_xaxes=True,
         row_heights=[0.8, 0.2], vertical_spacing=0.03,
@@ -34,11 +99,11 @@ def plot_nasdaq_and_vix(symbol, timeframe, df, tops_df=None, trades_df=None, hed
     )
 
     # --- Trazo del Precio y Medias Móviles ---
-    fig.add_trace(go.Scatter(x=df['date'], y=df['nasdaq'], mode='lines', name='NASDAQ', line=dict(color='blue', width=1.5)), row=1, col=1)
+    fig.add_trace(Line(x=plot_df['date'], y=plot_df['nasdaq'], mode='lines', name='NASDAQ', line=dict(color='blue', width=1.5)), row=1, col=1)
     if 'sma_slow' in df.columns:
-        fig.add_trace(go.Scatter(x=df['date'], y=df['sma_slow'], mode='lines', name='SMA Lenta', line=dict(color='green', width=0.7)), row=1, col=1)
+        fig.add_trace(Line(x=plot_df['date'], y=plot_df['sma_slow'], mode='lines', name='SMA Lenta', line=dict(color='green', width=0.7)), row=1, col=1)
     if 'sma_fast' in df.columns:
-        fig.add_trace(go.Scatter(x=df['date'], y=df['sma_fast'], mode='lines', name='SMA Rápida', line=dict(color='turquoise', width=0.9)), row=1, col=1)
+        fig.add_trace(Line(x=plot_df['date'], y=plot_df['sma_fast'], mode='lines', name='SMA Rápida', line=dict(color='turquoise', width=0.9)), row=1, col=1)
     
     # 🔸 Añadir círculos naranjas donde hay picos de VIX (vix_spike == True)
     if 'vix_spike' in df.columns:
@@ -73,8 +138,8 @@ def plot_nasdaq_and_vix(symbol, timeframe, df, tops_df=None, trades_df=None, hed
 
     # --- ATR Trailing Stop Line (para Largos) ---
     if 'active_atr_stop' in df.columns:
-        fig.add_trace(go.Scatter(
-            x=df['date'], y=df['active_atr_stop'], mode='lines',
+        fig.add_trace(Line(
+            x=plot_df['date'], y=plot_df['active_atr_stop'], mode='lines',
             name='ATR Trailing Stop (Long)',
             line=dict(color='green', width=1.5, dash='solid'),
             connectgaps=False
@@ -83,18 +148,17 @@ def plot_nasdaq_and_vix(symbol, timeframe, df, tops_df=None, trades_df=None, hed
     # --- Ploteo de la Estrategia Principal (Largos) ---
     if trades_df is not None and not trades_df.empty:
         fig.add_trace(go.Scatter(x=trades_df['entry_date'], y=trades_df['entry_price'], mode='markers', name='Entrada Largo', marker=dict(symbol='triangle-up', size=12, color='green', line=dict(width=1, color='darkgreen'))), row=1, col=1)
-        for _, trade in trades_df.iterrows():
-            color = 'green' if trade['profit_usd'] > 0 else 'red'
-            fig.add_trace(go.Scatter(x=[trade['exit_date']], y=[trade['exit_price']], mode='markers', marker=dict(symbol='square', size=8, color=color, line=dict(width=1, color='black')), showlegend=False), row=1, col=1)
-            fig.add_trace(go.Scatter(x=[trade['entry_date'], trade['exit_date']], y=[trade['entry_price'], trade['exit_price']], mode='lines', line=dict(color='gray', width=1), showlegend=False), row=1, col=1)
+        for trace in _trade_traces(trades_df['entry_date'], trades_df['entry_price'], trades_df['exit_date'], trades_df['exit_price'],
+                                   trades_df['profit_usd'], exit_size=8, line_color='gray', name='Salida Largo'):
+            fig.add_trace(trace, row=1, col=1)
 
     # --- Ploteo de la Estrategia de Cobertura (Cortos) ---
     if hedge_trades_df is not None and not hedge_trades_df.empty:
         fig.add_trace(go.Scatter(x=hedge_trades_df['hedge_entry_date'], y=hedge_trades_df['hedge_entry_price'], mode='markers', name='Entrada Corto (Hedge)', marker=dict(symbol='triangle-down', size=10, color='red', line=dict(width=1, color='darkred'))), row=1, col=1)
-        for _, trade in hedge_trades_df.iterrows():
-            color = 'green' if trade['hedge_profit_usd'] > 0 else 'red'
-            fig.add_trace(go.Scatter(x=[trade['hedge_exit_date']], y=[trade['hedge_exit_price']], mode='markers', marker=dict(symbol='square', size=8, color=color, line=dict(width=1, color='black')), showlegend=False), row=1, col=1)
-            fig.add_trace(go.Scatter(x=[trade['hedge_entry_date'], trade['hedge_exit_date']], y=[trade['hedge_entry_price'], trade['hedge_exit_price']], mode='lines', line=dict(color='red', width=1, dash='solid'), showlegend=False), row=1, col=1)
+        for trace in _trade_traces(hedge_trades_df['hedge_entry_date'], hedge_trades_df['hedge_entry_price'],
+                                   hedge_trades_df['hedge_exit_date'], hedge_trades_df['hedge_exit_price'],
+                                   hedge_trades_df['hedge_profit_usd'], exit_size=8, line_color='red', name='Salida Corto (Cross)'):
+            fig.add_trace(trace, row=1, col=1)
     
     # --- Ploteo de Entradas de Cobertura Corto con Triángulo Invertido Rojo ---
     if hedge_trades_df_slow_ema is not None and not hedge_trades_df_slow_ema.empty:
@@ -111,32 +175,17 @@ def plot_nasdaq_and_vix(symbol, timeframe, df, tops_df=None, trades_df=None, hed
             )
         ), row=1, col=1)
 
-    # Cuadrados de salida
-    for _, trade in hedge_trades_df_slow_ema.iterrows():
-        color = 'green' if trade['hedge_profit_usd'] > 0 else 'red'
-        fig.add_trace(go.Scatter(
-            x=[trade['hedge_exit_date']],
-            y=[trade['hedge_exit_price']],
-            mode='markers',
-            marker=dict(symbol='square', size=10, color=color, line=dict(width=1, color='black')),
-            name='Salida Corto (EMA)',
-            showlegend=False
-        ), row=1, col=1)
-
-        # Línea entre entrada y salida
-        fig.add_trace(go.Scatter(
-            x=[trade['hedge_entry_date'], trade['hedge_exit_date']],
-            y=[trade['hedge_entry_price'], trade['hedge_exit_price']],
-            mode='lines',
-            line=dict(color='grey', width=1, dash='solid'),
-            showlegend=False
-        ), row=1, col=1)
+        # Cuadrados de salida y línea entre entrada y salida
+        for trace in _trade_traces(hedge_trades_df_slow_ema['hedge_entry_date'], hedge_trades_df_slow_ema['hedge_entry_price'],
+                                   hedge_trades_df_slow_ema['hedge_exit_date'], hedge_trades_df_slow_ema['hedge_exit_price'],
+                                   hedge_trades_df_slow_ema['hedge_profit_usd'], exit_size=10, line_color='grey', name='Salida Corto (EMA)'):
+            fig.add_trace(trace, row=1, col=1)
 
     # --- Ploteo de VIX, Volumen y Ejes ---
     if 'vix' in df.columns:
-        fig.add_trace(go.Scatter(x=df['date'], y=df['vix'], mode='lines', name='VIX', line=dict(color='red', width=1.2)), row=1, col=1, secondary_y=True)
+        fig.add_trace(Line(x=plot_df['date'], y=plot_df['vix'], mode='lines', name='VIX', line=dict(color='red', width=1.2)), row=1, col=1, secondary_y=True)
     if 'nasdaq_volume_m' in df.columns:
-        fig.add_trace(go.Bar(x=df['date'], y=df['nasdaq_volume_m'], marker_color='rgba(0, 0, 255, 0.6)', name='NASDAQ Volume (M)'), row=2, col=1)
+        fig.add_trace(go.Bar(x=plot_df['date'], y=plot_df['nasdaq_volume_m'], marker_color='rgba(0, 0, 255, 0.6)', name='NASDAQ Volume (M)'), row=2, col=1)
     if tops_df is not None and not tops_df.empty:
         fig.add_trace(go.Scatter(x=tops_df['index_top_pos'], y=tops_df['VIX_top'], mode='markers', name='VIX Tops', marker=dict(symbol='circle', size=6, color='red', line=dict(width=1, color='darkred'))), row=1, col=1, secondary_y=True)
 
@@ -152,4 +201,9 @@ def plot_nasdaq_and_vix(symbol, timeframe, df, tops_df=None, trades_df=None, hed
 
     fig.write_html(html_path, config={"scrollZoom": True})
     print(f"✅ Gráfico Plotly guardado como HTML: '{html_path}'")
-    webbrowser.open('file://' + os.path.realpath(html_path))
\ No newline at end of file
+    if static_path:
+        fig.write_image(static_path)
+        print(f"🖼️ Imagen estática guardada en: '{static_path}'")
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(html_path))
+    return fig
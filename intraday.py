@@ -0,0 +1,97 @@
+# FILE: intraday.py
+# Backtest de la estrategia principal sobre barras intradía (p. ej. años de barras de 1 minuto
+# de QQQ y VIX, decenas de millones de filas) sin cargar la historia en memoria.
+#
+# Los datos se leen por bloques de un ColumnarBarStore (memory-maps por columna) y cada etapa
+# arrastra su estado de un bloque al siguiente:
+#   - StreamingIndicators: colas de las ventanas de las medias, ATR de Wilder y trailing stops.
+#   - VixTopDetector:      el pico del VIX pendiente de confirmar y su ventana.
+#   - VixLongTracker:      las operaciones abiertas y su fase de stop.
+#   - HedgeCrossTracker / EmaHedgeTracker: las coberturas (si se activan) y su corto abierto.
+#   - VixQuietDetector:    la media del VIX y el bloque tranquilo en curso (columna 'vix_spike'
+#                          del almacén de indicadores).
+# El pico de memoria depende del tamaño del bloque, no de la longitud de la historia.
+#
+# Las ventanas se cuentan en barras: con barras de 1 minuto, n/f/s y window_top son minutos.
+#
+#   store = ingest_intraday_csv('QQQ_1m.csv', 'VIX_1m.csv', 'data_cache/intraday_QQQ')
+#   ledger = run_chunked(store, chunk_size=1_000_000, window_top=15, factor_top=1.2)
+#   ledger = run_chunked(store, hedging_enabled=True, hedging_slow_ema_enable=True)   # + coberturas
+#   ledger.to_frame()
+
+import pandas as pd
+
+from market_data import ColumnarBarStore
+from quant_stat.find_vix_tops import VixTopDetector
+from quant_stat.indicators import StreamingIndicators
+from quant_stat.vix_spike_indicator import VixQuietDetector
+from strat_OM.strat_hedging_cross import HedgeCrossTracker
+from strat_OM.strat_hedging_ema import EmaHedgeTracker
+from strat_OM.strat_vix_long import VixLongTracker
+from strat_OM.execution import DEFAULT_EXECUTION
+from strat_OM.trade_ledger import merge_ledgers
+
+INDICATOR_COLUMNS = ['atr', 'sma_fast', 'sma_slow', 'nasdaq_atr', 'atr_trailing_stop', 'atr_trailing_stop_short',
+                     'vix_spike']
+
+
+def run_chunked(store, chunk_size=1_000_000, n=5, f=40, s=200, atr_multiplier=3.5,
+                window_top=15, factor_top=1.2, atr_factor=3, indicators_dir=None, execution=None,
+                hedging_enabled=False, hedging_slow_ema_enable=False, hedge_atr_multiplier=0.5,
+                quiet_window=50, quiet_threshold=0.8):
+    """
+    Indicadores -> techos del VIX -> estrategia principal (y coberturas), bloque a bloque.
+
+    Args:
+        store: ColumnarBarStore (o su directorio) con 'nasdaq', 'high_nasdaq', 'low_nasdaq' y 'VIX'.
+        chunk_size: barras por bloque (determina el pico de memoria).
+        indicators_dir: si se indica, guarda los indicadores en otro ColumnarBarStore
+            (para gráficos o análisis posteriores sin recalcularlos), con 'vix_spike'
+            (`find_vix_quiet_days` con `quiet_window` y `quiet_threshold`, 1.0 / 0.0).
+        execution: ExecutionModel con los llenados y costes (por defecto, sin costes). Con
+            `gap_fills` el almacén debe tener la apertura ('open_nasdaq', que guarda
+            `ingest_intraday_csv`); con barras intradía recoge los gaps entre sesiones.
+        hedging_enabled / hedging_slow_ema_enable / hedge_atr_multiplier: las coberturas
+            del Pipeline (cruce de medias y EMA lenta), apagadas por defecto.
+
+    Returns:
+        TradeLedger: Las operaciones (estrategia principal y coberturas activadas, ordenadas
+        por barra de entrada), con las fechas del almacén (memory-map) como índice.
+    """
+    if isinstance(store, str):
+        store = ColumnarBarStore(store)
+    execution = execution or DEFAULT_EXECUTION
+    if execution.gap_fills and execution.open_col not in store.columns:
+        raise ValueError(f"gap_fills requiere la columna '{execution.open_col}' en el almacén (ver ingest_intraday_csv).")
+    indicators = StreamingIndicators(n=n, f=f, s=s, atr_multiplier=atr_multiplier)
+    tops = VixTopDetector(window_top=window_top, factor_top=factor_top)
+    trackers = [VixLongTracker(atr_factor=atr_factor, dates=store.dates, execution=execution)]
+    if hedging_enabled:
+        trackers.append(HedgeCrossTracker(dates=store.dates, execution=execution))
+    if hedging_slow_ema_enable:
+        trackers.append(EmaHedgeTracker(atr_multiplier=hedge_atr_multiplier, dates=store.dates, execution=execution))
+    out = ColumnarBarStore(indicators_dir, columns=INDICATOR_COLUMNS) if indicators_dir else None
+    quiet = VixQuietDetector(window=quiet_window, threshold=quiet_threshold) if out is not None else None
+    pending = None      # última barra del bloque anterior: su 'vix_spike' depende de la barra siguiente
+
+    columns = ['nasdaq', 'high_nasdaq', 'low_nasdaq', 'VIX'] + ([execution.open_col] if execution.gap_fills else [])
+    for chunk in store.iter_chunks(chunk_size, columns=columns):
+        indicators.update(chunk)
+        confirmed = tops.update(chunk[['VIX', 'atr']])
+        entries = chunk.index.get_indexer(pd.DatetimeIndex([top[3] for top in confirmed]))
+        trackers[0].update(chunk, entries)
+        for tracker in trackers[1:]:
+            tracker.update(chunk)
+        if out is not None:
+            chunk['vix_spike'] = 0.0
+            block = pd.concat([pending, chunk[INDICATOR_COLUMNS]]) if pending is not None else chunk[INDICATOR_COLUMNS]
+            quiet_ends = [event[1] for event in quiet.update(chunk[['VIX']])]
+            block.loc[pd.DatetimeIndex(quiet_ends), 'vix_spike'] = 1.0
+            out.append(block.iloc[:-1])
+            pending = block.iloc[-1:].copy()
+
+    if pending is not None:
+        # Un bloque tranquilo que llega al final de los datos termina en la última barra
+        pending['vix_spike'] = float(quiet.last_quiet_date is not None)
+        out.append(pending)
+    return merge_ledgers(*(tracker.finish() for tracker in trackers))
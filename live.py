@@ -0,0 +1,264 @@
+# FILE: live.py
+# Paper trading en vivo de la estrategia principal (techos del VIX -> largos con stop en dos fases).
+#
+# Un servicio asyncio lee barras de una fuente intercambiable (un CSV reproducido o un socket
+# TCP con una barra JSON por línea) y en cada barra:
+#   1. actualiza los indicadores con StreamingIndicators (medias, ATR, trailing stop),
+#   2. busca el techo con VixTopDetector,
+#   3. mueve los stops de las operaciones abiertas con VixLongTracker,
+# y emite las órdenes de entrada y salida. Cada barra cuesta O(1): nada se recalcula sobre la
+# historia, y el estado es el mismo que el del backtest (mismas operaciones, bit a bit).
+#
+#   python live.py replay outputs/bars.csv                 # reproduce un CSV
+#   python live.py serve outputs/bars.csv --port 9009      # stub: sirve el CSV por TCP
+#   python live.py socket --port 9009                      # consume barras del socket
+#
+# Formato de barra (CSV o JSON): date, nasdaq, high_nasdaq, low_nasdaq, VIX y, opcional, open_nasdaq.
+
+import sys
+import csv
+import json
+import time
+import asyncio
+import argparse
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from quant_stat.find_vix_tops import VixTopDetector
+from quant_stat.indicators import StreamingIndicators
+from strat_OM.strat_vix_long import VixLongTracker
+from strat_OM.trade_ledger import OUTCOME_NAMES
+
+Bar = namedtuple('Bar', ['date', 'close', 'high', 'low', 'vix', 'open'], defaults=(np.nan,))
+Order = namedtuple('Order', ['date', 'side', 'price', 'reason', 'trade_id'])
+
+BAR_FIELDS = ['date', 'nasdaq', 'high_nasdaq', 'low_nasdaq', 'VIX']
+OPEN_FIELD = 'open_nasdaq'      # opcional: sólo la usa un modelo de ejecución con gap_fills
+
+
+def parse_bar(record):
+    """Barra a partir de un dict con `BAR_FIELDS` y, si la trae, `OPEN_FIELD` (fila de CSV o mensaje JSON)."""
+    return Bar(pd.Timestamp(record['date']), float(record['nasdaq']), float(record['high_nasdaq']),
+               float(record['low_nasdaq']), float(record['VIX']), float(record.get(OPEN_FIELD) or np.nan))
+
+
+# ====================================================
+# 📡 FUENTES DE BARRAS
+# ====================================================
+class FileBarSource:
+    """
+    Reproduce las barras de un CSV (columnas `BAR_FIELDS`, ordenadas por fecha).
+
+    Args:
+        delay: segundos entre barras (0 = tan rápido como se procesen).
+    """
+
+    def __init__(self, path, delay=0.0):
+        self.path = path
+        self.delay = delay
+
+    async def __aiter__(self):
+        with open(self.path, newline='') as fh:
+            for record in csv.DictReader(fh):
+                yield parse_bar(record)
+                await asyncio.sleep(self.delay)
+
+
+class SocketBarSource:
+    """Barras por TCP, una por línea en JSON (ver `serve_replay`). Termina cuando se cierra la conexión."""
+
+    def __init__(self, host='127.0.0.1', port=9009):
+        self.host = host
+        self.port = port
+
+    async def __aiter__(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    yield parse_bar(json.loads(line))
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+
+async def serve_replay(path, host='127.0.0.1', port=9009, delay=0.0):
+    """
+    Stub de un proveedor de datos: sirve un CSV por TCP (una barra JSON por línea) a cada
+    cliente que se conecta. Devuelve el servidor de asyncio (`async with server: ...`).
+    """
+    async def handle(reader, writer):
+        with open(path, newline='') as fh:
+            for record in csv.DictReader(fh):
+                fields = BAR_FIELDS + [OPEN_FIELD] if OPEN_FIELD in record else BAR_FIELDS
+                writer.write((json.dumps({field: record[field] for field in fields}) + '\n').encode())
+                await writer.drain()
+                await asyncio.sleep(delay)
+        writer.close()
+        await writer.wait_closed()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+# ====================================================
+# 🧠 MOTOR
+# ====================================================
+class LiveVixLong:
+    """
+    Estado en vivo de la estrategia principal: indicadores, detector de techos y operaciones abiertas.
+
+    `on_bar()` procesa una barra en tiempo constante y devuelve las órdenes que genera:
+    BUY al cierre de la barra que confirma un techo, SELL al nivel del stop (fijo o trailing)
+    que toca la barra. `warm_up()` carga historia por lotes sin emitir órdenes, con el mismo
+    estado final que si se hubiera recibido barra a barra.
+
+    `execution` (ExecutionModel) fija los llenados y costes del registro final (`ledger()`);
+    las órdenes se emiten a los niveles del simulador.
+    """
+
+    def __init__(self, n=5, f=40, s=200, atr_multiplier=3.5, window_top=15, factor_top=1.2, atr_factor=3,
+                 execution=None, latency_window=100_000):
+        self.indicators = StreamingIndicators(n=n, f=f, s=s, atr_multiplier=atr_multiplier)
+        self.tops = VixTopDetector(window_top=window_top, factor_top=factor_top)
+        self.tracker = VixLongTracker(atr_factor=atr_factor, execution=execution)
+        self.dates = []
+        self.latency_ns = deque(maxlen=latency_window)
+
+    def warm_up(self, df, chunk_size=1_000_000):
+        """Historia previa (DataFrame con 'nasdaq', 'high_nasdaq', 'low_nasdaq', 'VIX' y 'open_nasdaq' si la hay), por bloques."""
+        columns = ['nasdaq', 'high_nasdaq', 'low_nasdaq', 'VIX'] + ([OPEN_FIELD] if OPEN_FIELD in df.columns else [])
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size][columns].copy()
+            self.indicators.update(chunk)
+            confirmed = self.tops.update(chunk[['VIX', 'atr']])
+            entries = chunk.index.get_indexer(pd.DatetimeIndex([top[3] for top in confirmed]))
+            self.tracker.update(chunk, entries)
+            self.dates.extend(chunk.index)
+        return self
+
+    def on_bar(self, bar):
+        """Procesa una barra y devuelve la lista de órdenes (Order)."""
+        t0 = time.perf_counter_ns()
+        ind = self.indicators.update_bar(bar.close, bar.high, bar.low, bar.vix)
+        confirmed = self.tops.update_bar(bar.date, bar.vix, ind['atr'])
+        opened, closed = self.tracker.on_bar(bar.close, bar.low, ind['atr_trailing_stop'], ind['nasdaq_atr'],
+                                             entry=bool(confirmed), bar_open=bar.open)
+        self.dates.append(bar.date)
+
+        orders = [Order(bar.date, 'SELL', exit_price, OUTCOME_NAMES[outcome], entry_idx)
+                  for entry_idx, _, _, exit_price, outcome, *_ in closed]
+        if opened is not None:
+            orders.append(Order(bar.date, 'BUY', opened[1], 'vix_top', opened[0]))
+        self.latency_ns.append(time.perf_counter_ns() - t0)
+        return orders
+
+    def latency_summary(self):
+        """Latencia por barra de las últimas barras (microsegundos)."""
+        if not self.latency_ns:
+            return {}
+        lat = np.asarray(self.latency_ns) / 1e3
+        return {'bars': len(lat), 'mean_us': lat.mean(), 'p50_us': np.percentile(lat, 50),
+                'p99_us': np.percentile(lat, 99), 'max_us': lat.max()}
+
+    def ledger(self):
+        """Cierra a mercado (última barra) las operaciones abiertas y devuelve el TradeLedger completo."""
+        self.tracker.ledger.dates = pd.DatetimeIndex(self.dates)
+        return self.tracker.finish()
+
+
+# ====================================================
+# 🧾 ÓRDENES
+# ====================================================
+def print_order(order):
+    icon = '🟢' if order.side == 'BUY' else '🔴'
+    print(f"{icon} {order.date} {order.side} @ {order.price:.2f} ({order.reason}, trade {order.trade_id})")
+
+
+class CsvOrderLog:
+    """Añade cada orden como una fila del CSV `path`."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, 'a', newline='')
+        self._writer = csv.writer(self._fh)
+        if self._fh.tell() == 0:
+            self._writer.writerow(Order._fields)
+
+    def __call__(self, order):
+        self._writer.writerow(order)
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+
+async def run_live(source, engine, on_order=print_order):
+    """
+    Bucle del servicio: cada barra de `source` pasa por `engine.on_bar()` y sus órdenes por
+    `on_order` (función o corrutina). Termina cuando la fuente se agota.
+    """
+    async for bar in source:
+        for order in engine.on_bar(bar):
+            result = on_order(order)
+            if asyncio.iscoroutine(result):
+                await result
+    return engine
+
+
+# ====================================================
+# 🖥️ CLI
+# ====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paper trading en vivo de la estrategia VIX-top.")
+    parser.add_argument('mode', choices=['replay', 'socket', 'serve'])
+    parser.add_argument('path', nargs='?', help="CSV de barras (replay / serve)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9009)
+    parser.add_argument('--delay', type=float, default=0.0, help="segundos entre barras al reproducir")
+    parser.add_argument('--warm-up', help="CSV con historia previa para inicializar el estado")
+    parser.add_argument('--orders', help="CSV donde registrar las órdenes")
+    parser.add_argument('--window-top', type=int, default=15)
+    parser.add_argument('--factor-top', type=float, default=1.2)
+    parser.add_argument('--atr-factor', type=float, default=3)
+    args = parser.parse_args(argv)
+    if args.mode in ('replay', 'serve') and not args.path:
+        parser.error(f"'{args.mode}' requiere el CSV de barras")
+
+    async def serve():
+        server = await serve_replay(args.path, args.host, args.port, args.delay)
+        print(f"📡 Sirviendo '{args.path}' en {args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    if args.mode == 'serve':
+        asyncio.run(serve())
+        return 0
+
+    engine = LiveVixLong(window_top=args.window_top, factor_top=args.factor_top, atr_factor=args.atr_factor)
+    if args.warm_up:
+        engine.warm_up(pd.read_csv(args.warm_up, index_col='date', parse_dates=True))
+    source = FileBarSource(args.path, args.delay) if args.mode == 'replay' else SocketBarSource(args.host, args.port)
+
+    order_log = CsvOrderLog(args.orders) if args.orders else None
+
+    def on_order(order):
+        print_order(order)
+        if order_log:
+            order_log(order)
+
+    try:
+        asyncio.run(run_live(source, engine, on_order))
+    except ConnectionRefusedError:
+        print(f"❌ No hay ningún proveedor de barras en {args.host}:{args.port} (ver 'python live.py serve').")
+        return 1
+    finally:
+        if order_log:
+            order_log.close()
+    print(pd.Series(engine.latency_summary()).round(1).to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+# FILE: market_data.py
+# Descarga, cachea en disco y normaliza los datos de mercado (QQQ + VIX) que usa todo el sistema.
+#
+# Los precios de cada símbolo se guardan en Parquet dentro de `data_cache/` junto con el
+# rango de fechas ya descargado. Las lecturas se sirven desde disco y al proveedor sólo se
+# le pide el tramo que falta (normalmente la cola más reciente).
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+BAR_COLUMNS = ['open_nasdaq', 'nasdaq', 'high_nasdaq', 'low_nasdaq', 'nasdaq_volume_M', 'VIX']
+
+
+def _normalize_ohlcv(raw):
+    """Columnas en minúsculas (open/high/low/close/volume) e índice 'date' sin zona horaria."""
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='date'))
+    raw = raw.copy()
+    if isinstance(raw.columns, pd.MultiIndex):
+        raw.columns = raw.columns.droplevel(1)
+    raw = raw.drop(columns=['Ticker'], errors='ignore')
+    raw.columns = [str(col).lower() for col in raw.columns]
+    raw.index = pd.to_datetime(raw.index)
+    if raw.index.tz is not None:
+        raw.index = raw.index.tz_localize(None)
+    raw.index.name = 'date'
+    return raw[[col for col in OHLCV_COLUMNS if col in raw.columns]].sort_index()
+
+
+class YahooProvider:
+    """Proveedor de precios diarios de Yahoo Finance (requiere red)."""
+
+    def fetch(self, symbol, start, end):
+        import yfinance as yf
+        return _normalize_ohlcv(yf.download(symbol, start=start, end=end))
+
+
+class CsvProvider:
+    """
+    Proveedor local: lee `<directorio>/<SYMBOL>.csv` con columnas Date, Open, High, Low, Close, Volume.
+    Útil en máquinas sin red y como fixture en pruebas.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, symbol, start, end):
+        path = os.path.join(self.directory, f"{symbol.lstrip('^')}.csv")
+        if not os.path.exists(path):
+            return _normalize_ohlcv(None)
+        raw = pd.read_csv(path, index_col=0, parse_dates=True)
+        raw = _normalize_ohlcv(raw)
+        return raw[(raw.index >= pd.Timestamp(start)) & (raw.index < pd.Timestamp(end))]
+
+
+class MarketDataStore:
+    """
+    Caché en disco de precios OHLCV por símbolo.
+
+    Para cada símbolo guarda `<SYMBOL>.parquet` y `<SYMBOL>.json` con el rango [start, end)
+    ya cubierto (ver `_covered`). `get()` sirve desde disco y sólo pide al proveedor lo que falta.
+    """
+
+    def __init__(self, cache_dir='data_cache', provider=None):
+        self.cache_dir = cache_dir
+        self.provider = provider if provider is not None else YahooProvider()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, symbol):
+        name = symbol.lstrip('^')
+        return (os.path.join(self.cache_dir, f"{name}.parquet"),
+                os.path.join(self.cache_dir, f"{name}.json"))
+
+    def _read(self, symbol):
+        data_path, meta_path = self._paths(symbol)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, None
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+        return pd.read_parquet(data_path), (pd.Timestamp(meta['start']), pd.Timestamp(meta['end']))
+
+    def _write(self, symbol, data, coverage):
+        data_path, meta_path = self._paths(symbol)
+        data.to_parquet(data_path)
+        with open(meta_path, 'w') as fh:
+            json.dump({'start': str(coverage[0].date()), 'end': str(coverage[1].date())}, fh)
+
+    def _fetch(self, symbol, start, end):
+        """
+        Pide un tramo al proveedor. Devuelve un DataFrame (vacío si no hay barras en el tramo)
+        o None si la descarga falla (p.ej. sin red).
+        """
+        try:
+            chunk = self.provider.fetch(symbol, start, end)
+        except Exception as exc:
+            print(f"⚠️ No se pudo descargar {symbol} [{start.date()}, {end.date()}): {exc}")
+            return None
+        return chunk if chunk is not None else _normalize_ohlcv(None)
+
+    @staticmethod
+    def _covered(fetched, start, end):
+        """
+        Tramo que cubre una descarga de [start, end). Un tramo pasado queda cubierto entero,
+        aunque empiece o acabe en festivo o fin de semana o no tenga barras. Si llega a hoy o
+        al futuro, el final se recorta al día siguiente a la última barra recibida: así la
+        próxima llamada pide las barras que se publiquen después.
+        """
+        if end <= pd.Timestamp.today().normalize():
+            return start, end
+        last = fetched.index[-1].normalize() + pd.Timedelta(days=1) if not fetched.empty else start
+        return start, max(start, min(end, last))
+
+    def get(self, symbol, start, end):
+        """Precios OHLCV de `symbol` en [start, end), sirviendo desde la caché siempre que se pueda."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        data, coverage = self._read(symbol)
+
+        if data is None:
+            fetched = self._fetch(symbol, start, end)
+            if fetched is not None and not fetched.empty:
+                data, coverage = fetched, self._covered(fetched, start, end)
+                self._write(symbol, data, coverage)
+        else:
+            missing = []
+            if start < coverage[0]:
+                missing.append((start, coverage[0]))
+            if end > coverage[1]:
+                missing.append((coverage[1], end))
+            new_start, new_end = coverage
+            chunks = [data]
+            for gap_start, gap_end in missing:
+                fetched = self._fetch(symbol, gap_start, gap_end)
+                if fetched is not None:
+                    if not fetched.empty:
+                        chunks.append(fetched)
+                    gap_start, gap_end = self._covered(fetched, gap_start, gap_end)
+                    new_start, new_end = min(new_start, gap_start), max(new_end, gap_end)
+            if (new_start, new_end) != coverage:
+                data = pd.concat(chunks)
+                data = data[~data.index.duplicated(keep='last')].sort_index()
+                coverage = (new_start, new_end)
+                self._write(symbol, data, coverage)
+
+        if data is None:
+            raise RuntimeError(f"❌ No hay datos para {symbol} ni en caché ni en el proveedor.")
+        return data[(data.index >= start) & (data.index < end)]
+
+
+def instrument_columns(name='nasdaq'):
+    """Columnas del sistema para un activo: 'open_<name>', `name`, 'high_<name>', 'low_<name>' y '<name>_volume_M'."""
+    return {'open': f'open_{name}', 'close': name, 'high': f'high_{name}', 'low': f'low_{name}',
+            'volume': f'{name}_volume_M'}
+
+
+def normalize_driver(prices, name='VIX'):
+    """Devuelve el cierre de un índice de volatilidad (VIX, VXN, RVX...) con columnas 'date' y `name`."""
+    driver = prices.rename(columns={'close': name})
+    driver = driver.reset_index()
+    return driver
+
+
+def normalize_instrument(prices, name='nasdaq', scale=10):
+    """
+    Normaliza un activo a las columnas del sistema (ver `instrument_columns`):
+    precios redondeados a 2 decimales y multiplicados por `scale`, volumen en millones.
+    La apertura se conserva si la fuente la trae (los stops la usan para distinguir un gap
+    de un toque dentro de la barra).
+    """
+    columns = instrument_columns(name)
+    fields = (['open'] if 'open' in prices.columns else []) + ['close', 'high', 'low', 'volume']
+    price_cols = [columns[field] for field in fields if field != 'volume']
+    volume_col = columns['volume']
+    df = prices[fields].copy()
+    df.rename(columns=columns, inplace=True)
+    df[volume_col] /= 1_000_000
+    df[price_cols] = (df[price_cols].round(2) * scale)
+    df[volume_col] = df[volume_col].round(2)
+    df.reset_index(inplace=True)
+    return df
+
+
+def normalize_vix(prices):
+    """Devuelve el cierre del VIX con columnas 'date' y 'VIX'."""
+    return normalize_driver(prices, 'VIX')
+
+
+def normalize_nasdaq(prices):
+    """
+    Normaliza QQQ a las columnas del sistema:
+    'open_nasdaq', 'nasdaq', 'high_nasdaq', 'low_nasdaq' (x10) y 'nasdaq_volume_M'.
+    """
+    return normalize_instrument(prices, 'nasdaq', scale=10)
+
+
+def load_market_data(start='2020-01-01', vix_end='2025-08-01', nasdaq_end='2025-07-30', store=None):
+    """
+    Devuelve el DataFrame principal indexado por 'date' con el NASDAQ y el VIX alineados.
+
+    Args:
+        store: MarketDataStore a usar (por defecto, caché en 'data_cache/' con Yahoo Finance).
+    """
+    store = store if store is not None else MarketDataStore()
+    vix = normalize_vix(store.get('^VIX', start, vix_end))
+    df = normalize_nasdaq(store.get('QQQ', start, nasdaq_end))
+    df = pd.merge(df, vix[['date', 'VIX']], on='date', how='left')
+    df.set_index('date', inplace=True)
+    return df
+
+
+# ====================================================
+# Barras intradía fuera de memoria
+# ====================================================
+class ColumnarBarStore:
+    """
+    Barras en disco por columnas, para historias que no caben en memoria (años de barras de 1 minuto).
+
+    Cada columna es un fichero binario plano `<columna>.f8` (float64) y las fechas van en
+    `date.i8` (nanosegundos); `meta.json` guarda las columnas y el nº de filas. Las lecturas
+    son memory-maps de sólo lectura, así que abrir el almacén no carga nada, y `append()`
+    añade al final de cada fichero sin reescribirlo.
+    """
+
+    def __init__(self, directory, columns=None):
+        self.directory = directory
+        self._meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as fh:
+                meta = json.load(fh)
+            self.columns, self.n_rows = meta['columns'], meta['n_rows']
+        else:
+            if columns is None:
+                raise ValueError(f"❌ No existe el almacén '{directory}': indica sus columnas para crearlo.")
+            os.makedirs(directory, exist_ok=True)
+            self.columns, self.n_rows = list(columns), 0
+            self._write_meta()
+
+    def __len__(self):
+        return self.n_rows
+
+    def _path(self, name):
+        return os.path.join(self.directory, 'date.i8' if name == 'date' else f'{name}.f8')
+
+    def _write_meta(self):
+        with open(self._meta_path, 'w') as fh:
+            json.dump({'columns': self.columns, 'n_rows': self.n_rows}, fh)
+
+    def _map(self, name, dtype):
+        if not self.n_rows:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(name), dtype=dtype, mode='r', shape=(self.n_rows,))
+
+    @property
+    def dates(self):
+        """Fechas de todas las barras (memory-map datetime64[ns], sin cargarlas)."""
+        return self._map('date', np.int64).view('datetime64[ns]')
+
+    def column(self, name):
+        """Una columna completa como memory-map de sólo lectura."""
+        return self._map(name, np.float64)
+
+    def append(self, frame):
+        """Añade barras (DataFrame indexado por fecha con las columnas del almacén, posteriores a las guardadas)."""
+        if frame.empty:
+            return self
+        dates = pd.DatetimeIndex(frame.index).values.astype('datetime64[ns]')
+        if self.n_rows and dates[0] <= self.dates[-1]:
+            raise ValueError("❌ Las barras nuevas deben ser posteriores a las ya guardadas.")
+        with open(self._path('date'), 'ab') as fh:
+            dates.view(np.int64).tofile(fh)
+        for name in self.columns:
+            with open(self._path(name), 'ab') as fh:
+                frame[name].to_numpy(dtype=np.float64).tofile(fh)
+        self.n_rows += len(frame)
+        self._write_meta()
+        return self
+
+    def iter_chunks(self, chunk_size=1_000_000, columns=None):
+        """Recorre el almacén en bloques de `chunk_size` barras (cada bloque es un DataFrame en memoria)."""
+        columns = columns or self.columns
+        dates = self.dates
+        maps = {name: self.column(name) for name in columns}
+        for start in range(0, self.n_rows, chunk_size):
+            stop = min(start + chunk_size, self.n_rows)
+            yield pd.DataFrame({name: np.array(values[start:stop]) for name, values in maps.items()},
+                               index=pd.DatetimeIndex(np.array(dates[start:stop]), name='date'))
+
+    @classmethod
+    def from_frame(cls, df, directory, chunk_size=1_000_000):
+        """Vuelca un DataFrame ya cargado a un almacén nuevo."""
+        store = cls(directory, columns=list(df.columns))
+        for start in range(0, len(df), chunk_size):
+            store.append(df.iloc[start:start + chunk_size])
+        return store
+
+
+def _read_ohlcv_chunks(path, chunksize):
+    for raw in pd.read_csv(path, index_col=0, parse_dates=True, chunksize=chunksize):
+        yield _normalize_ohlcv(raw)
+
+
+def ingest_intraday_csv(price_csv, vix_csv, directory, chunksize=1_000_000, name='nasdaq', scale=10):
+    """
+    Convierte dos CSV intradía (activo y VIX, columnas Date, Open, High, Low, Close, Volume,
+    ordenados por fecha) en un ColumnarBarStore con las columnas del sistema, leyendo por bloques.
+
+    El VIX se une a las barras del activo por fecha exacta (como el left join de
+    `load_market_data`); sólo se mantiene en memoria el tramo de VIX del bloque en curso.
+    """
+    columns = instrument_columns(name)
+    store = ColumnarBarStore(directory, columns=[columns['open'], columns['close'], columns['high'], columns['low'],
+                                                 columns['volume'], 'VIX'])
+    vix_chunks = _read_ohlcv_chunks(vix_csv, chunksize)
+    vix_buffer = None
+    vix_done = False
+
+    for prices in _read_ohlcv_chunks(price_csv, chunksize):
+        if prices.empty:
+            continue
+        last = prices.index[-1]
+        while not vix_done and (vix_buffer is None or vix_buffer.empty or vix_buffer.index[-1] < last):
+            try:
+                vix = next(vix_chunks)['close']
+            except StopIteration:
+                vix_done = True
+                break
+            vix_buffer = vix if vix_buffer is None or vix_buffer.empty else pd.concat([vix_buffer, vix])
+        if vix_buffer is None:
+            vix_buffer = pd.Series(dtype=float)
+        bars = normalize_instrument(prices, name=name, scale=scale).set_index('date')
+        bars['VIX'] = vix_buffer.reindex(bars.index).to_numpy()
+        vix_buffer = vix_buffer[vix_buffer.index > last]
+        store.append(bars)
+    return store
@@ -0,0 +1,258 @@
+# FILE: pipeline.py
+# API reutilizable del backtest: cada paso de main.py es una etapa con nombre que se
+# calcula bajo demanda y se memoriza según sus parámetros y los de sus etapas previas.
+#
+#   bt = Pipeline(factor_top=1.3)
+#   bt.combined_trades          # sólo calcula datos -> indicadores -> techos -> estrategias
+#   bt.set(atr_factor=4)        # invalida sólo long_trades, combined_trades y charts
+#   bt.combined_trades
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from market_data import load_market_data
+from quant_stat.indicators import compute_indicators, read_only
+from quant_stat.find_vix_tops import find_vix_tops
+from quant_stat.vix_spike_indicator import find_vix_quiet_days
+from strat_OM.strat_vix_long import simulate_vix_long_ledger, vix_long_trades_frame
+from strat_OM.strat_hedging_cross import strat_hedging_cross_ledger
+from strat_OM.strat_hedging_ema import ema_short_hedging_ledger
+from strat_OM.strats_outputs_join import join_ledgers
+from strat_OM.trade_ledger import TradeLedger, hedge_trades_frame, merge_ledgers
+from strat_OM.portfolio import mark_to_market
+from strat_OM.execution import ExecutionModel
+
+TOPS_COLUMNS = ['tag', 'index_top_pos', 'VIX_top', 'top_confirm']
+EXECUTION_PARAMS = ('point_value', 'contracts', 'commission', 'tick_size', 'slippage_ticks', 'slippage_atr',
+                    'gap_fills')
+
+DEFAULT_PARAMS = {
+    # Datos
+    'start': '2020-01-01',
+    'vix_end': '2025-08-01',
+    'nasdaq_end': '2025-07-30',
+    # Indicadores
+    'n': 5,
+    'f': 40,
+    's': 200,
+    'atr_multiplier': 3.5,
+    'quiet_window': 50,
+    'quiet_threshold': 0.8,
+    'compact': False,          # medias en float32 y DataFrame de sólo lectura (ver _indicators)
+    # Techos del VIX
+    'window_top': 15,
+    'factor_top': 1.2,
+    # Estrategias
+    'atr_factor': 3,
+    'hedging_enabled': False,
+    'hedging_slow_ema_enable': True,
+    'hedge_atr_multiplier': 0.5,
+    # Ejecución (ver strat_OM/execution.py; por defecto sin costes, como antes)
+    'point_value': 50,         # USD por punto y contrato
+    'contracts': 1,
+    'commission': 0.0,         # USD por contrato y lado
+    'tick_size': 0.25,
+    'slippage_ticks': 0,
+    'slippage_atr': 0.0,       # deslizamiento en fracciones del ATR
+    'gap_fills': False,        # stops saltados en la apertura -> llenado a la apertura ('open_nasdaq')
+    # Cartera
+    'initial_capital': 10000,
+    # Gráficos
+    'symbol': 'NASDAQ',
+    'timeframe': 'daily',
+    'open_browser': True,
+}
+
+# nombre -> (función, parámetros propios, etapas previas)
+STAGES = OrderedDict()
+
+
+def stage(name, params=(), deps=()):
+    """Registra una etapa del pipeline."""
+    def register(fn):
+        STAGES[name] = (fn, tuple(params), tuple(deps))
+        return fn
+    return register
+
+
+@stage('data', params=('start', 'vix_end', 'nasdaq_end'))
+def _data(bt, p):
+    if bt._data_override is not None:
+        return bt._data_override
+    return load_market_data(start=p['start'], vix_end=p['vix_end'], nasdaq_end=p['nasdaq_end'], store=bt.store)
+
+
+def chart_frame(indicators):
+    """
+    El DataFrame de indicadores con la fecha como columna 'date' (lo que esperan los gráficos),
+    como `reset_index()` pero sin copiar las columnas.
+    """
+    df = indicators.copy(deep=False)
+    df.insert(0, 'date', indicators.index)
+    df.index = pd.RangeIndex(len(df))
+    return df
+
+
+@stage('indicators', params=('n', 'f', 's', 'atr_multiplier', 'quiet_window', 'quiet_threshold', 'compact'),
+       deps=('data',))
+def _indicators(bt, p, data):
+    # Copia superficial: compute_indicators sólo añade columnas, los precios no se duplican.
+    # En modo compacto las medias nacen en float32 (ATR y stops siguen en float64: son niveles
+    # de llenado) y todo queda de sólo lectura, también los precios que se comparten con la
+    # etapa 'data' (nadie debe escribir en ellos).
+    df = compute_indicators(data.copy(deep=False), n=p['n'], f=p['f'], s=p['s'], atr_multiplier=p['atr_multiplier'],
+                            cache=bt.indicator_cache, dtype=np.float32 if p['compact'] else np.float64)
+    df['vix_spike'] = find_vix_quiet_days(df, window=p['quiet_window'], threshold=p['quiet_threshold']).values
+    return read_only(df) if p['compact'] else df
+
+
+@stage('tops', params=('window_top', 'factor_top'), deps=('indicators',))
+def _tops(bt, p, indicators):
+    return pd.DataFrame(find_vix_tops(indicators, window_top=p['window_top'], factor_top=p['factor_top']),
+                        columns=TOPS_COLUMNS)
+
+
+def execution_model(p):
+    """ExecutionModel a partir de los parámetros de `EXECUTION_PARAMS`."""
+    return ExecutionModel(**{key: p[key] for key in EXECUTION_PARAMS})
+
+
+@stage('hedge_cross_ledger', params=('hedging_enabled',) + EXECUTION_PARAMS, deps=('indicators',))
+def _hedge_cross_ledger(bt, p, indicators):
+    if not p['hedging_enabled']:
+        return TradeLedger(dates=indicators.index, capacity=1)
+    return strat_hedging_cross_ledger(df=indicators, fast_ma_col='sma_fast', slow_ma_col='sma_slow',
+                                      execution=execution_model(p))
+
+
+@stage('hedge_ema_ledger', params=('hedging_slow_ema_enable', 'hedge_atr_multiplier') + EXECUTION_PARAMS,
+       deps=('indicators',))
+def _hedge_ema_ledger(bt, p, indicators):
+    if not p['hedging_slow_ema_enable']:
+        return TradeLedger(dates=indicators.index, capacity=1)
+    return ema_short_hedging_ledger(indicators, atr_multiplier=p['hedge_atr_multiplier'], execution=execution_model(p))
+
+
+@stage('long_ledger', params=('atr_factor',) + EXECUTION_PARAMS, deps=('indicators', 'tops'))
+def _long_ledger(bt, p, indicators, tops):
+    return simulate_vix_long_ledger(indicators, tops, atr_factor=p['atr_factor'], execution=execution_model(p))
+
+
+@stage('hedge_cross', deps=('hedge_cross_ledger',))
+def _hedge_cross(bt, p, hedge_cross_ledger):
+    return hedge_trades_frame(hedge_cross_ledger)
+
+
+@stage('hedge_ema', deps=('hedge_ema_ledger',))
+def _hedge_ema(bt, p, hedge_ema_ledger):
+    return hedge_trades_frame(hedge_ema_ledger, return_decimals=4)
+
+
+@stage('long_trades', deps=('long_ledger',))
+def _long_trades(bt, p, long_ledger):
+    return vix_long_trades_frame(long_ledger)
+
+
+@stage('combined_trades', deps=('long_ledger', 'hedge_cross_ledger', 'hedge_ema_ledger'))
+def _combined_trades(bt, p, long_ledger, hedge_cross_ledger, hedge_ema_ledger):
+    return join_ledgers(long_ledger, hedge_cross_ledger, hedge_ema_ledger)
+
+
+@stage('portfolio', params=('initial_capital', 'point_value', 'contracts'),
+       deps=('indicators', 'long_ledger', 'hedge_cross_ledger', 'hedge_ema_ledger'))
+def _portfolio(bt, p, indicators, long_ledger, hedge_cross_ledger, hedge_ema_ledger):
+    combined = merge_ledgers(long_ledger, hedge_cross_ledger, hedge_ema_ledger)
+    return mark_to_market(combined, indicators['nasdaq'].to_numpy(dtype=float), initial_capital=p['initial_capital'],
+                          point_value=p['point_value'] * p['contracts'])
+
+
+@stage('charts', params=('symbol', 'timeframe', 'open_browser'),
+       deps=('indicators', 'tops', 'long_trades', 'hedge_cross', 'hedge_ema'))
+def _charts(bt, p, indicators, tops, long_trades, hedge_cross, hedge_ema):
+    from chart_volume import plot_nasdaq_and_vix
+    from chart_active_trades import plot_vix_and_price_only
+
+    df = chart_frame(indicators)
+    return {
+        'nasdaq_vix': plot_nasdaq_and_vix(
+            symbol=p['symbol'], timeframe=p['timeframe'], df=df, tops_df=tops, trades_df=long_trades,
+            hedge_trades_df=hedge_cross, hedge_trades_df_slow_ema=hedge_ema, open_browser=p['open_browser']),
+        'active_trades': plot_vix_and_price_only(
+            symbol=p['symbol'], timeframe=p['timeframe'], df=df, tops_df=tops, open_browser=p['open_browser']),
+    }
+
+
+class Pipeline:
+    """
+    Backtest VIX/NASDAQ con etapas perezosas y memorizadas.
+
+    Etapas: data, indicators, tops, hedge_cross, hedge_ema, long_trades,
+    combined_trades, portfolio y charts. Las estrategias se simulan en las etapas `*_ledger`
+    (TradeLedger); `long_trades`, `hedge_cross` y `hedge_ema` son sus DataFrames. Se accede a ellas como atributos (`bt.tops`) o con
+    `bt.get('tops')`. Cada resultado se guarda bajo una clave formada por los
+    parámetros de la etapa y las claves de sus etapas previas, así que cambiar un
+    parámetro con `set()` sólo recalcula las etapas que dependen de él.
+
+    Los resultados memorizados se comparten: no los modifiques en sitio.
+
+    Args:
+        data: DataFrame de mercado ya cargado (si no, se usa `load_market_data`).
+        store: MarketDataStore para `load_market_data`.
+        indicator_cache: IndicatorCache en disco para los indicadores (opcional).
+        cache_size: resultados que se guardan por etapa (LRU).
+        **params: cualquier clave de `DEFAULT_PARAMS`.
+    """
+
+    def __init__(self, data=None, store=None, indicator_cache=None, cache_size=4, **params):
+        self._data_override = data
+        self.store = store
+        self.indicator_cache = indicator_cache
+        self.cache_size = cache_size
+        self.params = dict(DEFAULT_PARAMS)
+        self._cache = {name: OrderedDict() for name in STAGES}
+        self.set(**params)
+
+    def set(self, **params):
+        """Cambia parámetros; las etapas afectadas se recalcularán en el próximo acceso."""
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos: {sorted(unknown)}")
+        self.params.update(params)
+        return self
+
+    def key(self, name):
+        """Clave de memoización de una etapa: sus parámetros + las claves de sus dependencias."""
+        _, params, deps = STAGES[name]
+        return (tuple(self.params[p] for p in params), tuple(self.key(dep) for dep in deps))
+
+    def is_cached(self, name):
+        return self.key(name) in self._cache[name]
+
+    def get(self, name):
+        """Devuelve el resultado de la etapa `name`, calculándolo sólo si hace falta."""
+        if name not in STAGES:
+            raise KeyError(f"Etapa desconocida: '{name}'. Disponibles: {list(STAGES)}")
+        cache = self._cache[name]
+        key = self.key(name)
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        fn, params, deps = STAGES[name]
+        value = fn(self, {p: self.params[p] for p in params}, *(self.get(dep) for dep in deps))
+        cache[key] = value
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def invalidate(self, name=None):
+        """Borra la caché de una etapa (o de todas)."""
+        for stage_name in ([name] if name else STAGES):
+            self._cache[stage_name].clear()
+
+    def __getattr__(self, name):
+        if name in STAGES:
+            return self.get(name)
+        raise AttributeError(name)
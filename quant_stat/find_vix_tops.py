@@ -1,4 +1,167 @@
+import json
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _pairwise_sum(values):
+    """Suma de una lista de floats con el mismo orden que la suma por pares de NumPy (bit a bit)."""
+    n = len(values)
+    if n < 8:
+        total = 0.0
+        for value in values:
+            total += value
+        return total
+    if n <= 128:
+        r = values[:8]
+        stop = n - n % 8
+        for i in range(8, stop, 8):
+            r = [r[j] + values[i + j] for j in range(8)]
+        total = ((r[0] + r[1]) + (r[2] + r[3])) + ((r[4] + r[5]) + (r[6] + r[7]))
+        for value in values[stop:]:
+            total += value
+        return total
+    half = n // 2
+    half -= half % 8
+    return _pairwise_sum(values[:half]) + _pairwise_sum(values[half:])
+
+
+class VixTopDetector:
+    """
+    Detector incremental de techos del VIX (misma lógica que `find_vix_tops`).
+
+    Mantiene el estado entre llamadas: el pico pendiente (`pending_max`, `pending_max_i`,
+    su fecha y su ATR) y la ventana de los últimos `window_top` valores del VIX con la
+    que se calcula la media. `update()` acepta una barra (pd.Series cuyo `name` es la
+    fecha) o un lote (pd.DataFrame indexado por fecha) y devuelve los techos confirmados
+    en esa llamada. El estado se puede guardar con `save()` y recuperar con `load()`.
+
+    La media de la ventana se calcula sumando la ventana completa (no con una suma
+    acumulada que arrastra error de redondeo) para reproducir bit a bit la media de pandas.
+    """
+
+    def __init__(self, window_top=5, factor_top=1.0):
+        self.window_top = window_top
+        self.factor_top = factor_top
+        self.n_bars = 0
+        self.window = []
+        self.pending_max = None
+        self.pending_max_i = None
+        self.pending_max_date = None
+        self.pending_atr = None
+
+    # -------- Estado serializable --------
+    def to_dict(self):
+        return {
+            'window_top': self.window_top,
+            'factor_top': self.factor_top,
+            'n_bars': self.n_bars,
+            'window': self.window,
+            'pending_max': self.pending_max,
+            'pending_max_i': self.pending_max_i,
+            'pending_max_date': None if self.pending_max_date is None else self.pending_max_date.isoformat(),
+            'pending_atr': self.pending_atr,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        detector = cls(window_top=state['window_top'], factor_top=state['factor_top'])
+        detector.n_bars = state['n_bars']
+        detector.window = list(state['window'])
+        detector.pending_max = state['pending_max']
+        detector.pending_max_i = state['pending_max_i']
+        detector.pending_max_date = None if state['pending_max_date'] is None else pd.Timestamp(state['pending_max_date'])
+        detector.pending_atr = state['pending_atr']
+        return detector
+
+    def save(self, path):
+        with open(path, 'w') as fh:
+            json.dump(self.to_dict(), fh)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as fh:
+            return cls.from_dict(json.load(fh))
+
+    # -------- Actualización --------
+    def _window_means(self, vix):
+        """Media de los `window_top` valores previos a cada barra nueva (lista; NaN si aún no hay ventana)."""
+        w = self.window_top
+        if len(vix) == 1 and w and len(self.window) == w:
+            # Una sola barra (modo en vivo): la misma suma que NumPy, sin crear arrays
+            count = sum(value == value for value in self.window)
+            total = _pairwise_sum([value if value == value else 0.0 for value in self.window])
+            return [total / count if count else np.nan]
+        history = np.asarray(self.window + list(vix), dtype=float)
+        offset = len(self.window)
+        means = np.full(len(vix), np.nan)
+        if w == 0 or len(history) <= w:
+            return means.tolist()
+        # Igual que pandas: NaN -> 0 en la suma y se descuentan del recuento
+        windows = sliding_window_view(np.nan_to_num(history[:-1], nan=0.0), w)
+        counts = sliding_window_view(~np.isnan(history[:-1]), w).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            window_means = np.where(counts > 0, windows.sum(axis=1) / counts, np.nan)
+        # window_means[k] es la media de history[k:k + w], que precede a history[k + w]
+        first = max(w - offset, 0)
+        means[first:] = window_means[offset + first - w:]
+        return means.tolist()
+
+    def update(self, bars):
+        """
+        Procesa una barra o un lote de barras y devuelve los techos confirmados.
+
+        Args:
+            bars: pd.DataFrame indexado por fecha, o pd.Series de una fila (con `name` = fecha),
+                con las columnas 'VIX' y 'atr'.
+
+        Returns:
+            list: Tuplas (tag, fecha_top, valor_top, fecha_confirmación).
+        """
+        if isinstance(bars, pd.Series):
+            bars = bars.to_frame().T
+        if not all(col in bars.columns for col in ['VIX', 'atr']):
+            raise ValueError("El DataFrame debe contener las columnas 'VIX' y 'atr'.")
+
+        return self._process(bars['VIX'].to_numpy(dtype=float).tolist(),
+                             bars['atr'].to_numpy(dtype=float).tolist(), bars.index)
+
+    def update_bar(self, date, vix, atr):
+        """Una sola barra (modo en vivo), sin construir DataFrames. Devuelve lo mismo que `update()`."""
+        return self._process([float(vix)], [float(atr)], [date])
+
+    def _process(self, vix, atr, dates):
+        means = self._window_means(vix)
+        start = self.n_bars
+        factor_top = self.factor_top
+
+        tops = []
+        pending_max, pending_max_i = self.pending_max, self.pending_max_i
+        pending_max_date, pending_atr = self.pending_max_date, self.pending_atr
+
+        for k in range(max(self.window_top - start, 0), len(vix)):
+            current_vix = vix[k]
+
+            if pending_max is None:
+                if current_vix >= factor_top * means[k]:
+                    pending_max, pending_max_i = current_vix, start + k
+                    pending_max_date, pending_atr = dates[k], atr[k]
+                continue
+
+            if current_vix > pending_max:
+                pending_max, pending_max_i = current_vix, start + k
+                pending_max_date, pending_atr = dates[k], atr[k]
+
+            elif current_vix < pending_atr:
+                tops.append(('top', pending_max_date, pending_max, dates[k]))
+                pending_max = pending_max_i = pending_max_date = pending_atr = None
+
+        self.pending_max, self.pending_max_i = pending_max, pending_max_i
+        self.pending_max_date, self.pending_atr = pending_max_date, pending_atr
+        self.n_bars = start + len(vix)
+        self.window = (self.window + vix)[-self.window_top:] if self.window_top else []
+        return tops
+
 
 def find_vix_tops(df, window_top=5, factor_top=1.0):
     """
@@ -15,29 +178,4 @@ def find_vix_tops(df, window_top=5, factor_top=1.0):
     if not all(col in df.columns for col in ['VIX', 'atr']):
         raise ValueError("El DataFrame debe contener las columnas 'VIX' y 'atr'.")
 
-    tops = []
-    pending_max = None
-    pending_max_i = None
-
-    for i in range(window_top, len(df)):
-        current_vix = df['VIX'].iloc[i]
-        recent_mean = df['VIX'].iloc[i - window_top:i].mean()
-
-        if pending_max is None:
-            if current_vix >= factor_top * recent_mean:
-                pending_max = current_vix
-                pending_max_i = i
-            continue
-
-        if current_vix > pending_max:
-            pending_max = current_vix
-            pending_max_i = i
-
-        elif current_vix < df['atr'].iloc[pending_max_i]:
-            date_top = df.index[pending_max_i]
-            date_confirm = df.index[i]
-            tops.append(('top', date_top, pending_max, date_confirm))
-            pending_max = None
-            pending_max_i = None
-
-    return tops
+    return VixTopDetector(window_top=window_top, factor_top=factor_top).update(df)
@@ -0,0 +1,132 @@
+# FILE: quant_stat/indicator_cache.py
+# Caché en disco de indicadores: la clave es un hash de los datos de entrada + parámetros.
+#
+# - Si las barras y los parámetros no cambian, el indicador se lee de disco (Parquet).
+# - Si las barras nuevas sólo AÑADEN historia a una entrada ya cacheada (mismo prefijo),
+#   el indicador se extiende desde la última barra conocida en lugar de recalcularse.
+# - El tamaño total está limitado; se expulsan primero las entradas menos usadas (LRU).
+
+import os
+import json
+import time
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+def hash_inputs(inputs, n_rows=None):
+    """Hash SHA-1 de las primeras `n_rows` filas de `inputs` (índice + columnas)."""
+    n_rows = len(inputs) if n_rows is None else n_rows
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(inputs.index.values[:n_rows]).view(np.uint8))
+    for col in inputs.columns:
+        digest.update(col.encode())
+        digest.update(np.ascontiguousarray(inputs[col].to_numpy(dtype=np.float64)[:n_rows]).view(np.uint8))
+    return digest.hexdigest()
+
+
+def _family_key(name, params):
+    payload = json.dumps({'name': name, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+class IndicatorCache:
+    """
+    Caché LRU de indicadores en `cache_dir` con un límite de `max_bytes` en disco.
+
+    Uso:
+        cache.get('sma', df[['nasdaq']], {'window': 40}, compute, extend)
+
+    `compute(inputs, params)` devuelve un DataFrame alineado con `inputs`.
+    `extend(cached, inputs, params)` (opcional) recibe la salida cacheada de un prefijo
+    de `inputs` y devuelve la salida completa; si no se da, se recalcula todo.
+    """
+
+    def __init__(self, cache_dir='indicator_cache', max_bytes=512 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self._manifest = {}
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path) as fh:
+                self._manifest = json.load(fh)
+        self.hits = self.extensions = self.misses = 0
+
+    # -------- Persistencia --------
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _save_manifest(self):
+        with open(self._manifest_path, 'w') as fh:
+            json.dump(self._manifest, fh)
+
+    def _read(self, key):
+        self._manifest[key]['last_access'] = time.time()
+        return pd.read_parquet(self._path(key))
+
+    def _store(self, key, entry, output):
+        output.to_parquet(self._path(key))
+        entry['bytes'] = os.path.getsize(self._path(key))
+        entry['last_access'] = time.time()
+        self._manifest[key] = entry
+        self._evict(keep=key)
+        self._save_manifest()
+
+    def _evict(self, keep=None):
+        """Borra las entradas menos usadas hasta quedar por debajo de `max_bytes`."""
+        total = sum(entry['bytes'] for entry in self._manifest.values())
+        for key in sorted(self._manifest, key=lambda k: self._manifest[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._manifest[key]['bytes']
+            del self._manifest[key]
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+
+    def clear(self):
+        for key in list(self._manifest):
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+        self._manifest = {}
+        self._save_manifest()
+
+    # -------- Consulta --------
+    def _find_prefix(self, family, inputs):
+        """Entrada de la misma familia cuyos datos son un prefijo estricto de `inputs`."""
+        candidates = [
+            (entry['n_rows'], key) for key, entry in self._manifest.items()
+            if entry['family'] == family and 0 < entry['n_rows'] < len(inputs)
+        ]
+        for n_rows, key in sorted(candidates, reverse=True):
+            if hash_inputs(inputs, n_rows) == self._manifest[key]['input_hash']:
+                return key
+        return None
+
+    def get(self, name, inputs, params, compute, extend=None):
+        """Devuelve la salida del indicador `name` para `inputs` y `params` (DataFrame)."""
+        family = _family_key(name, params)
+        input_hash = hash_inputs(inputs)
+        key = f"{family}-{input_hash[:24]}"
+
+        if key in self._manifest and os.path.exists(self._path(key)):
+            self.hits += 1
+            output = self._read(key)
+            self._save_manifest()
+            return output
+
+        prefix_key = self._find_prefix(family, inputs) if extend is not None else None
+        if prefix_key is not None and os.path.exists(self._path(prefix_key)):
+            self.extensions += 1
+            output = extend(self._read(prefix_key), inputs, params)
+        else:
+            self.misses += 1
+            output = compute(inputs, params)
+
+        entry = {'name': name, 'family': family, 'params': json.loads(json.dumps(params, default=str)),
+                 'n_rows': len(inputs), 'input_hash': input_hash}
+        self._store(key, entry, output)
+        return output
@@ -0,0 +1,409 @@
+# FILE: quant_stat/indicators.py
+# Cálculo de los indicadores que usan las estrategias (medias, ATR y trailing stops)
+
+import math
+import numpy as np
+import pandas as pd
+import ta
+from strat_OM.strat_ATR_stop_lost import (_atr_stop_offset, _atr_trailing_stop_kernel, _atr_trailing_stop_kernel_2d,
+                                         _atr_trailing_stop_lists)
+
+ATR_WINDOW = 14
+STOP_ATR_PERIOD = 14
+STOP_SMOOTHING_PERIOD = 10
+
+
+# ====================================================
+# Indicadores: compute(inputs, params) y extend(cached, inputs, params)
+# Las medias móviles no tienen `extend`: el rolling de pandas arrastra su suma desde
+# la primera barra, así que recalcular sólo la cola no daría el mismo resultado bit a
+# bit; al ser vectorizado, recalcularlo entero es barato.
+# ====================================================
+def _rolling_mean(inputs, params):
+    col = inputs.columns[0]
+    out = inputs[col].rolling(window=params['window']).mean()
+    if params.get('round') is not None:
+        out = out.round(params['round'])
+    return out.to_frame('value')
+
+
+def _nasdaq_atr(inputs, params):
+    atr_indicator = ta.volatility.AverageTrueRange(
+        high=inputs['high_nasdaq'], low=inputs['low_nasdaq'], close=inputs['nasdaq'], window=params['window'])
+    return atr_indicator.average_true_range().to_frame('value')
+
+
+def _extend_nasdaq_atr(cached, inputs, params):
+    """Continúa la recursión de Wilder desde el último ATR cacheado (mismo resultado bit a bit)."""
+    window = params['window']
+    n_cached = len(cached)
+    if n_cached < window:
+        return _nasdaq_atr(inputs, params)
+    tail = inputs.iloc[n_cached - 1:]
+    prev_close = tail['nasdaq'].shift(1)
+    true_range = pd.DataFrame(data={
+        'tr1': tail['high_nasdaq'] - tail['low_nasdaq'],
+        'tr2': (tail['high_nasdaq'] - prev_close).abs(),
+        'tr3': (tail['low_nasdaq'] - prev_close).abs(),
+    }).max(axis=1).to_numpy()[1:]
+
+    atr = np.empty(len(true_range))
+    prev = cached['value'].iloc[-1]
+    for i, tr in enumerate(true_range):
+        prev = atr[i] = (prev * (window - 1) + tr) / float(window)
+    return pd.concat([cached, pd.DataFrame({'value': atr}, index=tail.index[1:])])
+
+
+def _trailing_stops(inputs, params):
+    stop_offset = _atr_stop_offset(inputs, STOP_ATR_PERIOD, STOP_SMOOTHING_PERIOD, params['atr_multiplier'])
+    long_stop, short_stop = _atr_trailing_stop_kernel(
+        inputs['nasdaq'].to_numpy(dtype=float), stop_offset.to_numpy(dtype=float))
+    return pd.DataFrame({'long': long_stop, 'short': short_stop}, index=inputs.index)
+
+
+def _extend_trailing_stops(cached, inputs, params):
+    """
+    Continúa la máquina de estados (la parte cara, en Python) desde la última barra cacheada.
+    El offset se recalcula entero: son rolling vectorizados y así coincide bit a bit.
+    """
+    n_cached = len(cached)
+    stop_offset = _atr_stop_offset(inputs, STOP_ATR_PERIOD, STOP_SMOOTHING_PERIOD, params['atr_multiplier'])
+    long_stop, short_stop = _atr_trailing_stop_kernel(
+        inputs['nasdaq'].to_numpy(dtype=float)[n_cached - 1:], stop_offset.to_numpy(dtype=float)[n_cached - 1:],
+        prev_long=cached['long'].iloc[-1], prev_short=cached['short'].iloc[-1])
+    tail = pd.DataFrame({'long': long_stop[1:], 'short': short_stop[1:]}, index=inputs.index[n_cached:])
+    return pd.concat([cached, tail])
+
+
+def _indicator(cache, name, inputs, params, compute, extend):
+    if cache is None:
+        return compute(inputs, params)
+    return cache.get(name, inputs, params, compute, extend)
+
+
+def compute_indicators(df, n=5, f=40, s=200, atr_multiplier=3.5, cache=None, dtype=np.float64):
+    """
+    Añade al DataFrame las columnas de indicadores:
+    - 'atr': media de `n` días del VIX.
+    - 'sma_fast' / 'sma_slow': medias de `f` y `s` días del NASDAQ.
+    - 'nasdaq_atr': ATR(14) del NASDAQ.
+    - 'atr_trailing_stop' / 'atr_trailing_stop_short': trailing stops a `atr_multiplier` ATR.
+
+    Con `cache` (IndicatorCache) cada indicador se lee de disco si sus barras y parámetros
+    no han cambiado, o se extiende sólo sobre las barras nuevas si se ha añadido historia.
+
+    `dtype` es el de las medias de `COMPACT_COLUMNS` (np.float32 en el modo compacto): se
+    calculan en float64 y se convierten al añadirlas, así que nunca hay más de una columna
+    temporal en float64. El resto (media del VIX, ATR y stops) siempre es float64: fijan los
+    techos, los niveles de llenado y el deslizamiento.
+
+    Modifica `df` en sitio y lo devuelve.
+    """
+    prices = df[['nasdaq', 'high_nasdaq', 'low_nasdaq']]
+    df['atr'] = _indicator(cache, 'rolling_mean', df[['VIX']], {'window': n},
+                           _rolling_mean, None)['value'].to_numpy(dtype=np.float64)
+    df['sma_fast'] = _indicator(cache, 'rolling_mean', df[['nasdaq']], {'window': f, 'round': 2},
+                                _rolling_mean, None)['value'].to_numpy(dtype=dtype)
+    df['sma_slow'] = _indicator(cache, 'rolling_mean', df[['nasdaq']], {'window': s, 'round': 2},
+                                _rolling_mean, None)['value'].to_numpy(dtype=dtype)
+    df['nasdaq_atr'] = _indicator(cache, 'nasdaq_atr', prices, {'window': ATR_WINDOW},
+                                  _nasdaq_atr, _extend_nasdaq_atr)['value'].to_numpy(dtype=np.float64)
+    stops = _indicator(cache, 'atr_trailing_stops', prices, {'atr_multiplier': atr_multiplier},
+                       _trailing_stops, _extend_trailing_stops)
+    df['atr_trailing_stop'] = stops['long'].round(2).to_numpy(dtype=np.float64)
+    df['atr_trailing_stop_short'] = stops['short'].round(2).to_numpy(dtype=np.float64)
+    return df
+
+
+# ====================================================
+# Universo multi-activo: matrices (T, K) con un activo por columna
+# ====================================================
+def _true_range_2d(close, high, low):
+    prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def _wilder_atr_2d(close, high, low, window=ATR_WINDOW):
+    """ATR de Wilder de `ta` (ceros antes de la primera ventana) para todas las columnas a la vez."""
+    true_range = _true_range_2d(close, high, low)
+    atr = np.zeros(close.shape)
+    if len(atr) < window:
+        return atr
+    # Primera ventana como Series.mean (suma por pares de cada columna contigua, sin NaN)
+    first = np.ascontiguousarray(true_range[:window].T)
+    valid = ~np.isnan(first)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        atr[window - 1] = np.where(valid, first, 0.0).sum(axis=1) / valid.sum(axis=1)
+    for i in range(window, len(atr)):
+        atr[i] = (atr[i - 1] * (window - 1) + true_range[i]) / float(window)
+    return atr
+
+
+def compute_indicators_2d(close, high, low, driver, n=5, f=40, s=200, atr_multiplier=3.5):
+    """
+    Los indicadores de `compute_indicators` para todo un universo en una sola llamada.
+
+    Args:
+        close, high, low: matrices (T, K) alineadas, un activo por columna.
+        driver: matriz (T, D) de los índices de volatilidad (VIX, VXN, RVX...).
+
+    Returns:
+        dict: 'atr' (T, D) del driver y 'sma_fast', 'sma_slow', 'nasdaq_atr',
+        'atr_trailing_stop', 'atr_trailing_stop_short' (T, K). Cada columna coincide
+        con lo que da `compute_indicators` sobre ese activo.
+    """
+    close, high, low = (np.asarray(a, dtype=float) for a in (close, high, low))
+    close_df = pd.DataFrame(close)
+
+    true_range = pd.DataFrame(_true_range_2d(close, high, low))
+    stop_offset = (true_range.rolling(window=STOP_ATR_PERIOD).mean()
+                   .rolling(window=STOP_SMOOTHING_PERIOD).mean() * atr_multiplier).to_numpy()
+    long_stop, short_stop = _atr_trailing_stop_kernel_2d(close, stop_offset)
+
+    return {
+        'atr': pd.DataFrame(np.asarray(driver, dtype=float)).rolling(window=n).mean().to_numpy(),
+        'sma_fast': close_df.rolling(window=f).mean().round(2).to_numpy(),
+        'sma_slow': close_df.rolling(window=s).mean().round(2).to_numpy(),
+        'nasdaq_atr': _wilder_atr_2d(close, high, low),
+        'atr_trailing_stop': np.round(long_stop, 2),
+        'atr_trailing_stop_short': np.round(short_stop, 2),
+    }
+
+
+# ====================================================
+# Por bloques: el estado de las ventanas pasa de un bloque al siguiente
+# ====================================================
+def _round2(value):
+    """`np.round(value, 2)` para un float de Python: x * 100, redondeo al par y / 100 (con el signo del cero)."""
+    if value != value or value in (math.inf, -math.inf):
+        return value
+    return math.copysign(round(value * 100.0) / 100.0, value)
+
+
+class _RollingMean:
+    """
+    `Series.rolling(window).mean()` de pandas continuado de un bloque al siguiente.
+
+    Reproduce el algoritmo de pandas (suma de Kahan que se arrastra desde la primera barra,
+    sumando la barra que entra y restando la que sale) guardando su estado y las últimas
+    `window` barras, así que el resultado es el mismo bit a bit corten donde corten los bloques.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.tail = []
+        self.sum = self.add_comp = self.remove_comp = 0.0
+        self.nobs = self.neg_ct = self.same_count = 0
+        self.prev_value = None
+
+    def update(self, values):
+        """Medias de las barras nuevas (array)."""
+        return np.array(self._run(values.tolist()), dtype=float)
+
+    def push(self, value):
+        """Media tras una sola barra nueva (float)."""
+        return self._run([value])[0]
+
+    def _run(self, values):
+        window = self.window
+        history = self.tail + values
+        offset = len(self.tail)
+        means = [np.nan] * len(values)
+        total, add_comp, remove_comp = self.sum, self.add_comp, self.remove_comp
+        nobs, neg_ct, same_count, prev_value = self.nobs, self.neg_ct, self.same_count, self.prev_value
+        if prev_value is None and len(history):
+            prev_value = history[0]
+
+        for i in range(offset, len(history)):
+            if i >= window:
+                val = history[i - window]
+                if val == val:
+                    nobs -= 1
+                    y = -val - remove_comp
+                    t = total + y
+                    remove_comp = t - total - y
+                    total = t
+                    if math.copysign(1.0, val) < 0:
+                        neg_ct -= 1
+            val = history[i]
+            if val == val:
+                nobs += 1
+                y = val - add_comp
+                t = total + y
+                add_comp = t - total - y
+                total = t
+                if math.copysign(1.0, val) < 0:
+                    neg_ct += 1
+                same_count = same_count + 1 if val == prev_value else 1
+                prev_value = val
+
+            if nobs >= window:
+                mean = total / nobs
+                if same_count >= nobs:
+                    mean = prev_value
+                elif (neg_ct == 0 and mean < 0) or (neg_ct == nobs and mean > 0):
+                    mean = 0.0
+            else:
+                mean = np.nan
+            means[i - offset] = mean
+
+        self.sum, self.add_comp, self.remove_comp = total, add_comp, remove_comp
+        self.nobs, self.neg_ct, self.same_count, self.prev_value = nobs, neg_ct, same_count, prev_value
+        self.tail = history[max(len(history) - window, 0):]
+        return means
+
+
+class StreamingIndicators:
+    """
+    `compute_indicators` por bloques, para historias que no caben en memoria.
+
+    Guarda entre bloques sólo lo imprescindible: el estado de las medias móviles (VIX,
+    rápida, lenta y las dos del offset del stop), la recursión de Wilder del ATR y el
+    estado de la máquina del trailing stop (último cierre y últimos stops). La memoria no
+    depende de la longitud de la historia, y el resultado coincide bit a bit con
+    `compute_indicators` sobre la historia completa.
+    """
+
+    def __init__(self, n=5, f=40, s=200, atr_multiplier=3.5):
+        self.n, self.f, self.s, self.atr_multiplier = n, f, s, atr_multiplier
+        self.n_bars = 0
+        self.means = {'vix': _RollingMean(n), 'fast': _RollingMean(f), 'slow': _RollingMean(s),
+                      'tr': _RollingMean(STOP_ATR_PERIOD), 'tr_mean': _RollingMean(STOP_SMOOTHING_PERIOD)}
+        self.first_true_ranges = []     # True Range hasta completar la primera ventana del ATR
+        self.prev_close = np.nan
+        self.prev_atr = np.nan
+        self.prev_long = np.nan
+        self.prev_short = np.nan
+
+    def _mean(self, key, values):
+        return self.means[key].update(values)
+
+    def _wilder_atr(self, true_range):
+        """
+        ATR(14) de `ta` (lista de True Range -> lista): ceros hasta la primera ventana, su media
+        y después la recursión de Wilder.
+        """
+        atr = [0.0] * len(true_range)
+        window = ATR_WINDOW
+        start = 0
+        if self.n_bars < window:
+            need = window - self.n_bars
+            self.first_true_ranges.extend(true_range[:need])
+            if len(self.first_true_ranges) < window:
+                return atr
+            self.prev_atr = atr[need - 1] = float(pd.Series(self.first_true_ranges).mean())
+            self.first_true_ranges = []
+            start = need
+        prev = self.prev_atr
+        for i in range(start, len(true_range)):
+            prev = atr[i] = (prev * (window - 1) + true_range[i]) / float(window)
+        self.prev_atr = prev
+        return atr
+
+    def update_arrays(self, close, high, low, vix):
+        """Indicadores de las barras nuevas a partir de arrays (dict columna -> array)."""
+        prev_close = np.concatenate([[self.prev_close], close[:-1]])
+        true_range = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        stop_offset = self._mean('tr_mean', self._mean('tr', true_range)) * self.atr_multiplier
+
+        # La barra 0 del kernel es la última del bloque anterior (sus stops ya calculados)
+        long_stop, short_stop = _atr_trailing_stop_kernel(
+            np.concatenate([[self.prev_close], close]), np.concatenate([[np.nan], stop_offset]),
+            prev_long=self.prev_long, prev_short=self.prev_short)
+        long_stop, short_stop = long_stop[1:], short_stop[1:]
+
+        out = {
+            'atr': self._mean('vix', vix),
+            'sma_fast': np.round(self._mean('fast', close), 2),
+            'sma_slow': np.round(self._mean('slow', close), 2),
+            'nasdaq_atr': np.array(self._wilder_atr(true_range.tolist()), dtype=float),
+            'atr_trailing_stop': np.round(long_stop, 2),
+            'atr_trailing_stop_short': np.round(short_stop, 2),
+        }
+        if len(close):
+            self.prev_close = close[-1]
+            self.prev_long, self.prev_short = long_stop[-1], short_stop[-1]
+        self.n_bars += len(close)
+        return out
+
+    def update_bar(self, close, high, low, vix):
+        """
+        Una sola barra (modo en vivo): dict columna -> float. Las mismas operaciones que
+        `update_arrays` con floats de Python, sin crear arrays, así que coincide bit a bit.
+        """
+        prev_close = self.prev_close
+        # np.fmax: el True Range ignora los NaN (la primera barra no tiene cierre previo)
+        true_range = high - low
+        for value in (abs(high - prev_close), abs(low - prev_close)):
+            if true_range != true_range or value > true_range:
+                true_range = value
+        stop_offset = self.means['tr_mean'].push(self.means['tr'].push(true_range)) * self.atr_multiplier
+        long_stop, short_stop = _atr_trailing_stop_lists([prev_close, close], [np.nan, stop_offset],
+                                                         self.prev_long, self.prev_short)
+        long_stop, short_stop = long_stop[1], short_stop[1]
+
+        out = {
+            'atr': self.means['vix'].push(vix),
+            'sma_fast': _round2(self.means['fast'].push(close)),
+            'sma_slow': _round2(self.means['slow'].push(close)),
+            'nasdaq_atr': self._wilder_atr([true_range])[0],
+            'atr_trailing_stop': _round2(long_stop),
+            'atr_trailing_stop_short': _round2(short_stop),
+        }
+        self.prev_close = close
+        self.prev_long, self.prev_short = long_stop, short_stop
+        self.n_bars += 1
+        return out
+
+    def update(self, chunk):
+        """
+        Añade al bloque (DataFrame con 'nasdaq', 'high_nasdaq', 'low_nasdaq' y 'VIX') las columnas
+        de `compute_indicators`, continuando el estado del bloque anterior. Modifica `chunk` en sitio.
+        """
+        out = self.update_arrays(chunk['nasdaq'].to_numpy(dtype=float), chunk['high_nasdaq'].to_numpy(dtype=float),
+                                 chunk['low_nasdaq'].to_numpy(dtype=float), chunk['VIX'].to_numpy(dtype=float))
+        for name, values in out.items():
+            chunk[name] = values
+        return chunk
+
+
+# ====================================================
+# Modo compacto: medias en float32 y columnas de sólo lectura
+# ====================================================
+DERIVED_COLUMNS = ['atr', 'sma_fast', 'sma_slow', 'nasdaq_atr', 'atr_trailing_stop', 'atr_trailing_stop_short']
+# Las únicas que pasan a float32: sólo deciden cruces. El ATR y los stops son niveles de
+# llenado (y la media del VIX fija los techos), así que siguen en float64.
+COMPACT_COLUMNS = ['sma_fast', 'sma_slow']
+
+
+def read_only(df):
+    """
+    Marca como de sólo lectura los arrays de `df` (en sitio) y lo devuelve.
+
+    Así el DataFrame se puede pasar a todas las etapas sin copias defensivas: cualquier
+    escritura en sitio (`df.loc[...] = ...`) falla en lugar de modificar los datos de los
+    demás. Añadir columnas nuevas sigue estando permitido.
+    """
+    for column in df.columns:
+        values = df[column].to_numpy()
+        while isinstance(values.base, np.ndarray):
+            values = values.base
+        values.flags.writeable = False
+    return df
+
+
+def compact_indicators(df, columns=COMPACT_COLUMNS):
+    """
+    Pasa a float32 (en sitio) las medias de un DataFrame de `compute_indicators` ya calculado
+    en float64 y lo deja de sólo lectura (ver `read_only`). Los precios no se copian. Para no
+    tener nunca el DataFrame entero en float64, es mejor calcularlo directamente con
+    `compute_indicators(..., dtype=np.float32)` (lo que hace el Pipeline).
+
+    Los precios (apertura incluida), el VIX, su media, el ATR y los trailing stops se
+    mantienen en float64: fijan techos, entradas, salidas y beneficios, así que las
+    operaciones son las mismas que sin compactar. Las medias sólo deciden cruces.
+    """
+    for column in columns:
+        if column in df.columns:
+            df[column] = df[column].to_numpy(dtype=np.float32)
+    return read_only(df)
@@ -0,0 +1,100 @@
+# FILE: quant_stat/metrics.py
+# Métricas de rendimiento (CAGR, Sharpe, Sortino, Calmar, max drawdown, volatilidad) en NumPy.
+#
+# Mismas definiciones que empyrical (periodo diario = 252, ddof=1, NaN ignorados, drawdown
+# sobre la curva acumulada con el capital inicial como primer máximo), pero todo sale de
+# una sola pasada: media, desviación, downside y curva acumulada se calculan una vez y
+# se reutilizan. Acepta un array 1-D (T,) o una matriz 2-D (T, K) con una curva por
+# columna (p. ej. todas las combinaciones de un barrido).
+
+import numpy as np
+
+ANNUALIZATION = {'daily': 252, 'weekly': 52, 'monthly': 12, 'quarterly': 4, 'yearly': 1}
+
+METRIC_NAMES = ('annual_return', 'annual_volatility', 'sharpe_ratio', 'sortino_ratio',
+                'max_drawdown', 'calmar_ratio')
+
+
+def returns_from_equity(equity):
+    """Rendimientos simples por periodo de una o varias curvas de equity (eje 0 = tiempo)."""
+    equity = np.asarray(equity, dtype=float)
+    return equity[1:] / equity[:-1] - 1
+
+
+def performance_metrics(returns, period='daily', annualization=None, risk_free=0.0, required_return=0.0):
+    """
+    Todas las métricas de una vez.
+
+    Args:
+        returns: rendimientos simples, no acumulados. 1-D (T,) o 2-D (T, K).
+        period: 'daily', 'weekly', 'monthly'... (ignorado si se da `annualization`).
+        annualization: periodos por año.
+        risk_free: rendimiento libre de riesgo por periodo (Sharpe).
+        required_return: rendimiento mínimo por periodo (Sortino).
+
+    Returns:
+        dict: nombre de `METRIC_NAMES` -> float (entrada 1-D) o array de K valores (2-D).
+    """
+    r = np.asarray(returns, dtype=float)
+    one_d = r.ndim == 1
+    if one_d:
+        r = r[:, None]
+    ann = annualization or ANNUALIZATION[period]
+    n_periods, n_series = r.shape
+
+    nan = np.full(n_series, np.nan)
+    out = dict.fromkeys(METRIC_NAMES, nan)
+    if n_periods >= 1:
+        valid = ~np.isnan(r)
+        filled = np.where(valid, r, 0.0)
+        count = valid.sum(axis=0)
+
+        # Curva acumulada (base 1) y drawdown respecto al máximo previo, capital inicial incluido
+        growth = np.cumprod(1.0 + filled, axis=0)
+        peak = np.maximum(np.fmax.accumulate(growth, axis=0), 1.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            max_dd = np.minimum(((growth - peak) / peak).min(axis=0), 0.0)
+            annual_return = growth[-1] ** (ann / n_periods) - 1
+
+            calmar = np.where(max_dd < 0, annual_return / np.abs(max_dd), np.nan)
+            calmar[np.isinf(calmar)] = np.nan
+        out.update(annual_return=annual_return, max_drawdown=max_dd, calmar_ratio=calmar)
+
+    if n_periods >= 2:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = filled.sum(axis=0) / count
+            std = np.sqrt(np.where(valid, (r - mean) ** 2, 0.0).sum(axis=0) / (count - 1))
+            downside = np.where(valid, np.minimum(r - required_return, 0.0) ** 2, 0.0).sum(axis=0) / count
+
+            out['annual_volatility'] = std * np.sqrt(ann)
+            out['sharpe_ratio'] = (mean - risk_free) / std * np.sqrt(ann)
+            out['sortino_ratio'] = (mean - required_return) * ann / (np.sqrt(downside) * np.sqrt(ann))
+
+    if one_d:
+        return {name: float(value[0]) for name, value in out.items()}
+    return out
+
+
+# Funciones sueltas con los nombres de empyrical (cada una llama a `performance_metrics`)
+def annual_return(returns, period='daily', annualization=None):
+    return performance_metrics(returns, period, annualization)['annual_return']
+
+
+def annual_volatility(returns, period='daily', annualization=None):
+    return performance_metrics(returns, period, annualization)['annual_volatility']
+
+
+def sharpe_ratio(returns, risk_free=0.0, period='daily', annualization=None):
+    return performance_metrics(returns, period, annualization, risk_free=risk_free)['sharpe_ratio']
+
+
+def sortino_ratio(returns, required_return=0.0, period='daily', annualization=None):
+    return performance_metrics(returns, period, annualization, required_return=required_return)['sortino_ratio']
+
+
+def max_drawdown(returns):
+    return performance_metrics(returns)['max_drawdown']
+
+
+def calmar_ratio(returns, period='daily', annualization=None):
+    return performance_metrics(returns, period, annualization)['calmar_ratio']
@@ -0,0 +1,126 @@
+# FILE: quant_stat/monte_carlo.py
+# Robustez por Monte Carlo de un registro de operaciones.
+#
+# A partir de la secuencia de beneficios por operación (en orden de salida) se generan N
+# secuencias alternativas, una por fila de una matriz 2-D (N, operaciones):
+#   - 'bootstrap': operaciones remuestreadas con reemplazo (cambia el resultado final),
+#   - 'shuffle':   las mismas operaciones en otro orden (sólo cambia el camino y el drawdown).
+# Equity, drawdown máximo y rendimiento final de todas las filas salen de una sola pasada
+# vectorizada (cumsum y máximo acumulado a lo largo del eje 1). Si la matriz no cabe en
+# `max_memory_mb`, se procesa por bloques de filas.
+
+import numpy as np
+import pandas as pd
+
+MC_METHODS = ('bootstrap', 'shuffle')
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+DISTRIBUTION_COLUMNS = ('final_equity', 'total_return_pct', 'max_drawdown_usd', 'max_drawdown_pct')
+
+# Matrices de (filas x operaciones) vivas a la vez en un bloque: índices, equity, máximo y drawdown
+_MATRICES_PER_CHUNK = 4
+
+
+def resample_matrix(pnl, n_samples, method='bootstrap', rng=None):
+    """
+    Matriz (n_samples, operaciones) de secuencias remuestreadas de `pnl`.
+
+    Args:
+        method: 'bootstrap' (con reemplazo) o 'shuffle' (permutaciones).
+        rng: np.random.Generator (por defecto uno nuevo sin semilla).
+    """
+    pnl = np.asarray(pnl, dtype=float)
+    rng = rng if rng is not None else np.random.default_rng()
+    if method == 'bootstrap':
+        return pnl[rng.integers(0, len(pnl), size=(n_samples, len(pnl)))]
+    if method == 'shuffle':
+        return rng.permuted(np.broadcast_to(pnl, (n_samples, len(pnl))), axis=1)
+    raise ValueError(f"Método de remuestreo desconocido: '{method}' (usa uno de {MC_METHODS})")
+
+
+def path_statistics(pnl_matrix, initial_capital):
+    """
+    Equity y distribuciones de cada fila de `pnl_matrix` (beneficio por operación, en USD).
+
+    La matriz se sobrescribe con la equity acumulada (sin copias extra). El capital inicial
+    cuenta como primer máximo del drawdown, igual que en `quant_stat.metrics`.
+
+    Returns:
+        tuple: (equity, dict columna de `DISTRIBUTION_COLUMNS` -> array de una fila por secuencia).
+    """
+    equity = np.cumsum(pnl_matrix, axis=1, out=pnl_matrix)
+    equity += initial_capital
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, initial_capital, out=peak)
+    drawdown = equity - peak
+    max_dd_usd = drawdown.min(axis=1)
+    drawdown /= peak
+    final = equity[:, -1]
+    return equity, {
+        'final_equity': final.copy(),
+        'total_return_pct': (final / initial_capital - 1) * 100,
+        'max_drawdown_usd': max_dd_usd,
+        'max_drawdown_pct': drawdown.min(axis=1) * 100,
+    }
+
+
+def monte_carlo(pnl, n_samples=10_000, method='bootstrap', initial_capital=10000, quantiles=DEFAULT_QUANTILES,
+                max_memory_mb=256, band_samples=10_000, seed=None):
+    """
+    Distribuciones de equity final, rendimiento y drawdown máximo de `n_samples` secuencias.
+
+    Args:
+        pnl: beneficio por operación en USD, en orden de salida (p. ej. 'profit_usd' de
+            `strats_outputs_join` ordenado por 'exit_date').
+        n_samples: número de secuencias remuestreadas.
+        method: 'bootstrap' o 'shuffle' (ver `resample_matrix`).
+        quantiles: cuantiles de las bandas de confianza.
+        max_memory_mb: memoria de trabajo; por encima, las secuencias se procesan por bloques.
+        band_samples: secuencias con las que se calculan las bandas de la equity (los cuantiles
+            por operación son la parte cara; las distribuciones usan siempre todas). Sus
+            caminos se guardan aparte (band_samples x operaciones) aunque se procese por bloques.
+        seed: semilla del generador (resultados reproducibles).
+
+    Returns:
+        dict:
+            'distribution': DataFrame con una fila por secuencia (`DISTRIBUTION_COLUMNS`).
+            'summary': DataFrame métrica x (observado, media, cuantiles, P(pérdida)...).
+            'equity_bands': DataFrame (operación 0..n) x cuantiles con la banda de la equity.
+    """
+    pnl = np.asarray(pnl, dtype=float)
+    if not len(pnl):
+        raise ValueError("No hay operaciones que remuestrear.")
+    rng = np.random.default_rng(seed)
+    quantiles = np.asarray(quantiles, dtype=float)
+
+    row_bytes = _MATRICES_PER_CHUNK * 8 * len(pnl)
+    chunk = int(min(n_samples, max(1, max_memory_mb * 2**20 // row_bytes)))
+
+    distribution = {name: np.empty(n_samples) for name in DISTRIBUTION_COLUMNS}
+    band_equity = np.empty((min(band_samples, n_samples), len(pnl)))
+    band_rows = 0
+    for start in range(0, n_samples, chunk):
+        rows = min(chunk, n_samples - start)
+        equity, stats = path_statistics(resample_matrix(pnl, rows, method, rng), initial_capital)
+        for name, values in stats.items():
+            distribution[name][start:start + rows] = values
+        take = min(rows, len(band_equity) - band_rows)
+        if take > 0:
+            band_equity[band_rows:band_rows + take] = equity[:take]
+            band_rows += take
+    bands = np.quantile(band_equity, quantiles, axis=0)
+
+    observed = path_statistics(pnl[None, :].copy(), initial_capital)[1]
+    distribution = pd.DataFrame(distribution)
+
+    labels = [f"p{q * 100:g}" for q in quantiles]
+    summary = distribution.quantile(quantiles).T.set_axis(labels, axis=1)
+    summary.insert(0, 'mean', distribution.mean())
+    summary.insert(0, 'observed', pd.Series({name: values[0] for name, values in observed.items()}))
+    # Redondeo a 1e-6 USD / %: con 'shuffle' el orden de la suma cambia el último bit del total
+    summary['prob_below_observed'] = (distribution.round(6) < summary['observed'].round(6)).mean()
+    summary.loc['final_equity', 'prob_loss'] = (distribution['final_equity'] < initial_capital).mean()
+
+    equity_bands = pd.DataFrame(np.column_stack([np.full(len(quantiles), float(initial_capital)), bands]).T,
+                                columns=labels)
+    equity_bands.index.name = 'trade'
+    return {'distribution': distribution, 'summary': summary, 'equity_bands': equity_bands}
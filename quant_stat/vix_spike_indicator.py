@@ -1,14 +1,18 @@
+import json
 import pandas as pd
 import numpy as np
+from quant_stat.indicators import _RollingMean
 
-def find_vix_quiet_days(df):
+
+def find_vix_quiet_days(df, window=50, threshold=0.8):
     """
     Devuelve una serie booleana que marca únicamente el ÚLTIMO día
     dentro de cada bloque continuo de baja volatilidad (VIX bajo).
-    """
-    window = 50
-    threshold = 0.8
 
+    Un día es "tranquilo" si el VIX está por debajo de `threshold` veces su media
+    de `window` días. El último día de un bloque es un día tranquilo cuyo día
+    siguiente no lo es (o el último día de la serie).
+    """
     if 'VIX' not in df.columns:
         raise ValueError("El DataFrame debe contener una columna llamada 'VIX'.")
 
@@ -16,15 +20,83 @@ def find_vix_quiet_days(df):
     quiet = df['VIX'] < (threshold * vix_mean)
     quiet = quiet.fillna(False)
 
-    # Identificar los bloques de días tranquilos
-    block_id = (quiet != quiet.shift()).cumsum()
-    quiet_blocks = quiet.groupby(block_id)
+    # Último día de cada bloque: tranquilo hoy y no tranquilo mañana
+    return (quiet & ~quiet.shift(-1, fill_value=False)).rename(None)
+
+
+class VixQuietDetector:
+    """
+    Versión incremental de `find_vix_quiet_days`.
+
+    Guarda el estado de la media móvil del VIX (`_RollingMean`, la misma suma compensada
+    de pandas, así que la media coincide bit a bit con `rolling(window).mean()` y los empates
+    con el umbral se resuelven igual) y si el bloque actual es tranquilo.
+    `update()` acepta una barra (pd.Series con `name` = fecha) o un lote (DataFrame)
+    y devuelve un evento ('quiet_end', último_día_tranquilo, fecha_de_ruptura) en
+    cuanto una barra rompe un bloque tranquilo. A diferencia de la versión por lotes,
+    un bloque que sigue abierto al final de los datos no se emite hasta que se rompe.
+    """
+
+    def __init__(self, window=50, threshold=0.8):
+        self.window = window
+        self.threshold = threshold
+        self.mean = _RollingMean(window)
+        self.last_quiet_date = None
+
+    def to_dict(self):
+        return {
+            'window': self.window,
+            'threshold': self.threshold,
+            'mean': dict(vars(self.mean)),
+            'last_quiet_date': None if self.last_quiet_date is None else self.last_quiet_date.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        detector = cls(window=state['window'], threshold=state['threshold'])
+        vars(detector.mean).update(state['mean'])
+        detector.last_quiet_date = None if state['last_quiet_date'] is None else pd.Timestamp(state['last_quiet_date'])
+        return detector
+
+    def save(self, path):
+        with open(path, 'w') as fh:
+            json.dump(self.to_dict(), fh)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as fh:
+            return cls.from_dict(json.load(fh))
+
+    def _quiet(self, vix):
+        """Máscara de días tranquilos de las barras nuevas (media de `window` barras incluida la actual)."""
+        means = self.mean.update(vix)
+        # NaN (ventana incompleta o con huecos) -> no tranquilo, como el fillna(False) de la versión por lotes
+        with np.errstate(invalid='ignore'):
+            return vix < self.threshold * means
+
+    def update(self, bars):
+        """
+        Procesa una barra o un lote y devuelve los bloques tranquilos que se han cerrado.
+
+        Returns:
+            list: Tuplas ('quiet_end', último_día_tranquilo, fecha_de_ruptura).
+        """
+        if isinstance(bars, pd.Series):
+            bars = bars.to_frame().T
+        if 'VIX' not in bars.columns:
+            raise ValueError("El DataFrame debe contener una columna llamada 'VIX'.")
 
-    # Crear serie vacía de mismo índice
-    quiet_filtered = pd.Series(False, index=quiet.index)
+        vix = bars['VIX'].to_numpy(dtype=float)
+        quiet = self._quiet(vix)
+        dates = bars.index
 
-    for key, group in quiet_blocks:
-        if group.iloc[-1]:  # Solo marcar el último día si el grupo es True
-            quiet_filtered.loc[group.index[-1]] = True
+        events = []
+        # Rupturas: día no tranquilo precedido de uno tranquilo (también entre llamadas)
+        prev_quiet = np.concatenate([[self.last_quiet_date is not None], quiet[:-1]])
+        for k in np.flatnonzero(prev_quiet & ~quiet):
+            last_quiet = self.last_quiet_date if k == 0 else dates[k - 1]
+            events.append(('quiet_end', last_quiet, dates[k]))
 
-    return quiet_filtered
+        if len(vix):
+            self.last_quiet_date = dates[-1] if quiet[-1] else None
+        return events
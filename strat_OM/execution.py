@@ -0,0 +1,173 @@
+# FILE: strat_OM/execution.py
+# Modelo de ejecución compartido por los simuladores: precios de llenado y costes.
+#
+# Los simuladores sólo deciden CUÁNDO se entra y se sale y a qué nivel (cierre, stop...).
+# El modelo convierte esos niveles en llenados y en beneficio, de una vez sobre todas las
+# operaciones del registro (arrays, sin bucles por operación):
+#   - gap a través del stop: si la barra de salida abre ya más allá del stop, se llena a la apertura,
+#   - deslizamiento en contra en cada lado, en ticks y/o en fracción del ATR de la barra,
+#   - comisión por contrato y lado,
+#   - multiplicador del contrato (USD por punto) y nº de contratos.
+# El modelo por defecto (sin costes) da los mismos precios y beneficios que antes: nivel exacto y 50 USD/punto.
+
+import numpy as np
+
+from strat_OM.trade_ledger import STRATEGY_DIRECTION, STOP_FIXED, STOP_TRAIL, STOP
+from strat_OM.portfolio import POINT_VALUE
+
+STOP_OUTCOMES = (STOP_FIXED, STOP_TRAIL, STOP)
+OPEN_COLUMN = 'open_nasdaq'
+
+
+def open_prices(df, open_col=OPEN_COLUMN):
+    """Precios de apertura de `df` como array (ValueError si falta la columna)."""
+    if open_col not in df.columns:
+        raise ValueError(f"La evaluación con gaps requiere la columna de apertura '{open_col}'.")
+    return df[open_col].to_numpy(dtype=float)
+
+
+def apply_gap_fills(trades, exit_open):
+    """
+    Stops saltados en la apertura (array estructurado del TradeLedger, modificado en sitio).
+
+    El mínimo (o máximo) de la barra no distingue un toque dentro de la barra de un gap: si
+    la barra de salida ya abre más allá del stop (largo: por debajo; corto: por encima), la
+    orden se llena a la apertura y no al nivel. Una apertura NaN se trata como sin gap.
+
+    Args:
+        exit_open: apertura de la barra de salida de cada operación.
+
+    Returns:
+        array de bool: las operaciones llenadas a la apertura.
+    """
+    if not len(trades):
+        return np.zeros(0, dtype=bool)
+    direction = np.asarray(STRATEGY_DIRECTION, dtype=float)[trades['strategy']]
+    exit_open = np.asarray(exit_open, dtype=float)
+    with np.errstate(invalid='ignore'):
+        gapped = np.isin(trades['outcome'], STOP_OUTCOMES) & (direction * (exit_open - trades['exit_price']) < 0)
+    trades['exit_price'] = np.where(gapped, exit_open, trades['exit_price'])
+    return gapped
+
+
+class ExecutionModel:
+    """
+    Cómo se llenan las órdenes y cuánto cuestan.
+
+    Args:
+        point_value: USD por punto y contrato (multiplicador del contrato).
+        contracts: contratos por operación.
+        commission: USD por contrato y lado (se paga en la entrada y en la salida).
+        tick_size: puntos por tick.
+        slippage_ticks: ticks de deslizamiento en contra por lado.
+        slippage_atr: deslizamiento en contra por lado, en fracciones del ATR ('nasdaq_atr')
+            de la barra de la orden.
+        gap_fills: los stops que la barra de salida salta en la apertura se llenan al precio
+            de apertura (requiere la columna `open_col`, ver `apply_gap_fills`).
+        open_col: columna con el precio de apertura.
+    """
+
+    def __init__(self, point_value=POINT_VALUE, contracts=1, commission=0.0, tick_size=0.25, slippage_ticks=0,
+                 slippage_atr=0.0, gap_fills=False, open_col=OPEN_COLUMN):
+        self.point_value = point_value
+        self.contracts = contracts
+        self.commission = commission
+        self.tick_size = tick_size
+        self.slippage_ticks = slippage_ticks
+        self.slippage_atr = slippage_atr
+        self.gap_fills = gap_fills
+        self.open_col = open_col
+
+    def __repr__(self):
+        fields = ', '.join(f"{key}={value!r}" for key, value in vars(self).items())
+        return f"ExecutionModel({fields})"
+
+    @property
+    def contract_value(self):
+        """USD por punto de una operación completa (multiplicador x contratos), p. ej. para `mark_to_market`."""
+        return self.point_value * self.contracts
+
+    def _slippage(self, n, atr=None):
+        """Deslizamiento (puntos) de `n` órdenes; `atr` es el ATR de la barra de cada orden."""
+        slippage = np.full(n, self.tick_size * self.slippage_ticks, dtype=float)
+        if self.slippage_atr:
+            slippage += self.slippage_atr * np.nan_to_num(np.asarray(atr, dtype=float))
+        return slippage
+
+    def apply(self, trades, df):
+        """
+        Llena las operaciones `trades` (array estructurado del TradeLedger, modificado en sitio).
+
+        Espera en 'entry_price' / 'exit_price' los niveles que decide el simulador (cierre de
+        la barra o nivel del stop) y deja los precios de llenado y el beneficio neto en 'pnl'.
+        Las posiciones sobre `df` las dan 'entry_idx' / 'exit_idx'; de `df` sólo se leen la
+        apertura y el ATR de esas barras (ver `fill`).
+        """
+        if not len(trades):
+            return trades
+        entry_idx, exit_idx = trades['entry_idx'], trades['exit_idx']
+        exit_open = open_prices(df, self.open_col)[exit_idx] if self.gap_fills else None
+        entry_atr = exit_atr = None
+        if self.slippage_atr:
+            atr = df['nasdaq_atr'].to_numpy(dtype=float)
+            entry_atr, exit_atr = atr[entry_idx], atr[exit_idx]
+        return self.fill(trades, exit_open, entry_atr, exit_atr)
+
+    def fill(self, trades, exit_open=None, entry_atr=None, exit_atr=None):
+        """
+        Como `apply`, con los datos de mercado ya recogidos por operación (para simuladores
+        que no guardan la historia completa, p. ej. `VixLongTracker`).
+
+        Args:
+            exit_open: apertura de la barra de salida (obligatoria con `gap_fills`).
+            entry_atr / exit_atr: 'nasdaq_atr' de las barras de entrada y salida (obligatorios
+                con `slippage_atr`).
+        """
+        if not len(trades):
+            return trades
+        direction = np.asarray(STRATEGY_DIRECTION, dtype=float)[trades['strategy']]
+
+        if self.gap_fills:
+            if exit_open is None:
+                raise ValueError("gap_fills requiere la apertura de la barra de salida de cada operación.")
+            apply_gap_fills(trades, exit_open)
+        exit_price = trades['exit_price']
+
+        if self.slippage_ticks or self.slippage_atr:
+            if self.slippage_atr and (entry_atr is None or exit_atr is None):
+                raise ValueError("slippage_atr requiere el ATR de las barras de entrada y salida.")
+            trades['entry_price'] += direction * self._slippage(len(trades), entry_atr)
+            exit_price = exit_price - direction * self._slippage(len(trades), exit_atr)
+        trades['exit_price'] = exit_price
+
+        trades['pnl'] = direction * (trades['exit_price'] - trades['entry_price']) * self.contract_value
+        if self.commission:
+            trades['pnl'] -= 2 * self.commission * self.contracts
+        return trades
+
+
+DEFAULT_EXECUTION = ExecutionModel()
+
+
+def apply_execution(ledger, df, execution=None, start=0):
+    """Aplica `execution` (por defecto, sin costes) a las operaciones de `ledger` desde la posición `start`."""
+    (execution or DEFAULT_EXECUTION).apply(ledger.trades[start:], df)
+    return ledger
+
+
+def append_filled(ledger, strategy, closed, execution=None):
+    """
+    Añade a `ledger` las operaciones de un simulador por bloques y aplica `execution`.
+
+    Args:
+        closed: tuplas (entry_idx, exit_idx, entry_price, exit_price, outcome, entry_atr,
+            exit_atr, exit_open) en orden de entrada, con los niveles del simulador y los
+            datos de mercado que necesita `ExecutionModel.fill`.
+    """
+    start = len(ledger)
+    for entry_idx, exit_idx, entry_price, exit_price, outcome, _, _, _ in closed:
+        ledger.append(strategy, entry_idx, exit_idx, entry_price, exit_price, outcome, 0.0)
+    if closed:
+        entry_atr, exit_atr, exit_open = np.array([t[5:] for t in closed], dtype=float).T
+        (execution or DEFAULT_EXECUTION).fill(ledger.trades[start:], exit_open, entry_atr, exit_atr)
+    return ledger
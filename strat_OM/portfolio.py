@@ -0,0 +1,110 @@
+# FILE: strat_OM/portfolio.py
+# Equity, exposición y drawdown de la cartera completa valorando las posiciones en cada barra
+# (mark-to-market), no sólo el beneficio realizado en la fecha de salida.
+#
+# Todo se obtiene con acumulados sobre el registro de operaciones (TradeLedger):
+#   - cantidad abierta:  +q en la barra de entrada, -q en la de salida  -> cumsum
+#   - coste abierto:     +q * precio de entrada, igual                  -> cumsum
+#   - beneficio cerrado: pnl en la barra de salida                      -> cumsum
+#   - no realizado = cantidad * close - coste
+# Es O(barras + operaciones), sin bucles por operación, y los largos y coberturas
+# que se solapan se compensan de forma natural en la misma barra.
+
+import numpy as np
+import pandas as pd
+
+from strat_OM.trade_ledger import STRATEGY_DIRECTION
+
+POINT_VALUE = 50           # USD por punto, el mismo que usan los simuladores
+INITIAL_CAPITAL = 10000
+
+
+def _per_bar(idx, weights, n):
+    """Suma de `weights` en cada barra `idx` (array de longitud n)."""
+    return np.bincount(idx, weights=weights, minlength=n)[:n]
+
+
+def mark_to_market(ledger, close, dates=None, initial_capital=INITIAL_CAPITAL, point_value=POINT_VALUE):
+    """
+    Curva de la cartera barra a barra a partir del registro combinado de operaciones.
+
+    Una operación está abierta desde su barra de entrada hasta la barra anterior a su
+    salida; en la barra de salida pasa a contar su beneficio realizado (`pnl`). Las
+    operaciones todavía abiertas (outcome 'open') salen en la última barra a su cierre,
+    así que ahí el valor realizado y el marcado coinciden.
+
+    Args:
+        ledger: TradeLedger (p. ej. `merge_ledgers(...)`) con posiciones sobre `close`.
+        close: precios de cierre del subyacente, alineados con `ledger.dates`.
+        dates: índice para el resultado (por defecto `ledger.dates`).
+        initial_capital: capital inicial de la curva de equity.
+        point_value: USD por punto y contrato.
+
+    Returns:
+        pd.DataFrame: equity, realized, unrealized, net_exposure, gross_exposure,
+        open_trades, drawdown (USD) y drawdown_pct, una fila por barra.
+    """
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    dates = ledger.dates if dates is None else dates
+    trades = ledger.trades
+
+    entry_idx, exit_idx = trades['entry_idx'], trades['exit_idx']
+    qty = np.asarray(STRATEGY_DIRECTION, dtype=float)[trades['strategy']] * point_value
+    gross_qty = np.abs(qty)
+    ones = np.ones(len(trades))
+
+    # Altas en la entrada y bajas en la salida: un solo acumulado por magnitud
+    open_qty = np.cumsum(_per_bar(entry_idx, qty, n) - _per_bar(exit_idx, qty, n))
+    open_gross = np.cumsum(_per_bar(entry_idx, gross_qty, n) - _per_bar(exit_idx, gross_qty, n))
+    open_cost = np.cumsum(_per_bar(entry_idx, qty * trades['entry_price'], n)
+                          - _per_bar(exit_idx, qty * trades['entry_price'], n))
+    open_trades = np.cumsum(_per_bar(entry_idx, ones, n) - _per_bar(exit_idx, ones, n))
+    realized = np.cumsum(_per_bar(exit_idx, trades['pnl'], n))
+
+    # Sin posiciones abiertas el no realizado es 0 aunque el close sea NaN
+    with np.errstate(invalid='ignore'):
+        unrealized = np.where(open_trades > 0, open_qty * close - open_cost, 0.0)
+    equity = initial_capital + realized + unrealized
+    peak = np.fmax.accumulate(equity)
+    drawdown = equity - peak
+
+    return pd.DataFrame({
+        'equity': equity,
+        'realized': realized,
+        'unrealized': unrealized,
+        'net_exposure': open_qty * close,
+        'gross_exposure': open_gross * close,
+        'open_trades': open_trades.round().astype(np.int64),
+        'drawdown': drawdown,
+        'drawdown_pct': drawdown / peak,
+    }, index=dates)
+
+
+def to_daily(portfolio):
+    """
+    Pasa una curva intradía a diaria: último valor del día para equity y para las dos
+    exposiciones (neta y bruta: la posición con la que cierra el día), peor drawdown del
+    día y máximo de operaciones abiertas.
+    """
+    days = portfolio.groupby(portfolio.index.normalize())
+    daily = days.last()
+    daily['drawdown'] = days['drawdown'].min()
+    daily['drawdown_pct'] = days['drawdown_pct'].min()
+    daily['open_trades'] = days['open_trades'].max()
+    return daily
+
+
+def portfolio_summary(portfolio):
+    """Resumen de riesgo de una curva de `mark_to_market`."""
+    equity = portfolio['equity'].to_numpy()
+    if not len(equity):
+        return {}
+    return {
+        'final_equity': equity[-1],
+        'max_drawdown_usd': portfolio['drawdown'].min(),
+        'max_drawdown_pct': portfolio['drawdown_pct'].min() * 100,
+        'max_gross_exposure': portfolio['gross_exposure'].max(),
+        'max_open_trades': int(portfolio['open_trades'].max()),
+        'time_in_market_pct': (portfolio['open_trades'] > 0).mean() * 100,
+    }
@@ -0,0 +1,175 @@
+# FILE: strat_OM/signal_engine.py
+# Motor común de señales y posiciones sobre arrays de NumPy.
+# Lo usan los simuladores para localizar salidas ("primer índice donde low < nivel")
+# y para emparejar entradas/salidas sin recorrer el DataFrame fila a fila.
+
+import numpy as np
+
+BLOCK_SIZE = 64
+
+
+class LevelIndex:
+    """
+    Índice de búsqueda "primer j >= start con values[j] < nivel".
+
+    Guarda el mínimo de cada bloque de `BLOCK_SIZE` barras, de modo que los tramos que
+    no tocan el nivel se descartan de golpe. Los NaN nunca cumplen la condición.
+    Con `above=True` busca el primer values[j] > nivel.
+    """
+
+    def __init__(self, values, above=False):
+        values = np.asarray(values, dtype=float)
+        self.sign = -1.0 if above else 1.0
+        self.values = np.where(np.isnan(values), np.inf, self.sign * values)
+        n = len(self.values)
+        pad = (-n) % BLOCK_SIZE
+        self.block_min = np.append(self.values, np.full(pad, np.inf)).reshape(-1, BLOCK_SIZE).min(axis=1)
+
+    def first(self, start, stop, level):
+        """Primer índice en [start, stop) que cruza `level`, o -1 si no hay ninguno."""
+        level = self.sign * level
+        if start >= stop or level != level:
+            return -1
+        values, block_min = self.values, self.block_min
+        first_block_end = min(stop, (start // BLOCK_SIZE + 1) * BLOCK_SIZE)
+        hits = np.flatnonzero(values[start:first_block_end] < level)
+        if hits.size:
+            return start + hits[0]
+        if first_block_end >= stop:
+            return -1
+        b0 = first_block_end // BLOCK_SIZE
+        b1 = (stop - 1) // BLOCK_SIZE + 1
+        blocks = np.flatnonzero(block_min[b0:b1] < level)
+        if not blocks.size:
+            return -1
+        lo = (b0 + blocks[0]) * BLOCK_SIZE
+        hits = np.flatnonzero(values[lo:min(stop, lo + BLOCK_SIZE)] < level)
+        return lo + hits[0] if hits.size else -1
+
+
+def next_true(mask):
+    """Para cada posición i, el primer j >= i con mask[j] True (len(mask) si no existe). Longitud n + 1."""
+    n = len(mask)
+    positions = np.flatnonzero(mask)
+    nxt = np.full(n + 1, n, dtype=np.int64)
+    nxt[:n] = np.append(positions, n)[np.searchsorted(positions, np.arange(n))]
+    return nxt
+
+
+def cross_below(a, b):
+    """True en i si a cruza por debajo de b: a[i-1] > b[i-1] y a[i] < b[i]."""
+    out = np.zeros(len(a), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        out[1:] = (a[:-1] > b[:-1]) & (a[1:] < b[1:])
+    return out
+
+
+def cross_above(a, b):
+    """True en i si a cruza por encima de b: a[i-1] < b[i-1] y a[i] > b[i]."""
+    out = np.zeros(len(a), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        out[1:] = (a[:-1] < b[:-1]) & (a[1:] > b[1:])
+    return out
+
+
+class ShortTradeTracker:
+    """
+    `resolve_short_trades` por bloques de barras (historias que no caben en memoria).
+
+    Guarda entre bloques la posición corta abierta: barra de entrada, stop, los valores que
+    el llamador quiera arrastrar de la barra de entrada (`carry`) y la barra desde la que
+    seguir buscando la salida. Las reglas son las de `resolve_short_trades`, así que el
+    resultado es el mismo cortando los datos por donde sea. Las barras son globales (se
+    cuentan desde el primer bloque); la posición que siga abierta al final no se devuelve.
+    """
+
+    def __init__(self):
+        self.position = None       # [entry_idx, stop_level, carry_values, next_bar]
+        self.n_bars = 0
+
+    def update(self, entry_mask, stop_levels, high, exit_mask=None, carry=()):
+        """
+        Procesa un bloque.
+
+        Args:
+            entry_mask, stop_levels, high, exit_mask: como en `resolve_short_trades`, sobre el bloque.
+            carry: arrays del bloque cuyo valor en la barra de entrada se devuelve con cada operación.
+
+        Returns:
+            list: Operaciones cerradas en el bloque como (entry_idx, exit_idx, stop_level,
+            salida_por_stop, valores_de_carry_en_la_entrada).
+        """
+        n, c0 = len(entry_mask), self.n_bars
+        next_entry = next_true(entry_mask)
+        next_exit_signal = next_true(exit_mask) if exit_mask is not None else np.full(n + 1, n, dtype=np.int64)
+        stop_index = LevelIndex(high, above=True) if high is not None else None
+
+        closed = []
+        pos = 0
+        while True:
+            if self.position is None:
+                e = next_entry[pos]
+                if e >= n:
+                    break
+                self.position = [c0 + e, stop_levels[e], tuple(values[e] for values in carry), c0 + e + 1]
+            entry_idx, stop, values, start = self.position
+            s = start - c0
+            signal_exit = next_exit_signal[s]
+            stop_exit = stop_index.first(s, min(signal_exit + 1, n), stop) if stop_index is not None else -1
+            if stop_exit >= 0:
+                x, hit = stop_exit, True
+            elif signal_exit < n:
+                x, hit = signal_exit, False
+            else:
+                self.position[3] = c0 + n
+                break
+            closed.append((entry_idx, c0 + x, stop, hit, values))
+            self.position = None
+            pos = x + 1
+
+        self.n_bars += n
+        return closed
+
+
+def resolve_short_trades(entry_mask, stop_levels, high, exit_mask=None):
+    """
+    Empareja entradas y salidas de una posición corta (una posición a la vez).
+
+    - Se entra en la primera barra con `entry_mask` estando fuera de mercado.
+    - Desde la barra siguiente se sale en la primera barra con high > stop
+      (stop = `stop_levels` de la barra de entrada) o con `exit_mask`.
+      Si ambas coinciden, manda el stop.
+    - La barra de salida no puede abrir una nueva entrada. Las posiciones que
+      siguen abiertas al final no se devuelven.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (entradas, salidas, salida_por_stop)
+    """
+    closed = ShortTradeTracker().update(entry_mask, stop_levels, high, exit_mask)
+    entries, exits, _, by_stop, _ = zip(*closed) if closed else ((), (), (), (), ())
+    return np.array(entries, dtype=np.int64), np.array(exits, dtype=np.int64), np.array(by_stop, dtype=bool)
+
+
+def interval_coverage(dates, starts, ends):
+    """
+    Nº de intervalos [start, end] (ambos incluidos) que cubren cada fecha de `dates`.
+
+    `dates` debe estar ordenado. Se resuelve con searchsorted + suma acumulada de
+    +1 / -1, sin recorrer las barras por cada intervalo. Los intervalos con algún
+    extremo nulo se ignoran.
+    """
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    starts = np.asarray(starts, dtype='datetime64[ns]')
+    ends = np.asarray(ends, dtype='datetime64[ns]')
+    valid = ~(np.isnat(starts) | np.isnat(ends))
+    first = np.searchsorted(dates, starts[valid], side='left')
+    last = np.searchsorted(dates, ends[valid], side='right')
+    counter = np.zeros(len(dates) + 1, dtype=np.int64)
+    np.add.at(counter, first, 1)
+    np.add.at(counter, last, -1)
+    return np.cumsum(counter[:-1])
+
+
+def in_position_mask(dates, entry_dates, exit_dates):
+    """True en las barras en las que hay al menos una posición abierta (entrada y salida incluidas)."""
+    return interval_coverage(dates, entry_dates, exit_dates) > 0
@@ -5,20 +5,16 @@
 import pandas as pd
 import numpy as np
 
-def calculate_dynamic_atr_trailing_stop(df):
+
+def _atr_stop_offset(df, atr_period=14, smoothing_period=10, atr_multiplier=3.5):
     """
-    Calcula el ATR Trailing Stop para posiciones LARGAS.
-    Esta función se mantiene sin cambios, ya que es nuestra referencia.
+    Distancia del stop al precio: ATR suavizado (media de la media del True Range)
+    multiplicado por `atr_multiplier`. Se calcula una sola vez para largos y cortos.
     """
-    atr_period=14
-    smoothing_period=10
-    atr_multiplier=3.5
-    method="close"
-
     high = df['high_nasdaq']
     low = df['low_nasdaq']
     close = df['nasdaq']
-    
+
     prev_close = close.shift(1)
     tr = pd.concat([
         high - low, (high - prev_close).abs(), (low - prev_close).abs()
@@ -26,95 +22,152 @@ def calculate_dynamic_atr_trailing_stop(df):
 
     atr = tr.rolling(window=atr_period).mean()
     smoothed_atr = atr.rolling(window=smoothing_period).mean()
-    stop_offset = smoothed_atr * atr_multiplier
-    
-    trailing_stop = [np.nan] * len(df)
-
-    for i in range(1, len(df)):
-        price = close.iloc[i]
-        prev_price = close.iloc[i-1]
-        prev_stop = trailing_stop[i-1]
-        
-        if pd.isna(stop_offset.iloc[i]):
-            trailing_stop[i] = prev_stop
+    return smoothed_atr * atr_multiplier
+
+
+def _atr_trailing_stop_kernel(close, stop_offset, prev_long=np.nan, prev_short=np.nan):
+    """
+    Máquina de estados del ATR Trailing Stop: recibe y devuelve arrays de NumPy, pero el
+    recorrido es un bucle de Python puro sobre listas (`_atr_trailing_stop_lists`).
+
+    Cada stop depende del de la barra anterior, así que no se puede vectorizar, y sin un
+    compilador (numba no es una dependencia) un bucle sobre floats de Python es varias veces
+    más rápido que indexar arrays elemento a elemento. Es O(n) en una sola pasada, pero no
+    es código compilado: para millones de barras, usar el modo incremental (`prev_long` /
+    `prev_short`) en lugar de recalcular toda la serie.
+
+    Devuelve los stops de LARGOS y CORTOS.
+    Ambos siguen la misma lógica de "ratchet"/"flipping"; sólo difieren en la
+    inicialización (por debajo / por encima del precio) y en el empate
+    price == prev_stop (el largo se va arriba, el corto abajo).
+
+    `prev_long`/`prev_short` son los stops de la barra 0 (NaN al empezar desde cero),
+    lo que permite continuar una serie ya calculada pasando su última barra como la 0.
+    """
+    # Los floats de Python son float64: mismas operaciones, mismo resultado bit a bit
+    long_stop, short_stop = _atr_trailing_stop_lists(close.tolist(), stop_offset.tolist(), prev_long, prev_short)
+    return np.array(long_stop, dtype=float), np.array(short_stop, dtype=float)
+
+
+def _atr_trailing_stop_lists(closes, offsets, prev_long=np.nan, prev_short=np.nan):
+    """El recorrido de `_atr_trailing_stop_kernel` sobre listas de floats (también para una sola barra en vivo)."""
+    n = len(closes)
+    long_stop = [np.nan] * n
+    short_stop = [np.nan] * n
+    if n:
+        long_stop[0], short_stop[0] = prev_long, prev_short
+
+    for i in range(1, n):
+        offset = offsets[i]
+        if offset != offset:  # NaN: se arrastra el stop anterior
+            long_stop[i] = prev_long
+            short_stop[i] = prev_short
             continue
 
-        if pd.isna(prev_stop):
-            new_stop = price - stop_offset.iloc[i]
+        price = closes[i]
+        prev_price = closes[i - 1]
+        up = price - offset
+        down = price + offset
+
+        # --- Largos ---
+        if prev_long != prev_long:
+            new_long = up
+        elif price > prev_long and prev_price > prev_long:
+            new_long = max(prev_long, up)
+        elif price < prev_long and prev_price < prev_long:
+            new_long = min(prev_long, down)
+        elif price > prev_long:
+            new_long = up
         else:
-            if price > prev_stop and prev_price > prev_stop:
-                new_stop = max(prev_stop, price - stop_offset.iloc[i])
-            elif price < prev_stop and prev_price < prev_stop:
-                new_stop = min(prev_stop, price + stop_offset.iloc[i])
-            elif price > prev_stop:
-                new_stop = price - stop_offset.iloc[i]
-            else:
-                new_stop = price + stop_offset.iloc[i]
+            new_long = down
 
-        trailing_stop[i] = new_stop
+        # --- Cortos (simétrica a la de largos) ---
+        if prev_short != prev_short:
+            new_short = down
+        elif price < prev_short and prev_price < prev_short:
+            new_short = min(prev_short, down)
+        elif price > prev_short and prev_price > prev_short:
+            new_short = max(prev_short, up)
+        elif price < prev_short:
+            new_short = down
+        else:
+            new_short = up
+
+        long_stop[i] = prev_long = new_long
+        short_stop[i] = prev_short = new_short
 
-    return pd.Series(trailing_stop, index=df.index, name="atr_trailing_stop")
+    return long_stop, short_stop
 
 
-def calculate_short_atr_trailing_stop(df):
+def _atr_trailing_stop_kernel_2d(close, stop_offset):
     """
-    Calcula un ATR Trailing Stop para posiciones CORTAS con una lógica
-    simétrica y robusta, reflejando perfectamente la función para largos.
+    La misma máquina de estados que `_atr_trailing_stop_kernel` para una matriz (T, K)
+    con un activo por columna: un único recorrido en el tiempo, vectorizado entre activos.
+    Las comparaciones y max/min son las mismas, así que cada columna coincide bit a bit
+    con el kernel 1-D.
     """
-    atr_period=14
-    smoothing_period=10
-    atr_multiplier=3.5
-    
-    high = df['high_nasdaq']
-    low = df['low_nasdaq']
-    close = df['nasdaq']
-    
-    prev_close = close.shift(1)
-    tr = pd.concat([
-        high - low, (high - prev_close).abs(), (low - prev_close).abs()
-    ], axis=1).max(axis=1)
+    close = np.asarray(close, dtype=float)
+    stop_offset = np.asarray(stop_offset, dtype=float)
+    long_stop = np.full(close.shape, np.nan)
+    short_stop = np.full(close.shape, np.nan)
+    if not len(close):
+        return long_stop, short_stop
 
-    atr = tr.rolling(window=atr_period).mean()
-    smoothed_atr = atr.rolling(window=smoothing_period).mean()
-    stop_offset = smoothed_atr * atr_multiplier
-    
-    trailing_stop = [np.nan] * len(df)
-    
-    for i in range(1, len(df)):
-        price = close.iloc[i]
-        prev_price = close.iloc[i-1]
-        prev_stop = trailing_stop[i-1]
-        
-        if pd.isna(stop_offset.iloc[i]):
-            trailing_stop[i] = prev_stop
-            continue
+    prev_long, prev_short = long_stop[0].copy(), short_stop[0].copy()
+    for i in range(1, len(close)):
+        offset, price, prev_price = stop_offset[i], close[i], close[i - 1]
+        up = price - offset
+        down = price + offset
 
-        # --- LÓGICA DE TRAILING STOP PARA CORTOS (SIMÉTRICA A LA DE LARGOS) ---
-        
-        # 1. Inicialización: El stop empieza por encima del precio.
-        if pd.isna(prev_stop):
-            new_stop = price + stop_offset.iloc[i]
-        
-        # 2. Lógica de seguimiento y "flipping"
-        else:
-            # Condición para una tendencia bajista (el precio está por debajo del stop)
-            if price < prev_stop and prev_price < prev_stop:
-                # El stop se mueve hacia abajo (ratchet). Es el MÍNIMO del stop anterior y el nuevo candidato.
-                new_stop = min(prev_stop, price + stop_offset.iloc[i])
-            
-            # Condición para una tendencia alcista (el precio está por encima del stop)
-            elif price > prev_stop and prev_price > prev_stop:
-                # El stop ahora actúa como un stop para largos (se mueve hacia arriba)
-                new_stop = max(prev_stop, price - stop_offset.iloc[i])
-            
-            # Condición para un cruce a la baja (inicia una tendencia bajista)
-            elif price < prev_stop:
-                new_stop = price + stop_offset.iloc[i]
-            
-            # Condición para un cruce al alza (inicia una tendencia alcista)
-            else: # (price > prev_stop)
-                new_stop = price - stop_offset.iloc[i]
-        
-        trailing_stop[i] = new_stop
-
-    return pd.Series(trailing_stop, index=df.index, name="atr_trailing_stop_short")
\ No newline at end of file
+        new_long = np.select(
+            [prev_long != prev_long,
+             (price > prev_long) & (prev_price > prev_long),
+             (price < prev_long) & (prev_price < prev_long),
+             price > prev_long],
+            [up, np.maximum(prev_long, up), np.minimum(prev_long, down), up], down)
+        new_short = np.select(
+            [prev_short != prev_short,
+             (price < prev_short) & (prev_price < prev_short),
+             (price > prev_short) & (prev_price > prev_short),
+             price < prev_short],
+            [down, np.minimum(prev_short, down), np.maximum(prev_short, up), down], up)
+
+        # NaN en el offset: se arrastra el stop anterior
+        carry = offset != offset
+        prev_long = long_stop[i] = np.where(carry, prev_long, new_long)
+        prev_short = short_stop[i] = np.where(carry, prev_short, new_short)
+
+    return long_stop, short_stop
+
+
+def calculate_atr_trailing_stops(df, atr_period=14, smoothing_period=10, atr_multiplier=3.5):
+    """
+    Calcula en una única pasada los ATR Trailing Stops para LARGOS y CORTOS.
+
+    Returns:
+        tuple[pd.Series, pd.Series]: (atr_trailing_stop, atr_trailing_stop_short)
+    """
+    stop_offset = _atr_stop_offset(df, atr_period, smoothing_period, atr_multiplier)
+    long_stop, short_stop = _atr_trailing_stop_kernel(
+        df['nasdaq'].to_numpy(dtype=float), stop_offset.to_numpy(dtype=float)
+    )
+    return (
+        pd.Series(long_stop, index=df.index, name="atr_trailing_stop"),
+        pd.Series(short_stop, index=df.index, name="atr_trailing_stop_short"),
+    )
+
+
+def calculate_dynamic_atr_trailing_stop(df, atr_multiplier=3.5):
+    """
+    Calcula el ATR Trailing Stop para posiciones LARGAS.
+    Esta función se mantiene sin cambios, ya que es nuestra referencia.
+    """
+    return calculate_atr_trailing_stops(df, atr_multiplier=atr_multiplier)[0]
+
+
+def calculate_short_atr_trailing_stop(df, atr_multiplier=3.5):
+    """
+    Calcula un ATR Trailing Stop para posiciones CORTAS con una lógica
+    simétrica y robusta, reflejando perfectamente la función para largos.
+    """
+    return calculate_atr_trailing_stops(df, atr_multiplier=atr_multiplier)[1]
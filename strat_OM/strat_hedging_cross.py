@@ -4,12 +4,21 @@
 
 import pandas as pd
 import numpy as np
+from strat_OM.signal_engine import ShortTradeTracker, resolve_short_trades
+from strat_OM.trade_ledger import TradeLedger, HEDGE_SHORT_CROSS, STOP, hedge_trades_frame
+from strat_OM.execution import DEFAULT_EXECUTION, append_filled, apply_execution, open_prices
 
-def strat_hedging_cross(df: pd.DataFrame, fast_ma_col: str, slow_ma_col: str) -> pd.DataFrame:
+def strat_hedging_cross_ledger(df: pd.DataFrame, fast_ma_col: str, slow_ma_col: str, ledger=None,
+                               execution=None) -> TradeLedger:
     """
     Estrategia de cobertura con:
     - ENTRADA: Cruce de medias (señal -2).
     - SALIDA: Cuando el precio sube y rompe un STOP FIJO de 2 ATR desde el cierre de entrada.
+
+    `execution` (ExecutionModel) fija los llenados y costes; por defecto, sin costes y al nivel del stop.
+
+    Returns:
+        TradeLedger: Las operaciones con strategy = HEDGE_SHORT_CROSS (posiciones sobre `df`).
     """
     print("\n" + "="*60)
     print(f"📈 Estrategia de cobertura con STOP FIJO (2 ATR)...")
@@ -18,54 +27,105 @@ def strat_hedging_cross(df: pd.DataFrame, fast_ma_col: str, slow_ma_col: str) ->
     required_cols = ['nasdaq', 'high_nasdaq', 'nasdaq_atr', fast_ma_col, slow_ma_col]
     if not all(col in df.columns for col in required_cols):
         raise ValueError(f"El DataFrame debe contener las columnas: {required_cols}")
+    if ledger is None:
+        ledger = TradeLedger(dates=df.index)
+
+    # Equivalente a df.dropna(subset=required_cols) sin copiar el DataFrame completo
+    values = {col: df[col].to_numpy(dtype=float) for col in required_cols}
+    valid = ~np.isnan(np.column_stack(list(values.values()))).any(axis=1)
+    values = {col: arr[valid] for col, arr in values.items()}
+    dates = df.index[valid]
+
+    position = np.where(values[fast_ma_col] > values[slow_ma_col], 1, -1)
+    signal = np.diff(position, prepend=position[:1])
+
+    close = values['nasdaq']
+    high = values['high_nasdaq']
+    stop_levels = close + (2 * values['nasdaq_atr'])
+
+    # Entrada en corto con la señal -2; salida cuando el máximo rompe el STOP
+    entries, exits, _ = resolve_short_trades(signal == -2, stop_levels, high)
 
-    df_hedge = df.dropna(subset=required_cols).copy()
-    df_hedge['position'] = np.where(df_hedge[fast_ma_col] > df_hedge[slow_ma_col], 1, -1)
-    df_hedge['signal'] = df_hedge['position'].diff()
-
-    records = []
-    in_short = False
-    entry_date, entry_price, stop_loss = None, None, None
-
-    for date, row in df_hedge.iterrows():
-        # Entrada en corto
-        if not in_short and row['signal'] == -2:
-            in_short = True
-            entry_date = date
-            entry_price = row['nasdaq']
-            stop_loss = entry_price + (2 * row['nasdaq_atr'])
-
-            print(f"  -> HEDGE: SHORT {entry_date.date()} @ {entry_price:.2f} | STOP: {stop_loss:.2f}")
-
-        # Salida por STOP
-        elif in_short:
-            if row['high_nasdaq'] > stop_loss:
-                exit_date = date
-                exit_price = stop_loss
-                profit_points = entry_price - exit_price
-                profit_usd = profit_points * 50
-                return_pct = profit_points / entry_price if entry_price else 0
-
-                records.append({
-                    'hedge_entry_date': entry_date,
-                    'hedge_entry_price': round(entry_price, 2),
-                    'hedge_exit_date': exit_date,
-                    'hedge_exit_price': round(exit_price, 2),
-                    'hedge_profit_usd': round(profit_usd, 2),
-                    'hedge_return_pct': return_pct
-                })
-
-                print(f"  -> HEDGE: EXIT {exit_date.date()} @ {exit_price:.2f} | Profit: {profit_usd:,.2f}")
-                in_short = False
-
-    if not records:
+    if not len(entries):
         print("No se generaron operaciones de cobertura.")
-        return pd.DataFrame()
+        return ledger
 
-    hedge_trades_df = pd.DataFrame(records)
-    total_profit = hedge_trades_df['hedge_profit_usd'].sum()
+    # Posiciones de las barras válidas -> posiciones en `df`
+    positions = np.flatnonzero(valid)
+    start = len(ledger)
+    ledger.extend(HEDGE_SHORT_CROSS, positions[entries], positions[exits], close[entries], stop_levels[entries], STOP, 0.0)
+    trades = apply_execution(ledger, df, execution, start).trades[start:]
+    profit_usd = trades['pnl']
+
+    for e, x, exit_price, pnl in zip(entries, exits, trades['exit_price'], profit_usd):
+        print(f"  -> HEDGE: SHORT {dates[e].date()} @ {close[e]:.2f} | STOP: {stop_levels[e]:.2f}")
+        print(f"  -> HEDGE: EXIT {dates[x].date()} @ {exit_price:.2f} | Profit: {pnl:,.2f}")
+
+    total_profit = np.round(profit_usd, 2).sum()
     print("="*60)
     print(f"✅ Total Profit Hedge: ${total_profit:,.2f}")
     print("="*60)
 
-    return hedge_trades_df
+    return ledger
+
+
+class HedgeCrossTracker:
+    """
+    `strat_hedging_cross_ledger` por bloques de barras (historias que no caben en memoria).
+
+    Arrastra entre bloques la última posición de las medias (para detectar el cruce en la
+    primera barra válida del bloque) y el corto abierto (`ShortTradeTracker`), así que el
+    resultado es el mismo cortando los datos por donde sea. Como en la versión por lotes,
+    las barras con algún NaN en las columnas requeridas se saltan y el corto que siga
+    abierto al final no se devuelve. `finish()` aplica `execution` (con `gap_fills` los
+    bloques deben traer la columna de apertura).
+    """
+
+    def __init__(self, fast_ma_col='sma_fast', slow_ma_col='sma_slow', ledger=None, dates=None, execution=None):
+        self.fast_ma_col, self.slow_ma_col = fast_ma_col, slow_ma_col
+        self.execution = execution or DEFAULT_EXECUTION
+        self.ledger = ledger if ledger is not None else TradeLedger(dates=dates)
+        self.trades = ShortTradeTracker()   # cuenta sólo las barras válidas
+        self.last_position = None
+        self.closed = []
+        self.n_bars = 0
+
+    def update(self, chunk):
+        """Procesa un bloque (columnas 'nasdaq', 'high_nasdaq', 'nasdaq_atr' y las dos medias)."""
+        required_cols = ['nasdaq', 'high_nasdaq', 'nasdaq_atr', self.fast_ma_col, self.slow_ma_col]
+        values = {col: chunk[col].to_numpy(dtype=float) for col in required_cols}
+        valid = ~np.isnan(np.column_stack(list(values.values()))).any(axis=1)
+        values = {col: arr[valid] for col, arr in values.items()}
+        positions = np.flatnonzero(valid)
+        bar_open = (open_prices(chunk, self.execution.open_col)[valid] if self.execution.gap_fills
+                    else np.full(len(positions), np.nan))
+
+        position = np.where(values[self.fast_ma_col] > values[self.slow_ma_col], 1, -1)
+        previous = position[:1] if self.last_position is None else [self.last_position]
+        signal = np.diff(position, prepend=previous)
+
+        close, nasdaq_atr = values['nasdaq'], values['nasdaq_atr']
+        stop_levels = close + (2 * nasdaq_atr)
+        c0 = self.trades.n_bars
+        closed = self.trades.update(signal == -2, stop_levels, values['high_nasdaq'],
+                                    carry=(self.n_bars + positions, close, nasdaq_atr))
+        for _, x, stop, _, (entry_pos, entry_price, entry_atr) in closed:
+            x -= c0
+            self.closed.append((entry_pos, self.n_bars + positions[x], entry_price, stop, STOP,
+                                entry_atr, nasdaq_atr[x], bar_open[x]))
+
+        if len(position):
+            self.last_position = position[-1]
+        self.n_bars += len(chunk)
+        return self
+
+    def finish(self):
+        """Aplica el modelo de ejecución a las operaciones cerradas y devuelve el TradeLedger."""
+        append_filled(self.ledger, HEDGE_SHORT_CROSS, self.closed, self.execution)
+        self.closed = []
+        return self.ledger
+
+
+def strat_hedging_cross(df: pd.DataFrame, fast_ma_col: str, slow_ma_col: str, execution=None) -> pd.DataFrame:
+    """Como `strat_hedging_cross_ledger`, pero devuelve el DataFrame de operaciones `hedge_*`."""
+    return hedge_trades_frame(strat_hedging_cross_ledger(df, fast_ma_col, slow_ma_col, execution=execution))
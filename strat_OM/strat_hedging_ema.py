@@ -1,65 +1,109 @@
 import pandas as pd
 import numpy as np
+from strat_OM.signal_engine import ShortTradeTracker, cross_above, cross_below, resolve_short_trades
+from strat_OM.trade_ledger import TradeLedger, HEDGE_SHORT_EMA, STOP, SIGNAL, hedge_trades_frame
+from strat_OM.execution import DEFAULT_EXECUTION, append_filled, apply_execution, open_prices
 
-def generate_ema_short_hedging_signals(df):
+def ema_short_hedging_ledger(df, atr_multiplier=0.5, ledger=None, execution=None):
     """
     Estrategia de cobertura basada en cruce estricto de medias (Close cruza la EMA lenta hacia abajo).
     Cierre de la posición cuando la EMA rápida cruza hacia arriba la EMA lenta o el precio toca el stop loss.
 
+    Args:
+        atr_multiplier: ATRs por encima de la entrada a los que se coloca el stop loss.
+        ledger: TradeLedger donde añadir las operaciones (si no, se crea uno).
+        execution: ExecutionModel con los llenados y costes (por defecto, sin costes: al nivel del stop).
+
     Returns:
-        pd.DataFrame: Registro de operaciones con entradas/salidas y beneficios.
+        TradeLedger: Las operaciones con strategy = HEDGE_SHORT_EMA.
     """
-    atr_multiplier = 0.5
-
     required_cols = ['nasdaq', 'sma_fast', 'sma_slow', 'nasdaq_atr']
     if not all(col in df.columns for col in required_cols):
         raise ValueError(f"El DataFrame debe contener las columnas: {required_cols}")
+    if ledger is None:
+        ledger = TradeLedger(dates=df.index)
+
+    close = df['nasdaq'].to_numpy(dtype=float)
+    sma_fast = df['sma_fast'].to_numpy(dtype=float)
+    sma_slow = df['sma_slow'].to_numpy(dtype=float)
+    stop_levels = close + (atr_multiplier * df['nasdaq_atr'].to_numpy(dtype=float))
+    high = df['high_nasdaq'].to_numpy(dtype=float) if 'high_nasdaq' in df.columns else None
+
+    # Entrada: close cruza la slow EMA. Salida: stop loss o cruce al alza de la EMA rápida
+    entries, exits, stop_hit = resolve_short_trades(
+        cross_below(close, sma_slow), stop_levels, high, exit_mask=cross_above(sma_fast, sma_slow)
+    )
+
+    start = len(ledger)
+    ledger.extend(HEDGE_SHORT_EMA, entries, exits, close[entries], np.where(stop_hit, stop_levels[entries], close[exits]),
+                  np.where(stop_hit, STOP, SIGNAL), 0.0)
+    apply_execution(ledger, df, execution, start)
 
-    records = []
-    in_trade = False
-    entry_price = entry_date = stop_loss = None
-
-    for i in range(1, len(df)):
-        row_prev = df.iloc[i - 1]
-        row = df.iloc[i]
-
-        # Entrada: close cruza la slow EMA
-        if not in_trade:
-            if row_prev['nasdaq'] > row_prev['sma_slow'] and row['nasdaq'] < row['sma_slow']:
-                in_trade = True
-                entry_date = row.name
-                entry_price = row['nasdaq']
-                stop_loss = entry_price + (atr_multiplier * row['nasdaq_atr'])
-
-        else:
-            stop_hit = 'high_nasdaq' in df.columns and row['high_nasdaq'] > stop_loss
-            cross_exit = row_prev['sma_fast'] < row_prev['sma_slow'] and row['sma_fast'] > row['sma_slow']
-
-            if stop_hit or cross_exit:
-                exit_price = stop_loss if stop_hit else row['nasdaq']
-                exit_date = row.name
-
-                profit_points = entry_price - exit_price
-                profit_usd = profit_points * 50
-                return_pct = profit_points / entry_price if entry_price != 0 else 0
-
-                records.append({
-                    'hedge_entry_date': entry_date,
-                    'hedge_entry_price': round(entry_price, 2),
-                    'hedge_exit_date': exit_date,
-                    'hedge_exit_price': round(exit_price, 2),
-                    'hedge_profit_usd': round(profit_usd, 2),
-                    'hedge_return_pct': round(return_pct, 4)
-                })
-
-                in_trade = False
-                entry_price = entry_date = stop_loss = None
-
-    df_signals = pd.DataFrame(records)
-
-    if not df_signals.empty:
-        print(f"\n\u2705 Total Profit Hedge (Slow EMA): ${df_signals['hedge_profit_usd'].sum():,.2f}")
+    if len(entries):
+        print(f"\n\u2705 Total Profit Hedge (Slow EMA): ${np.round(ledger['pnl'][start:], 2).sum():,.2f}")
     else:
         print("\nNo hedge trades were generated with EMA slow strategy.")
 
-    return df_signals
+    return ledger
+
+
+class EmaHedgeTracker:
+    """
+    `ema_short_hedging_ledger` por bloques de barras (historias que no caben en memoria).
+
+    Arrastra entre bloques la última barra (cierre y medias, para los cruces de la primera
+    barra del bloque) y el corto abierto (`ShortTradeTracker`), así que el resultado es el
+    mismo cortando los datos por donde sea. El corto que siga abierto al final no se
+    devuelve. `finish()` aplica `execution` (con `gap_fills` los bloques deben traer la
+    columna de apertura).
+    """
+
+    def __init__(self, atr_multiplier=0.5, ledger=None, dates=None, execution=None):
+        self.atr_multiplier = atr_multiplier
+        self.execution = execution or DEFAULT_EXECUTION
+        self.ledger = ledger if ledger is not None else TradeLedger(dates=dates)
+        self.trades = ShortTradeTracker()
+        self.last_bar = (np.nan, np.nan, np.nan)     # (close, sma_fast, sma_slow)
+        self.closed = []
+
+    def update(self, chunk):
+        """Procesa un bloque (columnas 'nasdaq', 'sma_fast', 'sma_slow', 'nasdaq_atr' y, si existe, 'high_nasdaq')."""
+        close = chunk['nasdaq'].to_numpy(dtype=float)
+        sma_fast = chunk['sma_fast'].to_numpy(dtype=float)
+        sma_slow = chunk['sma_slow'].to_numpy(dtype=float)
+        nasdaq_atr = chunk['nasdaq_atr'].to_numpy(dtype=float)
+        stop_levels = close + (self.atr_multiplier * nasdaq_atr)
+        high = chunk['high_nasdaq'].to_numpy(dtype=float) if 'high_nasdaq' in chunk.columns else None
+        bar_open = (open_prices(chunk, self.execution.open_col) if self.execution.gap_fills
+                    else np.full(len(close), np.nan))
+
+        # Cruces con la última barra del bloque anterior delante
+        last_close, last_fast, last_slow = self.last_bar
+        entry_mask = cross_below(np.append(last_close, close), np.append(last_slow, sma_slow))[1:]
+        exit_mask = cross_above(np.append(last_fast, sma_fast), np.append(last_slow, sma_slow))[1:]
+
+        c0 = self.trades.n_bars
+        closed = self.trades.update(entry_mask, stop_levels, high, exit_mask=exit_mask, carry=(close, nasdaq_atr))
+        for entry_idx, x, stop, stop_hit, (entry_price, entry_atr) in closed:
+            x_local = x - c0
+            self.closed.append((entry_idx, x, entry_price, stop if stop_hit else close[x_local],
+                                STOP if stop_hit else SIGNAL, entry_atr, nasdaq_atr[x_local], bar_open[x_local]))
+
+        if len(close):
+            self.last_bar = (close[-1], sma_fast[-1], sma_slow[-1])
+        return self
+
+    def finish(self):
+        """Aplica el modelo de ejecución a las operaciones cerradas y devuelve el TradeLedger."""
+        append_filled(self.ledger, HEDGE_SHORT_EMA, self.closed, self.execution)
+        self.closed = []
+        return self.ledger
+
+
+def generate_ema_short_hedging_signals(df, atr_multiplier=0.5, execution=None):
+    """
+    Como `ema_short_hedging_ledger`, pero devuelve el DataFrame de operaciones `hedge_*`
+    (entradas/salidas y beneficios).
+    """
+    return hedge_trades_frame(ema_short_hedging_ledger(df, atr_multiplier=atr_multiplier, execution=execution),
+                              return_decimals=4)
@@ -6,8 +6,243 @@ import numpy as np
 import plotly.graph_objects as go
 import os
 import webbrowser
+from strat_OM.signal_engine import LevelIndex, next_true
+from strat_OM.trade_ledger import TradeLedger, VIX_LONG, OPEN, STOP_FIXED, STOP_TRAIL, OUTCOME_NAMES
+from strat_OM.execution import DEFAULT_EXECUTION, append_filled, apply_execution, open_prices
 
-def strat_vix_entry_from_tops(df, tops_df):
+
+def simulate_vix_long_ledger(df, tops_df, atr_factor=3, ledger=None, execution=None):
+    """
+    Simula las operaciones largas abiertas en cada confirmación de techo del VIX.
+
+    Gestión de salida en dos fases:
+    1. Stop fijo a `atr_factor` ATR por debajo de la entrada.
+    2. En cuanto un cierre supera el ATR trailing stop, se pasa a seguir ese
+       trailing stop a partir de la barra siguiente.
+
+    Cada salida se localiza como "primer índice donde low < nivel" sobre arrays
+    precalculados, sin recorrer las barras una a una con pandas.
+
+    Args:
+        ledger: TradeLedger donde añadir las operaciones (si no, se crea uno).
+        execution: ExecutionModel con los llenados y costes (por defecto, sin costes: al nivel del stop).
+
+    Returns:
+        TradeLedger: Las operaciones con strategy = VIX_LONG.
+    """
+    required_cols = ['nasdaq', 'high_nasdaq', 'low_nasdaq', 'atr_trailing_stop', 'nasdaq_atr']
+    if not all(col in df.columns for col in required_cols):
+        raise ValueError(f"DataFrame is missing required columns. Ensure it has: {required_cols}")
+    if ledger is None:
+        ledger = TradeLedger(dates=df.index, capacity=len(tops_df) if tops_df is not None else 1)
+    if tops_df is None or tops_df.empty:
+        return ledger
+
+    close = df['nasdaq'].to_numpy(dtype=float)
+    low = df['low_nasdaq'].to_numpy(dtype=float)
+    trail = df['atr_trailing_stop'].to_numpy(dtype=float)
+    nasdaq_atr = df['nasdaq_atr'].to_numpy(dtype=float)
+    n = len(df)
+
+    # Índices de eventos independientes de cada operación
+    with np.errstate(invalid='ignore'):
+        next_switch = next_true(close > trail)   # cierre por encima del trailing -> fase 2
+        next_trail_hit = next_true(low < trail)  # mínimo por debajo del trailing -> salida
+    low_index = LevelIndex(low)
+
+    entry_pos = df.index.get_indexer(pd.to_datetime(tops_df['top_confirm']))
+    start = len(ledger)
+
+    for e in entry_pos:
+        if e < 0 or np.isnan(nasdaq_atr[e]):
+            continue
+        entry_price = close[e]
+        fixed_stop = entry_price - (atr_factor * nasdaq_atr[e])
+
+        # Fase 1: el stop fijo vigila hasta (incluida) la barra que activa el trailing
+        switch = next_switch[e + 1]
+        fixed_hit = low_index.first(e + 1, min(switch + 1, n), fixed_stop)
+        if fixed_hit >= 0:
+            outcome, exit_price, x = STOP_FIXED, fixed_stop, fixed_hit
+        elif switch < n and next_trail_hit[switch + 1] < n:
+            # Fase 2: trailing stop desde la barra siguiente al cambio
+            x = next_trail_hit[switch + 1]
+            outcome, exit_price = STOP_TRAIL, trail[x]
+        else:
+            outcome = OPEN
+            x = n - 1 if e < n - 1 else e
+            exit_price = close[x]
+
+        # El beneficio lo calcula el modelo de ejecución, sobre todas las operaciones a la vez
+        ledger.append(VIX_LONG, e, x, entry_price, exit_price, outcome, 0.0)
+    return apply_execution(ledger, df, execution, start)
+
+
+class VixLongTracker:
+    """
+    `simulate_vix_long_ledger` por bloques de barras (historias que no caben en memoria).
+
+    Guarda las operaciones abiertas entre bloques: barra y precio de entrada, stop fijo,
+    fase (1 = stop fijo, 2 = trailing) y la barra desde la que seguir buscando la salida.
+    En cada bloque las salidas se buscan con los mismos índices que la versión por lotes,
+    así que el resultado es el mismo cortando los datos por donde sea. `finish()` cierra
+    al precio de la última barra las operaciones que sigan abiertas.
+
+    Los llenados y el beneficio los calcula `execution` en `finish()`, como en la versión por
+    lotes. Como la historia no se guarda, cada operación lleva consigo el ATR de sus barras de
+    entrada y salida y la apertura de la de salida (ver `ExecutionModel.fill`); con
+    `gap_fills` los bloques deben traer la columna de apertura.
+    """
+
+    def __init__(self, atr_factor=3, ledger=None, dates=None, execution=None):
+        self.atr_factor = atr_factor
+        self.execution = execution or DEFAULT_EXECUTION
+        self.ledger = ledger if ledger is not None else TradeLedger(dates=dates)
+        self.open_trades = []          # [entry_idx, entry_price, fixed_stop, phase, next_bar, entry_atr]
+        self.closed = []
+        self.n_bars = 0
+        self.last_close = self.last_atr = self.last_open = np.nan
+
+    def update(self, chunk, entries=()):
+        """
+        Procesa un bloque (columnas 'nasdaq', 'low_nasdaq', 'atr_trailing_stop', 'nasdaq_atr'
+        y, si el modelo de ejecución tiene `gap_fills`, la de apertura).
+
+        Args:
+            entries: posiciones dentro del bloque de las barras de entrada (confirmación del techo).
+        """
+        close = chunk['nasdaq'].to_numpy(dtype=float)
+        low = chunk['low_nasdaq'].to_numpy(dtype=float)
+        trail = chunk['atr_trailing_stop'].to_numpy(dtype=float)
+        nasdaq_atr = chunk['nasdaq_atr'].to_numpy(dtype=float)
+        bar_open = (open_prices(chunk, self.execution.open_col) if self.execution.gap_fills
+                    else np.full(len(close), np.nan))
+        n, c0 = len(close), self.n_bars
+
+        for e in entries:
+            if e < 0 or np.isnan(nasdaq_atr[e]):
+                continue
+            self.open_trades.append([c0 + e, close[e], close[e] - (self.atr_factor * nasdaq_atr[e]), 1, c0 + e + 1,
+                                     nasdaq_atr[e]])
+
+        with np.errstate(invalid='ignore'):
+            next_switch = next_true(close > trail)
+            next_trail_hit = next_true(low < trail)
+        low_index = LevelIndex(low)
+
+        still_open = []
+        for trade in self.open_trades:
+            entry_idx, entry_price, fixed_stop, phase, start, entry_atr = trade
+            s = start - c0
+            if phase == 1 and s < n:
+                switch = next_switch[s]
+                fixed_hit = low_index.first(s, min(switch + 1, n), fixed_stop)
+                if fixed_hit >= 0:
+                    self.closed.append((entry_idx, c0 + fixed_hit, entry_price, fixed_stop, STOP_FIXED,
+                                        entry_atr, nasdaq_atr[fixed_hit], bar_open[fixed_hit]))
+                    continue
+                if switch < n:
+                    phase, s = 2, switch + 1
+            if phase == 2 and s < n:
+                x = next_trail_hit[s]
+                if x < n:
+                    self.closed.append((entry_idx, c0 + x, entry_price, trail[x], STOP_TRAIL,
+                                        entry_atr, nasdaq_atr[x], bar_open[x]))
+                    continue
+            trade[3], trade[4] = phase, c0 + n
+            still_open.append(trade)
+        self.open_trades = still_open
+
+        self.n_bars += n
+        if n:
+            self.last_close, self.last_atr, self.last_open = close[-1], nasdaq_atr[-1], bar_open[-1]
+        return self
+
+    def on_bar(self, close, low, trail, nasdaq_atr, entry=False, bar_open=np.nan):
+        """
+        Una sola barra con escalares (modo en vivo): mismo resultado que `update()` con un
+        bloque de una barra, sin arrays ni índices.
+
+        Args:
+            entry: True si la barra confirma un techo (se compra a su cierre).
+            bar_open: apertura de la barra (sólo la usa un modelo de ejecución con `gap_fills`;
+                NaN = sin gap).
+
+        Returns:
+            tuple: (operación abierta en esta barra o None, lista de operaciones cerradas
+            como (entry_idx, exit_idx, entry_price, exit_price, outcome, entry_atr, exit_atr,
+            exit_open)). Los precios son los niveles del simulador, antes del modelo de ejecución.
+        """
+        i = self.n_bars
+        closed, still_open = [], []
+        for trade in self.open_trades:
+            entry_idx, entry_price, fixed_stop, phase, _, entry_atr = trade
+            if phase == 1:
+                if low < fixed_stop:
+                    closed.append((entry_idx, i, entry_price, fixed_stop, STOP_FIXED, entry_atr, nasdaq_atr, bar_open))
+                    continue
+                if close > trail:
+                    trade[3] = 2        # trailing desde la barra siguiente
+            elif low < trail:
+                closed.append((entry_idx, i, entry_price, trail, STOP_TRAIL, entry_atr, nasdaq_atr, bar_open))
+                continue
+            trade[4] = i + 1
+            still_open.append(trade)
+
+        opened = None
+        if entry and nasdaq_atr == nasdaq_atr:
+            opened = [i, close, close - (self.atr_factor * nasdaq_atr), 1, i + 1, nasdaq_atr]
+            still_open.append(opened)
+        self.open_trades = still_open
+        self.closed.extend(closed)
+        self.n_bars = i + 1
+        self.last_close, self.last_atr, self.last_open = close, nasdaq_atr, bar_open
+        return opened, closed
+
+    def finish(self):
+        """
+        Cierra las operaciones abiertas en la última barra, aplica el modelo de ejecución y
+        devuelve el TradeLedger (orden de entrada).
+        """
+        last = self.n_bars - 1
+        for entry_idx, entry_price, _, _, _, entry_atr in self.open_trades:
+            # Entrada en la última barra: se cierra en ella al precio de entrada
+            exit_price = self.last_close if entry_idx < last else entry_price
+            self.closed.append((entry_idx, last, entry_price, exit_price, OPEN, entry_atr, self.last_atr, self.last_open))
+        self.open_trades = []
+
+        append_filled(self.ledger, VIX_LONG, sorted(self.closed, key=lambda t: t[0]), self.execution)
+        self.closed = []
+        return self.ledger
+
+
+def vix_long_trades_frame(ledger):
+    """Convierte el registro de la estrategia principal al DataFrame de operaciones de siempre."""
+    if not len(ledger):
+        return pd.DataFrame()
+    trades = ledger.trades
+    entry_price, exit_price = trades['entry_price'], trades['exit_price']
+    profit_points = exit_price - entry_price
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return_pct = np.where(entry_price != 0, (exit_price - entry_price) / entry_price, 0)
+    return pd.DataFrame({
+        'entry_date': ledger.entry_dates(), 'entry_price': np.round(entry_price, 2),
+        'exit_date': ledger.exit_dates(), 'exit_price': np.round(exit_price, 2),
+        'outcome': np.asarray(OUTCOME_NAMES, dtype=object)[trades['outcome']],
+        'profit_points': np.round(profit_points, 2),
+        'profit_usd': np.round(trades['pnl'], 2), 'return_pct': return_pct
+    })
+
+
+def simulate_vix_long_trades(df, tops_df, atr_factor=3, execution=None):
+    """
+    Simula la estrategia principal y devuelve un DataFrame con una fila por operación
+    (entry/exit, outcome, profit, return_pct). Ver `simulate_vix_long_ledger`.
+    """
+    return vix_long_trades_frame(simulate_vix_long_ledger(df, tops_df, atr_factor=atr_factor, execution=execution))
+
+
+def strat_vix_entry_from_tops(df, tops_df, atr_factor=3, execution=None):
     """
     Executes the trading strategy and generates TWO performance charts:
     1. Absolute cumulative profit in USD.
@@ -15,50 +250,17 @@ def strat_vix_entry_from_tops(df, tops_df):
        benchmark synced to the strategy's performance level at a fixed date.
     """
 
-    atr_factor = 3
-    df = df.copy()
+    # --- Input Validation and Trade Simulation ---
+    result_df = simulate_vix_long_trades(df, tops_df, atr_factor=atr_factor, execution=execution)
+    return report_vix_long_trades(df, result_df)
 
-    # --- Input Validation and Trade Simulation (This logic is correct and final) ---
-    required_cols = ['nasdaq', 'high_nasdaq', 'low_nasdaq', 'atr_trailing_stop', 'nasdaq_atr']
-    if not all(col in df.columns for col in required_cols):
-        raise ValueError(f"DataFrame is missing required columns. Ensure it has: {required_cols}")
-    records = []
-    for _, top_row in tops_df.iterrows():
-        date_entry = pd.to_datetime(top_row['top_confirm'])
-        if date_entry not in df.index or pd.isna(df.loc[date_entry, 'nasdaq_atr']):
-            continue
-        entry_price = df.loc[date_entry, 'nasdaq']
-        initial_nasdaq_atr = df.loc[date_entry, 'nasdaq_atr']
-        fixed_stop = entry_price - (atr_factor * initial_nasdaq_atr)
-        use_trailing_stop = False
-        outcome, exit_price, exit_date = 'open', None, None
-        trade_window = df.loc[date_entry:].iloc[1:]
-        for future_date, future_row in trade_window.iterrows():
-            current_low, current_close = future_row['low_nasdaq'], future_row['nasdaq']
-            dynamic_stop_level = future_row['atr_trailing_stop']
-            if use_trailing_stop:
-                if current_low < dynamic_stop_level:
-                    outcome, exit_price, exit_date = 'stop_trail', dynamic_stop_level, future_date
-                    break
-            else:
-                if current_low < fixed_stop:
-                    outcome, exit_price, exit_date = 'stop_fixed', fixed_stop, future_date
-                    break
-            if not use_trailing_stop and pd.notna(dynamic_stop_level) and current_close > dynamic_stop_level:
-                use_trailing_stop = True
-        if outcome == 'open':
-            exit_date = trade_window.index[-1] if not trade_window.empty else date_entry
-            exit_price = trade_window['nasdaq'][-1] if not trade_window.empty else entry_price
-        profit_points = exit_price - entry_price
-        profit_usd = profit_points * 50
-        return_pct = (exit_price - entry_price) / entry_price if entry_price != 0 else 0
-        records.append({
-            'entry_date': date_entry, 'entry_price': round(entry_price, 2),
-            'exit_date': exit_date, 'exit_price': round(exit_price, 2),
-            'outcome': outcome, 'profit_points': round(profit_points, 2), 
-            'profit_usd': round(profit_usd, 2), 'return_pct': return_pct
-        })
-    result_df = pd.DataFrame(records)
+
+def report_vix_long_trades(df, result_df):
+    """
+    Reporting for an already simulated trade log: equity columns, console summary,
+    the two equity charts and the CSV in 'outputs/'. Returns `result_df` with the
+    'equity_usd' and 'equity_pct' columns added.
+    """
     if result_df.empty:
         print("No trades were generated. No performance charts to display.")
         return result_df
@@ -69,7 +271,7 @@ def strat_vix_entry_from_tops(df, tops_df):
     
     # Benchmark 1: Starts on the same day as the first trade
     start_date = result_df['entry_date'].min()
-    benchmark_df = df[df.index >= start_date].copy()
+    benchmark_df = df.loc[df.index >= start_date, ['nasdaq']]
     initial_nasdaq_price = benchmark_df['nasdaq'].iloc[0]
     benchmark_df['benchmark_return_pct'] = (benchmark_df['nasdaq'] - initial_nasdaq_price) / initial_nasdaq_price
 
@@ -77,7 +279,7 @@ def strat_vix_entry_from_tops(df, tops_df):
     # === NEW: Calculate Benchmark 2, synced to the strategy's level in 2022 ===
     # =========================================================================
     fixed_start_date = pd.to_datetime('2022-01-01')
-    benchmark_2022_df = df[df.index >= fixed_start_date].copy()
+    benchmark_2022_df = df.loc[df.index >= fixed_start_date, ['nasdaq']]
     if not benchmark_2022_df.empty:
         # Step 1: Find the strategy's return level on the benchmark start date
         strategy_at_benchmark_start_df = result_df[result_df['exit_date'] <= fixed_start_date]
@@ -3,6 +3,7 @@
 # COMBINA TODAS LAS ESTRATEGIAS (LONG + HEDGING CROSS + HEDGING EMA)
 # en realidad no es una estratagia de cobertura, sino que hace un join o unión de todas las que están activaas
 import pandas as pd
+from strat_OM.trade_ledger import merge_ledgers
 
 def strats_outputs_join(df_long: pd.DataFrame, df_cross: pd.DataFrame, df_ema: pd.DataFrame) -> pd.DataFrame:
     """
@@ -63,3 +64,15 @@ def strats_outputs_join(df_long: pd.DataFrame, df_cross: pd.DataFrame, df_ema: p
         return pd.DataFrame()
 
     return combined.sort_values(by='entry_date').reset_index(drop=True)
+
+
+def join_ledgers(*ledgers) -> pd.DataFrame:
+    """
+    Igual que `strats_outputs_join` pero a partir de los TradeLedger de cada estrategia:
+    una concatenación de arrays y un orden por barra de entrada, sin copias ni renombrados.
+    """
+    combined = merge_ledgers(*ledgers)
+    if not len(combined):
+        print("\nNo hay operaciones en ninguna de las estrategias para combinar.")
+        return pd.DataFrame()
+    return combined.to_frame()
@@ -0,0 +1,154 @@
+# FILE: strat_OM/trade_ledger.py
+# Registro de operaciones columnar y compartido por todas las estrategias.
+#
+# En lugar de listas de dicts + pd.DataFrame(records), cada simulador escribe en un
+# array estructurado de NumPy preasignado (44 bytes por operación). Las fechas no se
+# guardan: se guardan las posiciones de las barras y se traducen con el índice del
+# DataFrame sólo al convertir a DataFrame.
+
+import numpy as np
+import pandas as pd
+
+# Estrategias (strategy_id -> nombre usado en los CSV combinados)
+VIX_LONG, HEDGE_SHORT_CROSS, HEDGE_SHORT_EMA = 0, 1, 2
+STRATEGY_NAMES = ('VIX_Long', 'Hedge_Short_Cross', 'Hedge_Short_EMA')
+STRATEGY_DIRECTION = (1, -1, -1)   # +1 largo, -1 corto
+
+# Resultado de la operación
+OPEN, STOP_FIXED, STOP_TRAIL, STOP, SIGNAL = 0, 1, 2, 3, 4
+OUTCOME_NAMES = ('open', 'stop_fixed', 'stop_trail', 'stop', 'signal')
+
+LEDGER_DTYPE = np.dtype([
+    ('strategy', np.uint8),
+    ('outcome', np.uint8),
+    ('instrument', np.uint16),    # posición en `TradeLedger.instruments` (0 con un solo activo)
+    ('entry_idx', np.int64),
+    ('exit_idx', np.int64),
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('pnl', np.float64),          # beneficio en USD sin redondear
+], align=False)
+
+
+class TradeLedger:
+    """
+    Registro de operaciones de esquema fijo respaldado por un array estructurado.
+
+    Args:
+        dates: índice de fechas de las barras a las que apuntan entry_idx/exit_idx.
+        capacity: operaciones preasignadas (crece al doble si hace falta).
+        instruments: nombres de los activos (universo multi-activo); None con un solo activo.
+    """
+
+    def __init__(self, dates=None, capacity=64, instruments=None):
+        self.dates = dates
+        self.instruments = tuple(instruments) if instruments is not None else None
+        self._data = np.empty(max(capacity, 1), dtype=LEDGER_DTYPE)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def trades(self):
+        """Vista (sin copia) de las operaciones registradas."""
+        return self._data[:self._size]
+
+    def __getitem__(self, field):
+        return self.trades[field]
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data)), dtype=LEDGER_DTYPE)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+
+    def append(self, strategy, entry_idx, exit_idx, entry_price, exit_price, outcome, pnl, instrument=0):
+        """Añade una operación (escritura directa en el array, sin dicts)."""
+        self._reserve(1)
+        self._data[self._size] = (strategy, outcome, instrument, entry_idx, exit_idx, entry_price, exit_price, pnl)
+        self._size += 1
+
+    def extend(self, strategy, entry_idx, exit_idx, entry_price, exit_price, outcome, pnl, instrument=0):
+        """Añade un bloque de operaciones a partir de arrays (o escalares que se difunden)."""
+        n = len(entry_idx)
+        self._reserve(n)
+        block = self._data[self._size:self._size + n]
+        block['strategy'] = strategy
+        block['outcome'] = outcome
+        block['instrument'] = instrument
+        block['entry_idx'] = entry_idx
+        block['exit_idx'] = exit_idx
+        block['entry_price'] = entry_price
+        block['exit_price'] = exit_price
+        block['pnl'] = pnl
+        self._size += n
+
+    @classmethod
+    def from_trades(cls, trades, dates=None, instruments=None):
+        ledger = cls(dates=dates, capacity=len(trades), instruments=instruments)
+        ledger._data[:len(trades)] = trades
+        ledger._size = len(trades)
+        return ledger
+
+    def entry_dates(self):
+        return self.dates[self['entry_idx']]
+
+    def exit_dates(self):
+        return self.dates[self['exit_idx']]
+
+    def to_frame(self):
+        """Formato combinado de `strats_outputs_join` (con columna 'instrument' en un universo)."""
+        trades = self.trades
+        frame = pd.DataFrame({
+            'strategy_type': np.asarray(STRATEGY_NAMES, dtype=object)[trades['strategy']],
+            'entry_date': self.entry_dates(),
+            'exit_date': self.exit_dates(),
+            'entry_price': np.round(trades['entry_price'], 2),
+            'exit_price': np.round(trades['exit_price'], 2),
+            'profit_usd': np.round(trades['pnl'], 2),
+        })
+        if self.instruments is not None:
+            frame.insert(0, 'instrument', np.asarray(self.instruments, dtype=object)[trades['instrument']])
+        return frame
+
+
+def hedge_trades_frame(ledger, return_decimals=None):
+    """
+    DataFrame `hedge_*` de las estrategias de cobertura (cortos) a partir de su registro.
+
+    Args:
+        return_decimals: decimales de `hedge_return_pct` (None = sin redondear).
+    """
+    if not len(ledger):
+        return pd.DataFrame()
+    trades = ledger.trades
+    entry_price, exit_price = trades['entry_price'], trades['exit_price']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return_pct = np.where(entry_price != 0, (entry_price - exit_price) / entry_price, 0)
+    return pd.DataFrame({
+        'hedge_entry_date': ledger.entry_dates(),
+        'hedge_entry_price': np.round(entry_price, 2),
+        'hedge_exit_date': ledger.exit_dates(),
+        'hedge_exit_price': np.round(exit_price, 2),
+        'hedge_profit_usd': np.round(trades['pnl'], 2),
+        'hedge_return_pct': return_pct if return_decimals is None else np.round(return_pct, return_decimals)
+    })
+
+
+def merge_ledgers(*ledgers):
+    """
+    Une varios registros en uno ordenado por barra de entrada.
+
+    Una concatenación de los arrays y un orden estable por `entry_idx` (mergesort):
+    ante la misma barra se respeta el orden de los registros de entrada.
+    """
+    ledgers = [ledger for ledger in ledgers if ledger is not None]
+    dates = next((ledger.dates for ledger in ledgers if ledger.dates is not None), None)
+    instruments = next((ledger.instruments for ledger in ledgers if ledger.instruments is not None), None)
+    if not ledgers:
+        return TradeLedger(dates=dates, capacity=1, instruments=instruments)
+    trades = np.concatenate([ledger.trades for ledger in ledgers])
+    order = np.argsort(trades['entry_idx'], kind='mergesort')
+    return TradeLedger.from_trades(trades[order], dates=dates, instruments=instruments)
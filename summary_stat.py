@@ -1,11 +1,25 @@
 # FILE: summary_stat.py
+# Ratios de rendimiento (Sharpe, Sortino, Calmar, max DD...) de uno o muchos registros de
+# operaciones. Importable y con CLI: sin input() ni navegador salvo que se pida.
+#
+# Uso:
+#   python summary_stat.py                                   # outputs/combined_trades_log.csv
+#   python summary_stat.py outputs/tracking_record_VIX_ONLY_long.csv --charts
+#   python summary_stat.py outputs/sweep_trades/ --workers 8 --output outputs/summary_metrics.csv
+#   python summary_stat.py --monte-carlo 100000 --mc-method shuffle   # bandas de confianza
+
+import os
+import sys
+import glob
+import argparse
+import webbrowser
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 import numpy as np
 import plotly.graph_objs as go
-import os
-import webbrowser
-import empyrical as emp
+from quant_stat.metrics import performance_metrics
+from quant_stat.monte_carlo import MC_METHODS, monte_carlo
 
 initial_capital = 10000
 
@@ -13,138 +27,275 @@ initial_capital = 10000
 hedged_csv = "outputs/combined_trades_log.csv"       # contiene VIX + cobertura
 long_only_csv = "outputs/tracking_record_VIX_ONLY_long.csv"  # solo estrategia VIX
 
-# -------- MENÚ --------
-print("\n\U0001f4ca Selecciona el archivo de estrategia que deseas analizar:")
-print("1. Estrategia VIX (sin cobertura)")
-print("2. Estrategia VIX + Hedging (combinada) [default]")
-choice = input("Introduce 1 o 2 y pulsa ENTER (por defecto 2): ").strip()
-
-if choice == "":
-    choice = "2"
-
-# -------- LÓGICA --------
-if choice == "1":
-    if os.path.exists(long_only_csv):
-        input_csv = long_only_csv
-        chart_label = " - No Hedging"
-        print(f"\n✅ Usando solo la estrategia VIX: {input_csv}")
+output_html_equity = "charts/equity_tracking_curve.html"
+output_html_drawdown = "charts/drawdown_curve.html"
+output_mc_summary = "outputs/monte_carlo_summary.csv"
+output_mc_bands = "outputs/monte_carlo_equity_bands.csv"
+
+REQUIRED_COLUMNS = ('exit_date', 'profit_usd')
+
+
+# ====================================================
+# 📥 CARGA
+# ====================================================
+def is_trade_log(path):
+    """True si el CSV tiene las columnas de un registro de operaciones."""
+    try:
+        columns = pd.read_csv(path, nrows=0).columns
+    except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError):
+        return False
+    return all(col in columns for col in REQUIRED_COLUMNS)
+
+
+def find_trade_logs(paths):
+    """Expande ficheros y directorios (p. ej. la salida de un barrido) a la lista de registros CSV."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(p for p in sorted(glob.glob(os.path.join(path, '**', '*.csv'), recursive=True))
+                         if is_trade_log(p))
+        elif os.path.exists(path):
+            found.append(path)
+        else:
+            raise FileNotFoundError(f"❌ No se encontró: {path}")
+    return found
+
+
+def load_trade_log(path):
+    trades = pd.read_csv(path, parse_dates=["entry_date", "exit_date"])
+    missing = [col for col in REQUIRED_COLUMNS if col not in trades.columns]
+    if missing:
+        raise ValueError(f"❌ '{path}' no es un registro de operaciones (faltan {missing})")
+    return trades.sort_values("exit_date")
+
+
+# ====================================================
+# 🧮 RATIOS
+# ====================================================
+def equity_curve_daily(trades, initial_capital=initial_capital):
+    """Equity acumulada en la fecha de salida, un valor por día natural (forward fill)."""
+    if 'equity_usd' in trades.columns:
+        equity_curve = pd.Series(trades['equity_usd'].values + initial_capital, index=trades['exit_date'])
+    else:
+        equity_curve = pd.Series(trades['profit_usd'].cumsum().values + initial_capital, index=trades['exit_date'])
+
+    # Remove duplicates and forward fill
+    daily = equity_curve.groupby(equity_curve.index.date).last()
+    daily.index = pd.to_datetime(daily.index)
+    return daily.asfreq("D").ffill()
+
+
+def compute_ratios(trades, initial_capital=initial_capital):
+    """Tabla de ratios de un registro de operaciones (dict nombre -> valor)."""
+    equity = equity_curve_daily(trades, initial_capital)
+    returns = equity.pct_change().dropna()
+    profit = trades['profit_usd']
+    perf = performance_metrics(returns.to_numpy())
+    return {
+        "Total Profit ($)": profit.sum(),
+        "Total Return (%)": (equity.iloc[-1] / equity.iloc[0] - 1) * 100,
+        "Tasa Interés Compuesto (%)": perf['annual_return'] * 100,
+        "Sharpe Ratio": perf['sharpe_ratio'],
+        "Sortino Ratio": perf['sortino_ratio'],
+        "Calmar Ratio": perf['calmar_ratio'],
+        "Max Drawdown (%)": perf['max_drawdown'] * 100,
+        "Volatility (%)": perf['annual_volatility'] * 100,
+        "Win Rate (%)": (profit > 0).sum() / len(trades) * 100,
+        "Avg Win ($)": profit[profit > 0].mean(),
+        "Avg Loss ($)": profit[profit < 0].mean(),
+        "Expectancy ($)": profit.mean(),
+        "Number of Trades": len(trades)
+    }
+
+
+def _analyze_file(path, initial_capital=initial_capital):
+    """Tarea de un proceso hijo: ratios de un fichero (o el error, sin tumbar el resto)."""
+    try:
+        trades = load_trade_log(path)
+        if trades.empty:
+            return {'file': path, 'error': 'sin operaciones'}
+        return {'file': path, **compute_ratios(trades, initial_capital)}
+    except Exception as exc:
+        return {'file': path, 'error': str(exc)}
+
+
+def summarize_trade_logs(paths, max_workers=None, initial_capital=initial_capital, output_path=None):
+    """
+    Ratios de todos los registros de `paths` (ficheros o directorios) en paralelo.
+
+    Args:
+        paths: ficheros CSV y/o directorios (se buscan los CSV con exit_date y profit_usd).
+        max_workers: procesos hijos (por defecto, todos los núcleos; 1 = en este proceso).
+        output_path: CSV con la tabla consolidada (None para no guardar).
+
+    Returns:
+        pd.DataFrame: Una fila por registro, indexada por fichero.
+    """
+    files = find_trade_logs(paths)
+    if not files:
+        raise FileNotFoundError(f"❌ No hay registros de operaciones en: {list(paths)}")
+
+    workers = min(max_workers or os.cpu_count(), len(files))
+    if workers <= 1:
+        rows = [_analyze_file(path, initial_capital) for path in files]
     else:
-        raise FileNotFoundError(f"❌ No se encontró: {long_only_csv}")
-elif choice == "2":
-    if os.path.exists(hedged_csv):
-        input_csv = hedged_csv
-        chart_label = " - Hedging"
-        print(f"\n✅ Usando estrategia combinada (VIX + Hedging): {input_csv}")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_analyze_file, files, [initial_capital] * len(files),
+                                 chunksize=max(1, len(files) // (4 * workers))))
+
+    table = pd.DataFrame(rows).set_index('file')
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        table.to_csv(output_path)
+        print(f"💾 Tabla de métricas guardada en: '{output_path}'")
+    return table
+
+
+def print_ratios(ratios):
+    print("=========================================")
+    print("        \U0001f4ca RATIO SUMMARY:")
+    print("=========================================")
+    print(pd.DataFrame(ratios, index=["Metrics"]).T.round(2))
+    print("=========================================")
+
+
+def print_monte_carlo(result, n_samples, method):
+    print("=========================================")
+    print(f"   \U0001f3b2 MONTE CARLO ({n_samples:,} x {method}):")
+    print("=========================================")
+    print(result['summary'].round(2).to_string())
+    print("=========================================")
+
+
+def run_monte_carlo(trades, n_samples, method='bootstrap', initial_capital=initial_capital, seed=None):
+    """Monte Carlo de un registro (operaciones en orden de salida); guarda resumen y bandas en CSV."""
+    result = monte_carlo(trades['profit_usd'].to_numpy(), n_samples=n_samples, method=method,
+                         initial_capital=initial_capital, seed=seed)
+    os.makedirs(os.path.dirname(output_mc_summary), exist_ok=True)
+    result['summary'].to_csv(output_mc_summary)
+    result['equity_bands'].to_csv(output_mc_bands)
+    print_monte_carlo(result, n_samples, method)
+    print(f"💾 Monte Carlo guardado en: '{output_mc_summary}' y '{output_mc_bands}'")
+    return result
+
+
+# ====================================================
+# 📊 GRÁFICOS
+# ====================================================
+def plot_equity_and_drawdown(trades, chart_label='', initial_capital=initial_capital, open_browser=False):
+    """Curva de equity (verde/rojo respecto al capital inicial) y curva de drawdown en HTML."""
+    os.makedirs(os.path.dirname(output_html_equity), exist_ok=True)
+
+    # -------- EQUITY CURVE PLOT --------
+    summary = trades.assign(day=trades['exit_date'].dt.date).groupby('day').agg(pnl_sum=('profit_usd', 'sum')).reset_index()
+    summary['equity'] = summary['pnl_sum'].cumsum() + initial_capital
+    summary['equity_pos'] = summary['equity'].where(summary['equity'] >= initial_capital, np.nan)
+    summary['equity_neg'] = summary['equity'].where(summary['equity'] < initial_capital, np.nan)
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=summary['day'], y=summary['equity_pos'],
+        mode='lines', fill='tozeroy',
+        line=dict(color='rgba(46,204,113,1)', width=2),
+        fillcolor='rgba(46,204,113,0.3)', name='Equity +'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=summary['day'], y=summary['equity_neg'],
+        mode='lines', fill='tozeroy',
+        line=dict(color='rgba(231,76,60,1)', width=2),
+        fillcolor='rgba(231,76,60,0.3)', name='Equity -'
+    ))
+
+    fig.update_layout(
+        title=f'✅ Cumulative Equity Curve{chart_label}',
+        xaxis_title='Date',
+        yaxis_title='Equity ($)',
+        width=1400, height=800,
+        template='plotly_white',
+        font=dict(size=14),
+        margin=dict(l=30, r=30, t=60, b=30)
+    )
+
+    fig.write_html(output_html_equity, auto_open=False)
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(output_html_equity))
+    print(f"\n\U0001f4c8 Equity curve saved to: {output_html_equity}")
+
+    # -------- DRAWDOWN CHART --------
+    equity = equity_curve_daily(trades, initial_capital)
+    rolling_max = equity.cummax()
+    drawdown_pct = (equity - rolling_max) / rolling_max
+
+    fig_dd = go.Figure()
+    fig_dd.add_trace(go.Scatter(
+        x=drawdown_pct.index,
+        y=drawdown_pct * 100,
+        mode='lines',
+        fill='tozeroy',
+        line=dict(color='rgba(255,99,132,0.8)', width=2),
+        fillcolor='rgba(255,99,132,0.3)',
+        name='Drawdown (%)'
+    ))
+    fig_dd.update_layout(
+        title=f'\U0001f4c9 Drawdown Curve{chart_label}',
+        xaxis_title='Date',
+        yaxis_title='Drawdown (%)',
+        width=1400,
+        height=600,
+        template='plotly_white',
+        font=dict(size=14),
+        margin=dict(l=30, r=30, t=60, b=30)
+    )
+
+    fig_dd.write_html(output_html_drawdown, auto_open=False)
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(output_html_drawdown))
+    print(f"\n\U0001f4c9 Drawdown chart saved to: {output_html_drawdown}")
+    return fig, fig_dd
+
+
+# ====================================================
+# 🖥️ CLI
+# ====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ratios de rendimiento de uno o varios registros de operaciones.")
+    parser.add_argument('paths', nargs='*', default=[hedged_csv],
+                        help=f"CSV y/o directorios (por defecto {hedged_csv}; {long_only_csv} = sólo VIX)")
+    parser.add_argument('--workers', type=int, default=None, help="procesos hijos (por defecto, todos los núcleos)")
+    parser.add_argument('--capital', type=float, default=initial_capital)
+    parser.add_argument('--output', default='outputs/summary_metrics.csv')
+    parser.add_argument('--charts', action='store_true', help="gráficos de equity y drawdown (con un único registro)")
+    parser.add_argument('--open-browser', action='store_true')
+    parser.add_argument('--monte-carlo', type=int, default=0, metavar='N',
+                        help="N secuencias remuestreadas (con un único registro)")
+    parser.add_argument('--mc-method', choices=MC_METHODS, default='bootstrap')
+    parser.add_argument('--seed', type=int, default=None, help="semilla del Monte Carlo")
+    args = parser.parse_args(argv)
+
+    table = summarize_trade_logs(args.paths, max_workers=args.workers, initial_capital=args.capital,
+                                 output_path=args.output)
+    if len(table) == 1:
+        print_ratios(table.drop(columns='error', errors='ignore').iloc[0].to_dict())
     else:
-        raise FileNotFoundError(f"❌ No se encontró: {hedged_csv}")
-else:
-    raise ValueError("❌ Opcion inválida. Por favor ejecuta de nuevo y elige 1 o 2.")
+        print(table.round(2))
+
+    if args.charts:
+        if len(table) != 1:
+            parser.error("--charts requiere un único registro de operaciones")
+        path = table.index[0]
+        label = " - No Hedging" if os.path.basename(path) == os.path.basename(long_only_csv) else " - Hedging"
+        plot_equity_and_drawdown(load_trade_log(path), chart_label=label, initial_capital=args.capital,
+                                 open_browser=args.open_browser)
+
+    if args.monte_carlo:
+        if len(table) != 1:
+            parser.error("--monte-carlo requiere un único registro de operaciones")
+        run_monte_carlo(load_trade_log(table.index[0]), args.monte_carlo, args.mc_method,
+                        initial_capital=args.capital, seed=args.seed)
+    return 1 if 'error' in table.columns and table['error'].notna().all() else 0
 
-output_html_equity = "charts/equity_tracking_curve.html"
-output_html_drawdown = "charts/drawdown_curve.html"
 
-# -------- LOAD & PROCESS DATA --------
-df = pd.read_csv(input_csv, parse_dates=["entry_date", "exit_date"])
-df = df.sort_values("exit_date")
-
-# Cumulative equity curve
-if 'equity_usd' in df.columns:
-    equity_curve = pd.Series(df['equity_usd'].values + initial_capital, index=df['exit_date'])
-else:
-    equity_curve = pd.Series(df['profit_usd'].cumsum().values + initial_capital, index=df['exit_date'])
-
-# Remove duplicates and forward fill
-equity_curve_daily = equity_curve.groupby(equity_curve.index.date).last()
-equity_curve_daily.index = pd.to_datetime(equity_curve_daily.index)
-equity_curve_daily = equity_curve_daily.asfreq("D").ffill()
-total_profit = df['profit_usd'].sum()
-returns = equity_curve_daily.pct_change().dropna()
-
-# -------- RATIOS --------
-ratios = {
-    "Total Profit ($)": total_profit,
-    "Total Return (%)": (equity_curve_daily.iloc[-1] / equity_curve_daily.iloc[0] - 1) * 100,
-    "Tasa Interés Compuesto (%)": emp.annual_return(returns) * 100,
-    "Sharpe Ratio": emp.sharpe_ratio(returns),
-    "Sortino Ratio": emp.sortino_ratio(returns),
-    "Calmar Ratio": emp.calmar_ratio(returns),
-    "Max Drawdown (%)": emp.max_drawdown(returns) * 100,
-    "Volatility (%)": emp.annual_volatility(returns) * 100,
-    "Win Rate (%)": (df['profit_usd'] > 0).sum() / len(df) * 100,
-    "Avg Win ($)": df[df['profit_usd'] > 0]['profit_usd'].mean(),
-    "Avg Loss ($)": df[df['profit_usd'] < 0]['profit_usd'].mean(),
-    "Expectancy ($)": df['profit_usd'].mean(),
-    "Number of Trades": len(df)
-}
-
-print("=========================================")
-print("        \U0001f4ca RATIO SUMMARY:")
-print("=========================================")
-print(pd.DataFrame(ratios, index=["Metrics"]).T.round(2))
-print("=========================================")
-
-# -------- EQUITY CURVE PLOT --------
-df['day'] = df['exit_date'].dt.date
-summary = df.groupby('day').agg(pnl_sum=('profit_usd', 'sum')).reset_index()
-summary['equity'] = summary['pnl_sum'].cumsum() + initial_capital
-summary['equity_pos'] = summary['equity'].where(summary['equity'] >= initial_capital, np.nan)
-summary['equity_neg'] = summary['equity'].where(summary['equity'] < initial_capital, np.nan)
-
-fig = go.Figure()
-
-fig.add_trace(go.Scatter(
-    x=summary['day'], y=summary['equity_pos'],
-    mode='lines', fill='tozeroy',
-    line=dict(color='rgba(46,204,113,1)', width=2),
-    fillcolor='rgba(46,204,113,0.3)', name='Equity +'
-))
-
-fig.add_trace(go.Scatter(
-    x=summary['day'], y=summary['equity_neg'],
-    mode='lines', fill='tozeroy',
-    line=dict(color='rgba(231,76,60,1)', width=2),
-    fillcolor='rgba(231,76,60,0.3)', name='Equity -'
-))
-
-fig.update_layout(
-    title=f'✅ Cumulative Equity Curve{chart_label}',
-    xaxis_title='Date',
-    yaxis_title='Equity ($)',
-    width=1400, height=800,
-    template='plotly_white',
-    font=dict(size=14),
-    margin=dict(l=30, r=30, t=60, b=30)
-)
-
-fig.write_html(output_html_equity, auto_open=False)
-webbrowser.open('file://' + os.path.realpath(output_html_equity))
-print(f"\n\U0001f4c8 Equity curve saved to: {output_html_equity}")
-
-# -------- DRAWDOWN CHART --------
-rolling_max = equity_curve_daily.cummax()
-drawdown_pct = (equity_curve_daily - rolling_max) / rolling_max
-
-fig_dd = go.Figure()
-fig_dd.add_trace(go.Scatter(
-    x=drawdown_pct.index,
-    y=drawdown_pct * 100,
-    mode='lines',
-    fill='tozeroy',
-    line=dict(color='rgba(255,99,132,0.8)', width=2),
-    fillcolor='rgba(255,99,132,0.3)',
-    name='Drawdown (%)'
-))
-fig_dd.update_layout(
-    title=f'\U0001f4c9 Drawdown Curve{chart_label}',
-    xaxis_title='Date',
-    yaxis_title='Drawdown (%)',
-    width=1400,
-    height=600,
-    template='plotly_white',
-    font=dict(size=14),
-    margin=dict(l=30, r=30, t=60, b=30)
-)
-
-fig_dd.write_html(output_html_drawdown, auto_open=False)
-webbrowser.open('file://' + os.path.realpath(output_html_drawdown))
-print(f"\n\U0001f4c9 Drawdown chart saved to: {output_html_drawdown}")
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,307 @@
+# FILE: sweep.py
+# Barrido de parámetros: ejecuta todas las combinaciones de la rejilla en paralelo
+# y guarda una tabla con las métricas resumen de cada una.
+#
+# Los datos de mercado se cargan UNA vez y se comparten con los procesos hijos por
+# memoria compartida (sin serializar el DataFrame en cada tarea). El barrido va en dos fases
+# sobre el mismo pool:
+#   1. los indicadores de cada grupo de parámetros (n, f, s, atr_multiplier) se calculan una
+#      vez, en paralelo, y se escriben en un segundo bloque de memoria compartida,
+#   2. las combinaciones se reparten en bloques de tamaño fijo, sea cual sea el parámetro que
+#      varía, y cada bloque lee los indicadores de su grupo sin copiarlos.
+# Así el pool está lleno aunque sólo varíen window_top / factor_top / atr_factor.
+
+import os
+import io
+import itertools
+import warnings
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from quant_stat.find_vix_tops import find_vix_tops
+from quant_stat.indicators import compute_indicators, DERIVED_COLUMNS
+from strat_OM.strat_vix_long import simulate_vix_long_ledger
+from strat_OM.strat_hedging_cross import strat_hedging_cross_ledger
+from strat_OM.strat_hedging_ema import ema_short_hedging_ledger
+from strat_OM.trade_ledger import TradeLedger, OPEN, merge_ledgers
+from strat_OM.portfolio import mark_to_market
+from strat_OM.execution import DEFAULT_EXECUTION
+from quant_stat.metrics import performance_metrics, returns_from_equity
+warnings.filterwarnings("ignore")
+
+# -------- CONFIG --------
+PARAM_GRID = {
+    'n': [5],
+    'f': [40],
+    's': [200],
+    'atr_multiplier': [3.0, 3.5, 4.0],
+    'window_top': [10, 15, 20],
+    'factor_top': [1.1, 1.2, 1.3],
+    'atr_factor': [2, 3, 4],
+    'hedge_atr_multiplier': [0.5, 1.0],
+    'hedging_enabled': [False],
+    'hedging_slow_ema_enable': [True],
+}
+
+BASE_COLUMNS = ['open_nasdaq', 'nasdaq', 'high_nasdaq', 'low_nasdaq', 'nasdaq_volume_M', 'VIX']
+INDICATOR_PARAMS = ['n', 'f', 's', 'atr_multiplier']
+TOPS_COLUMNS = ['tag', 'index_top_pos', 'VIX_top', 'top_confirm']
+CHUNKS_PER_WORKER = 4          # bloques de combinaciones por proceso hijo (reparto de la carga)
+
+# Estado del proceso hijo: el DataFrame base montado sobre la memoria compartida
+_worker_df = None
+_worker_shm = []
+# ... los indicadores de todos los grupos (grupo, columna de DERIVED_COLUMNS, barra)
+_worker_groups = None
+# ... y, por grupo, el DataFrame con indicadores, los techos y las coberturas ya calculados
+_worker_memo = {}
+
+
+def _share_market_data(df, columns=BASE_COLUMNS):
+    """
+    Copia las columnas `columns` y las fechas a bloques de memoria compartida.
+    Devuelve los bloques (para liberarlos al final) y la descripción que necesitan los hijos.
+    """
+    columns = list(columns)
+    values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64).T)
+    dates = df.index.values.astype('datetime64[ns]').view(np.int64)
+
+    shm_values = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    shm_dates = shared_memory.SharedMemory(create=True, size=max(dates.nbytes, 1))
+    np.ndarray(values.shape, dtype=np.float64, buffer=shm_values.buf)[:] = values
+    np.ndarray(dates.shape, dtype=np.int64, buffer=shm_dates.buf)[:] = dates
+
+    spec = (shm_values.name, shm_dates.name, len(dates), columns)
+    return [shm_values, shm_dates], spec
+
+
+def _attach_market_data(spec):
+    """
+    Inicializador de cada proceso hijo: monta el DataFrame sobre la memoria compartida.
+    Lo deja en `_worker_df` y también lo devuelve (para otros inicializadores que lo reutilizan).
+    """
+    global _worker_df, _worker_shm
+    values_name, dates_name, n_bars, columns = spec
+    shm_values = shared_memory.SharedMemory(name=values_name)
+    shm_dates = shared_memory.SharedMemory(name=dates_name)
+    _worker_shm = [shm_values, shm_dates]
+
+    values = np.ndarray((len(columns), n_bars), dtype=np.float64, buffer=shm_values.buf)
+    dates = np.ndarray((n_bars,), dtype=np.int64, buffer=shm_dates.buf)
+    index = pd.DatetimeIndex(dates.view('datetime64[ns]'), name='date')
+    _worker_df = pd.DataFrame(dict(zip(columns, values)), index=index, copy=False)
+    return _worker_df
+
+
+def _attach_sweep(spec, groups_spec):
+    """Inicializador del barrido: datos de mercado y bloque de indicadores por grupo."""
+    global _worker_groups, _worker_memo
+    _attach_market_data(spec)
+    groups_name, n_groups, n_bars = groups_spec
+    shm_groups = shared_memory.SharedMemory(name=groups_name)
+    _worker_shm.append(shm_groups)
+    _worker_groups = np.ndarray((n_groups, len(DERIVED_COLUMNS), n_bars), dtype=np.float64, buffer=shm_groups.buf)
+    _worker_memo = {}
+
+
+def _compute_indicator_group(g, indicator_params):
+    """Fase 1: indicadores del grupo `g`, escritos en su hueco del bloque compartido."""
+    df = compute_indicators(_worker_df.copy(deep=False), **indicator_params)
+    for c, column in enumerate(DERIVED_COLUMNS):
+        _worker_groups[g, c] = df[column].to_numpy(dtype=np.float64)
+
+
+def _group_state(g):
+    """DataFrame con los indicadores del grupo `g` (vistas de la memoria compartida) y sus memos."""
+    if g not in _worker_memo:
+        data = {column: _worker_df[column].to_numpy() for column in _worker_df.columns}
+        data.update(zip(DERIVED_COLUMNS, _worker_groups[g]))
+        frame = pd.DataFrame(data, index=_worker_df.index, copy=False)
+        _worker_memo[g] = {'df': frame, 'tops': {}, 'hedges': ({}, {})}
+    return _worker_memo[g]
+
+
+def _evaluate_chunk(g, combos, trade_log_dir=None, execution=None):
+    """
+    Fase 2: un bloque de combinaciones del grupo `g`. Los techos y las coberturas quedan
+    memorizados en el proceso hijo para los siguientes bloques del mismo grupo.
+    """
+    state = _group_state(g)
+    return _evaluate_combos(state['df'], combos, state['tops'], trade_log_dir, execution, state['hedges'])
+
+
+def _max_drawdown_usd(ledger):
+    """Máximo drawdown (USD) de la curva de beneficio acumulado ordenada por fecha de salida."""
+    if not len(ledger):
+        return 0.0
+    order = np.argsort(ledger['exit_idx'], kind='mergesort')
+    equity = np.cumsum(np.round(ledger['pnl'][order], 2))
+    return float((equity - np.maximum.accumulate(np.maximum(equity, 0.0))).min())
+
+
+def _summary_metrics(long_ledger, cross_ledger, ema_ledger):
+    """Métricas resumen de una combinación de parámetros (directamente sobre los TradeLedger)."""
+    long_usd = np.round(long_ledger['pnl'], 2)
+    closed_usd = long_usd[long_ledger['outcome'] != OPEN]
+    combined = merge_ledgers(long_ledger, cross_ledger, ema_ledger)
+    return {
+        'long_trades': len(long_ledger),
+        'long_closed': len(closed_usd),
+        'long_winrate_pct': (closed_usd > 0).sum() / len(closed_usd) * 100 if len(closed_usd) else np.nan,
+        'long_profit_usd': long_usd.sum(),
+        'hedge_cross_trades': len(cross_ledger),
+        'hedge_cross_profit_usd': np.round(cross_ledger['pnl'], 2).sum(),
+        'hedge_ema_trades': len(ema_ledger),
+        'hedge_ema_profit_usd': np.round(ema_ledger['pnl'], 2).sum(),
+        'total_trades': len(combined),
+        'total_profit_usd': np.round(combined['pnl'], 2).sum(),
+        'max_drawdown_usd': _max_drawdown_usd(combined),
+    }
+
+
+def _trade_log_name(params):
+    """Nombre de fichero del registro combinado de una combinación."""
+    return 'trades_' + '_'.join(f"{key}={value}" for key, value in params.items()) + '.csv'
+
+
+def _simulate_combo(df, params, tops_df, cross_cache, ema_cache, execution=None):
+    """
+    Las tres estrategias de una combinación sobre `df`: (largos, cobertura cruce, cobertura EMA).
+    Las coberturas no dependen de los techos y se memorizan en `cross_cache` / `ema_cache`
+    (diccionarios del llamante, válidos mientras `df` y `execution` sean los mismos).
+    """
+    result = simulate_vix_long_ledger(df, tops_df, atr_factor=params['atr_factor'], execution=execution)
+
+    hedge_cross = TradeLedger(dates=df.index, capacity=1)
+    if params['hedging_enabled']:
+        if 'cross' not in cross_cache:
+            cross_cache['cross'] = strat_hedging_cross_ledger(df=df, fast_ma_col='sma_fast', slow_ma_col='sma_slow',
+                                                              execution=execution)
+        hedge_cross = cross_cache['cross']
+
+    hedge_ema = TradeLedger(dates=df.index, capacity=1)
+    if params['hedging_slow_ema_enable']:
+        ema_key = params['hedge_atr_multiplier']
+        if ema_key not in ema_cache:
+            ema_cache[ema_key] = ema_short_hedging_ledger(df, atr_multiplier=ema_key, execution=execution)
+        hedge_ema = ema_cache[ema_key]
+    return result, hedge_cross, hedge_ema
+
+
+def _evaluate_combos(df, combos, tops_cache, trade_log_dir=None, execution=None, hedge_caches=None):
+    """
+    Métricas resumen y ratios de cada combinación de `combos` sobre `df` (con indicadores).
+    Los techos del VIX se toman de `tops_cache` por (window_top, factor_top), calculándolos
+    si faltan; las coberturas se memorizan por sus propios parámetros en `hedge_caches`
+    (cross_cache, ema_cache), que el llamante puede conservar entre llamadas.
+    """
+    execution = execution or DEFAULT_EXECUTION
+    cross_cache, ema_cache = hedge_caches if hedge_caches is not None else ({}, {})
+    close = df['nasdaq'].to_numpy(dtype=float)
+    rows, equity = [], np.empty((len(df), len(combos)))
+    with contextlib.redirect_stdout(io.StringIO()):
+        for j, params in enumerate(combos):
+            tops_key = (params['window_top'], params['factor_top'])
+            if tops_key not in tops_cache:
+                tops_cache[tops_key] = pd.DataFrame(
+                    find_vix_tops(df, window_top=params['window_top'], factor_top=params['factor_top']),
+                    columns=TOPS_COLUMNS)
+            tops_df = tops_cache[tops_key]
+
+            result, hedge_cross, hedge_ema = _simulate_combo(df, params, tops_df, cross_cache, ema_cache, execution)
+            row = {**params, 'tops': len(tops_df), **_summary_metrics(result, hedge_cross, hedge_ema)}
+            combined = merge_ledgers(result, hedge_cross, hedge_ema)
+            equity[:, j] = mark_to_market(combined, close, point_value=execution.contract_value)['equity'].to_numpy()
+            if trade_log_dir:
+                row['trade_log'] = os.path.join(trade_log_dir, _trade_log_name(params))
+                combined.to_frame().to_csv(row['trade_log'], index=False)
+            rows.append(row)
+
+    # Ratios de todas las curvas de equity (mark-to-market por barra) en una sola llamada
+    perf = performance_metrics(returns_from_equity(equity))
+    for j, row in enumerate(rows):
+        row.update({name: values[j] for name, values in perf.items()})
+    return rows
+
+
+def expand_grid(param_grid):
+    """Producto cartesiano de la rejilla, como lista de diccionarios de parámetros."""
+    grid = {**{key: [value[0]] for key, value in PARAM_GRID.items()}, **param_grid}
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def run_sweep(df, param_grid=None, max_workers=None, output_path='outputs/sweep_results.csv', trade_log_dir=None,
+              execution=None):
+    """
+    Ejecuta el barrido de parámetros sobre `df` (datos de mercado sin indicadores).
+
+    Args:
+        df: DataFrame indexado por fecha con las columnas de `BASE_COLUMNS` ('open_nasdaq' es
+            opcional: sólo la usa un `execution` con `gap_fills`).
+        param_grid: dict parámetro -> lista de valores. Los parámetros que falten
+            toman el primer valor de `PARAM_GRID`.
+        max_workers: procesos hijos (por defecto, todos los núcleos). Los indicadores de
+            todos los grupos viven a la vez en memoria compartida (grupos x 6 columnas x barras).
+        output_path: CSV de resultados (None para no guardar).
+        trade_log_dir: si se indica, un CSV de operaciones por combinación en ese
+            directorio (columna 'trade_log'), para analizarlos con summary_stat.
+        execution: ExecutionModel (comisiones, deslizamiento...) de todas las combinaciones;
+            por defecto, sin costes.
+
+    Returns:
+        pd.DataFrame: Una fila por combinación con sus métricas resumen.
+    """
+    combos = expand_grid(param_grid or PARAM_GRID)
+    groups = {}
+    for params in combos:
+        key = tuple(params[p] for p in INDICATOR_PARAMS)
+        groups.setdefault(key, []).append(params)
+
+    workers = max_workers or os.cpu_count()
+    chunk_size = max(1, -(-len(combos) // (workers * CHUNKS_PER_WORKER)))
+    # Bloques consecutivos dentro de cada grupo: las combinaciones vecinas comparten techos
+    chunks = [(g, group[i:i + chunk_size]) for g, group in enumerate(groups.values())
+              for i in range(0, len(group), chunk_size)]
+    print(f"🔁 Barrido: {len(combos)} combinaciones en {len(groups)} grupos de indicadores "
+          f"({len(chunks)} tareas de hasta {chunk_size})")
+
+    if trade_log_dir:
+        os.makedirs(trade_log_dir, exist_ok=True)
+
+    shm_blocks, spec = _share_market_data(df, [col for col in BASE_COLUMNS if col in df.columns])
+    shm_groups = shared_memory.SharedMemory(create=True, size=max(len(groups) * len(DERIVED_COLUMNS) * len(df) * 8, 1))
+    shm_blocks.append(shm_groups)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_sweep,
+                                 initargs=(spec, (shm_groups.name, len(groups), len(df)))) as pool:
+            # 1. Indicadores de cada grupo, una vez
+            indicator_params = [dict(zip(INDICATOR_PARAMS, key)) for key in groups]
+            list(pool.map(_compute_indicator_group, range(len(groups)), indicator_params))
+
+            # 2. Bloques de combinaciones (mismo orden que `combos`)
+            futures = [pool.submit(_evaluate_chunk, g, chunk, trade_log_dir, execution) for g, chunk in chunks]
+            rows = [row for future in futures for row in future.result()]
+    finally:
+        for shm in shm_blocks:
+            shm.close()
+            shm.unlink()
+
+    results = pd.DataFrame(rows)
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        results.to_csv(output_path, index=False)
+        print(f"💾 Resultados del barrido guardados en: '{output_path}'")
+    return results
+
+
+if __name__ == '__main__':
+    from market_data import load_market_data
+
+    market_df = load_market_data(start='2020-01-01', vix_end='2025-08-01', nasdaq_end='2025-07-30')
+    sweep_results = run_sweep(market_df, PARAM_GRID)
+    print(sweep_results.sort_values('total_profit_usd', ascending=False).head(20))
@@ -0,0 +1,41 @@
+# FILE: tests/conftest.py
+# Serie sintética compartida por las pruebas (determinista, sin red).
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import make_market_data
+from quant_stat.find_vix_tops import find_vix_tops
+from quant_stat.indicators import compute_indicators
+
+N_BARS = 6000
+SEED = 5
+WINDOW_TOP, FACTOR_TOP, ATR_FACTOR = 15, 1.2, 3
+TOPS_COLUMNS = ['tag', 'top_date', 'top_value', 'top_confirm']
+
+
+@pytest.fixture(scope='session')
+def market():
+    return make_market_data(N_BARS, seed=SEED)
+
+
+@pytest.fixture(scope='session')
+def indicators(market):
+    return compute_indicators(market.copy(deep=False))
+
+
+@pytest.fixture(scope='session')
+def tops(indicators):
+    return pd.DataFrame(find_vix_tops(indicators, window_top=WINDOW_TOP, factor_top=FACTOR_TOP), columns=TOPS_COLUMNS)
+
+
+@pytest.fixture(scope='session')
+def entries(indicators, tops):
+    """Posiciones de las barras de entrada (confirmación de cada techo)."""
+    return indicators.index.get_indexer(pd.to_datetime(tops['top_confirm']))
+
+
+def chunks(df, size):
+    """(posición inicial, bloque) de `df` en bloques de `size` barras."""
+    for start in range(0, len(df), size):
+        yield start, df.iloc[start:start + size]
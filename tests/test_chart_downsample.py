@@ -0,0 +1,93 @@
+# FILE: tests/test_chart_downsample.py
+# Reducción de puntos: extremos, huecos y filas obligatorias (techos, picos del VIX) se conservan.
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from chart_active_trades import plot_vix_and_price_only
+from chart_downsample import downsample_frame, keep_mask_for_dates, lttb_indices, minmax_indices
+from pipeline import Pipeline, chart_frame
+
+MAX_POINTS = 300
+
+
+@pytest.fixture(scope='module')
+def frame(indicators):
+    return chart_frame(indicators).rename(columns=str.lower)
+
+
+def test_minmax_keeps_every_bucket_extreme(frame):
+    values = frame['vix'].to_numpy()
+    idx = minmax_indices(values, 100)
+    size = -(-len(values) // 100)
+    for start in range(0, len(values), size):
+        block = values[start:start + size]
+        assert start + block.argmin() in idx and start + block.argmax() in idx
+    assert idx[0] == 0 and idx[-1] == len(values) - 1 and len(idx) <= 2 * 100 + 2
+
+
+def test_lttb_budget_and_endpoints(frame):
+    idx = lttb_indices(frame['nasdaq'].to_numpy(), MAX_POINTS)
+    assert len(idx) == MAX_POINTS and idx[0] == 0 and idx[-1] == len(frame) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+def test_downsample_keeps_extremes_gaps_and_forced_rows(frame, method):
+    keep = np.zeros(len(frame), dtype=bool)
+    keep[[17, 2500, 4999]] = True
+    reduced = downsample_frame(frame, ['nasdaq', 'vix', 'sma_slow'], max_points=MAX_POINTS, keep=keep, method=method)
+
+    assert len(reduced) < len(frame) // 4
+    assert set(np.flatnonzero(keep)) <= set(reduced.index)
+    for col in ['nasdaq', 'vix']:
+        assert reduced[col].max() == frame[col].max() and reduced[col].min() == frame[col].min()
+    # La SMA lenta empieza con NaN: el borde del hueco se conserva y la línea sigue cortada en el mismo sitio
+    first_valid = frame['sma_slow'].first_valid_index()
+    assert {first_valid - 1, first_valid} <= set(reduced.index)
+    assert downsample_frame(frame, ['nasdaq'], max_points=None) is frame
+
+
+def test_keep_mask_for_dates(frame):
+    dates = frame['date']
+    mask = keep_mask_for_dates(dates, dates.iloc[[3, 10]], pd.Series([dates.iloc[10], pd.NaT]), None)
+    assert list(np.flatnonzero(mask)) == [3, 10]
+    assert not keep_mask_for_dates(dates).any()
+
+
+def test_overlay_chart_keeps_tops_and_spikes(market, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bt = Pipeline(data=market, quiet_window=20, quiet_threshold=0.9, open_browser=False)
+    df, tops = chart_frame(bt.indicators), bt.tops
+    assert df['vix_spike'].sum() > 5 and len(tops) > 5
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        fig = plot_vix_and_price_only('TEST', 'min', df, tops_df=tops, open_browser=False, max_points=MAX_POINTS)
+    lines = {trace.name: trace for trace in fig.data if trace.mode == 'lines'}
+    plotted = set(pd.to_datetime(lines['VIX'].x))
+
+    assert len(plotted) < len(df) // 4
+    assert set(df.loc[df['vix_spike'].astype(bool), 'date']) <= plotted
+    assert set(pd.to_datetime(tops['index_top_pos'])) | set(pd.to_datetime(tops['top_confirm'])) <= plotted
+
+
+def test_main_chart_keeps_trade_dates_and_spikes(market, tmp_path, monkeypatch):
+    from chart_volume import plot_nasdaq_and_vix
+
+    monkeypatch.chdir(tmp_path)
+    bt = Pipeline(data=market, quiet_window=20, quiet_threshold=0.9, hedging_enabled=True, open_browser=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, trades, hedges = chart_frame(bt.indicators), bt.long_trades, bt.hedge_cross
+        fig = plot_nasdaq_and_vix('TEST', 'min', df, tops_df=bt.tops, trades_df=trades, hedge_trades_df=hedges,
+                                  open_browser=False, max_points=MAX_POINTS)
+    plotted = set(pd.to_datetime(next(trace for trace in fig.data if trace.name == 'NASDAQ').x))
+
+    # Unión de las seis series reducidas (~MAX_POINTS cada una) y las filas obligatorias
+    assert len(plotted) < len(df) // 2
+    assert set(df.loc[df['vix_spike'].astype(bool), 'date']) <= plotted
+    assert set(trades['entry_date']) | set(trades['exit_date']) <= plotted
+    assert set(hedges['hedge_entry_date']) | set(hedges['hedge_exit_date']) <= plotted
@@ -0,0 +1,103 @@
+# FILE: tests/test_charts.py
+# Gráficos en modo headless: trazos, WebGL y dependencias opcionales.
+
+import contextlib
+import importlib.util
+import io
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+import pytest
+
+import chart_volume
+from chart_volume import plot_nasdaq_and_vix
+from pipeline import Pipeline, chart_frame
+from strat_OM.signal_engine import in_position_mask, interval_coverage
+
+
+@pytest.fixture(scope='module')
+def bt(market):
+    bt = Pipeline(data=market, hedging_enabled=True, open_browser=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        bt.get('long_trades'), bt.get('hedge_cross'), bt.get('hedge_ema')
+    return bt
+
+
+@pytest.fixture(autouse=True)
+def _in_tmp_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)       # los gráficos se escriben en ./charts
+
+
+def _plot(bt, trades=None, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return plot_nasdaq_and_vix('TEST', 'min', chart_frame(bt.indicators), tops_df=bt.tops,
+                                   trades_df=bt.long_trades if trades is None else trades,
+                                   hedge_trades_df=bt.hedge_cross, hedge_trades_df_slow_ema=bt.hedge_ema,
+                                   open_browser=False, **kwargs)
+
+
+def test_webgl_follows_the_raw_bar_count(bt):
+    # Con la reducción de puntos activada las series tienen pocos puntos, pero la historia es larga
+    webgl = _plot(bt, webgl_threshold=len(bt.indicators) - 1, max_points=500)
+    assert any(isinstance(trace, go.Scattergl) for trace in webgl.data)
+    assert max(len(trace.x) for trace in webgl.data if isinstance(trace, go.Scattergl)) < len(bt.indicators)
+
+    svg = _plot(bt, webgl_threshold=len(bt.indicators), max_points=500)
+    assert not any(isinstance(trace, go.Scattergl) for trace in svg.data)
+
+
+def test_trace_count_does_not_grow_with_trades(bt):
+    few = _plot(bt, trades=bt.long_trades.iloc[:3])
+    assert len(bt.long_trades) > 10
+    assert len(_plot(bt).data) == len(few.data)
+
+
+def test_static_image_without_kaleido(bt, monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(chart_volume.importlib.util, 'find_spec',
+                        lambda name, *args: None if name == 'kaleido' else find_spec(name, *args))
+    with pytest.raises(ImportError, match='kaleido'):
+        _plot(bt, static_path='chart.png')
+
+
+def _per_trade_active_stop(df, trades_df):
+    """El overlay original: dos máscaras de longitud completa por operación."""
+    active = pd.Series(np.nan, index=df.index)
+    for _, trade in trades_df.iterrows():
+        if pd.notna(trade['exit_date']) and pd.notna(trade['entry_date']):
+            mask = (df['date'] >= trade['entry_date']) & (df['date'] <= trade['exit_date'])
+            stops = df.loc[mask, 'atr_trailing_stop']
+            active[mask] = stops.where(stops <= df.loc[mask, 'nasdaq'], np.nan)
+    return active
+
+
+def test_active_stop_overlay_matches_per_trade_masks(bt):
+    trades = bt.long_trades
+    # Una operación solapada con otra y una sin fecha de salida
+    extra = trades.iloc[[0, 1]].assign(entry_date=[trades['entry_date'].iloc[0] + pd.Timedelta(minutes=5),
+                                                   trades['entry_date'].iloc[1]],
+                                       exit_date=[trades['exit_date'].iloc[2], pd.NaT])
+    trades = pd.concat([trades, extra], ignore_index=True)
+
+    fig = _plot(bt, trades=trades, max_points=None)
+    overlay = next(trace for trace in fig.data if trace.name == 'ATR Trailing Stop (Long)')
+    expected = _per_trade_active_stop(chart_frame(bt.indicators), trades)
+    assert expected.notna().sum() > 100
+    np.testing.assert_array_equal(np.asarray(overlay.y, dtype=float), expected.to_numpy())
+
+
+def test_interval_coverage_matches_brute_force(bt):
+    dates = bt.indicators.index
+    rng = np.random.default_rng(1)
+    first = rng.integers(0, len(dates), 200)
+    starts = dates[first]
+    ends = dates[np.minimum(first + rng.integers(0, 300, 200), len(dates) - 1)].to_series().reset_index(drop=True)
+    ends.iloc[::25] = pd.NaT
+
+    expected = np.zeros(len(dates), dtype=np.int64)
+    for start, end in zip(starts, ends):
+        if pd.notna(end):
+            expected += (dates >= start) & (dates <= end)
+    np.testing.assert_array_equal(interval_coverage(dates, starts, ends), expected)
+    np.testing.assert_array_equal(in_position_mask(dates, starts, ends), expected > 0)
@@ -0,0 +1,102 @@
+# FILE: tests/test_execution.py
+# Modelo de ejecución: llenados y costes a mano, y el mismo resultado por lotes, por bloques y barra a barra.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strat_OM.execution import DEFAULT_EXECUTION, ExecutionModel, apply_gap_fills
+from strat_OM.strat_vix_long import VixLongTracker, simulate_vix_long_ledger
+from strat_OM.trade_ledger import HEDGE_SHORT_CROSS, HEDGE_SHORT_EMA, SIGNAL, STOP, STOP_FIXED, VIX_LONG, TradeLedger
+from tests.conftest import ATR_FACTOR, chunks
+
+EXECUTIONS = [
+    None,
+    ExecutionModel(point_value=20, contracts=3, commission=2.5, slippage_ticks=2, slippage_atr=0.1, gap_fills=True),
+]
+
+
+def _ledger():
+    """Un largo y un corto por stop y un corto por señal, con los niveles del simulador."""
+    ledger = TradeLedger()
+    ledger.append(VIX_LONG, 0, 2, 100.0, 95.0, STOP_FIXED, 0.0)
+    ledger.append(HEDGE_SHORT_CROSS, 1, 3, 102.0, 106.0, STOP, 0.0)
+    ledger.append(HEDGE_SHORT_EMA, 2, 3, 101.0, 104.0, SIGNAL, 0.0)
+    return ledger
+
+
+def test_default_model_is_the_level_at_fifty_usd_per_point():
+    trades = DEFAULT_EXECUTION.fill(_ledger().trades)
+    np.testing.assert_array_equal(trades['exit_price'], [95.0, 106.0, 104.0])
+    np.testing.assert_array_equal(trades['pnl'], [-250.0, -200.0, -150.0])
+
+
+def test_costs_by_hand():
+    model = ExecutionModel(point_value=20, contracts=2, commission=1.5, tick_size=0.25, slippage_ticks=2,
+                           slippage_atr=0.1, gap_fills=True)
+    # Largo: abre en 93 por debajo del stop de 95 -> llenado a la apertura. Corto por stop: abre
+    # en 105, sin gap sobre 106. Corto por señal: nunca se llena a la apertura.
+    exit_open = [93.0, 105.0, 110.0]
+    entry_atr, exit_atr = [2.0, 4.0, 1.0], [3.0, 5.0, np.nan]
+    trades = model.fill(_ledger().trades, exit_open, entry_atr, exit_atr)
+
+    # Deslizamiento por lado: 2 ticks x 0.25 + 0.1 x ATR de la barra (NaN -> 0), siempre en contra
+    np.testing.assert_allclose(trades['entry_price'], [100.0 + 0.5 + 0.2, 102.0 - 0.5 - 0.4, 101.0 - 0.5 - 0.1])
+    np.testing.assert_allclose(trades['exit_price'], [93.0 - 0.5 - 0.3, 106.0 + 0.5 + 0.5, 104.0 + 0.5])
+    commission = 2 * 1.5 * 2
+    np.testing.assert_allclose(trades['pnl'], [(92.2 - 100.7) * 40 - commission, (101.1 - 107.0) * 40 - commission,
+                                               (100.4 - 104.5) * 40 - commission])
+    assert model.contract_value == 40
+
+
+def test_gap_fills_and_errors():
+    trades = _ledger().trades
+    gapped = apply_gap_fills(trades, [96.0, 107.0, 110.0])
+    np.testing.assert_array_equal(gapped, [False, True, False])
+    np.testing.assert_array_equal(trades['exit_price'], [95.0, 107.0, 104.0])
+    assert not apply_gap_fills(trades, [np.nan, np.nan, np.nan]).any()
+
+    with pytest.raises(ValueError):
+        ExecutionModel(gap_fills=True).fill(_ledger().trades)
+    with pytest.raises(ValueError):
+        ExecutionModel(slippage_atr=0.1).fill(_ledger().trades, entry_atr=[1.0, 1.0, 1.0])
+    with pytest.raises(ValueError):
+        ExecutionModel(gap_fills=True).apply(_ledger().trades, pd.DataFrame({'nasdaq': [1.0] * 4}))
+
+
+def test_apply_reads_open_and_atr_from_the_frame():
+    df = pd.DataFrame({'open_nasdaq': [100.0, 101.0, 93.0, 105.0], 'nasdaq_atr': [2.0, 4.0, 3.0, 5.0]})
+    model = ExecutionModel(commission=1.0, slippage_atr=0.5, gap_fills=True)
+    by_frame = model.apply(_ledger().trades, df)
+    by_hand = model.fill(_ledger().trades, [93.0, 105.0, 105.0], [2.0, 4.0, 3.0], [3.0, 5.0, 5.0])
+    np.testing.assert_array_equal(by_frame, by_hand)
+
+
+@pytest.mark.parametrize('execution', EXECUTIONS)
+@pytest.mark.parametrize('chunk_size', [1, 997])
+def test_vix_long_tracker_matches_batch(indicators, tops, entries, execution, chunk_size):
+    expected = simulate_vix_long_ledger(indicators, tops, atr_factor=ATR_FACTOR, execution=execution).trades
+    tracker = VixLongTracker(atr_factor=ATR_FACTOR, dates=indicators.index, execution=execution)
+    for start, chunk in chunks(indicators, chunk_size):
+        in_chunk = entries[(entries >= start) & (entries < start + len(chunk))]
+        tracker.update(chunk, in_chunk - start)
+    np.testing.assert_array_equal(tracker.finish().trades, expected)
+
+
+@pytest.mark.parametrize('execution', EXECUTIONS)
+def test_vix_long_tracker_per_bar_matches_batch(indicators, tops, entries, execution):
+    expected = simulate_vix_long_ledger(indicators, tops, atr_factor=ATR_FACTOR, execution=execution).trades
+    tracker = VixLongTracker(atr_factor=ATR_FACTOR, execution=execution)
+    entry_bars = set(entries)
+    columns = ['nasdaq', 'low_nasdaq', 'atr_trailing_stop', 'nasdaq_atr', 'open_nasdaq']
+    for i, (close, low, trail, nasdaq_atr, bar_open) in enumerate(indicators[columns].to_numpy()):
+        tracker.on_bar(close, low, trail, nasdaq_atr, entry=i in entry_bars, bar_open=bar_open)
+    np.testing.assert_array_equal(tracker.finish().trades, expected)
+
+
+def test_costs_only_move_fills_not_exits(indicators, tops):
+    plain = simulate_vix_long_ledger(indicators, tops, atr_factor=ATR_FACTOR).trades
+    costed = simulate_vix_long_ledger(indicators, tops, atr_factor=ATR_FACTOR, execution=EXECUTIONS[1]).trades
+    for field in ('entry_idx', 'exit_idx', 'outcome'):
+        np.testing.assert_array_equal(costed[field], plain[field])
+    assert (costed['pnl'] < plain['pnl'] * 20 * 3 / 50).all()
@@ -0,0 +1,72 @@
+# FILE: tests/test_find_vix_tops.py
+# VixTopDetector por bloques, barra a barra y restaurado desde disco vs la versión por lotes original.
+
+import pandas as pd
+import pytest
+
+from quant_stat.find_vix_tops import VixTopDetector, find_vix_tops
+from tests.conftest import FACTOR_TOP, WINDOW_TOP, chunks
+
+
+def _rescan_tops(df, window_top, factor_top):
+    """La versión original: reescanea la ventana con pandas en cada barra."""
+    tops, pending_max, pending_max_i = [], None, None
+    for i in range(window_top, len(df)):
+        current_vix = df['VIX'].iloc[i]
+        recent_mean = df['VIX'].iloc[i - window_top:i].mean()
+        if pending_max is None:
+            if current_vix >= factor_top * recent_mean:
+                pending_max, pending_max_i = current_vix, i
+            continue
+        if current_vix > pending_max:
+            pending_max, pending_max_i = current_vix, i
+        elif current_vix < df['atr'].iloc[pending_max_i]:
+            tops.append(('top', df.index[pending_max_i], pending_max, df.index[i]))
+            pending_max = pending_max_i = None
+    return tops
+
+
+@pytest.fixture(scope='module')
+def expected(indicators):
+    return _rescan_tops(indicators.iloc[:3000], WINDOW_TOP, FACTOR_TOP)
+
+
+@pytest.fixture(scope='module')
+def bars(indicators):
+    return indicators.iloc[:3000][['VIX', 'atr']]
+
+
+def test_batch_matches_rescan(bars, expected):
+    assert len(expected) > 10
+    assert find_vix_tops(bars, window_top=WINDOW_TOP, factor_top=FACTOR_TOP) == expected
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 997])
+def test_chunked_matches_batch(bars, expected, chunk_size):
+    detector = VixTopDetector(window_top=WINDOW_TOP, factor_top=FACTOR_TOP)
+    assert [top for _, chunk in chunks(bars, chunk_size) for top in detector.update(chunk)] == expected
+
+
+def test_series_rows_and_single_bars(bars, expected):
+    detector = VixTopDetector(window_top=WINDOW_TOP, factor_top=FACTOR_TOP)
+    half = len(bars) // 2
+    result = [top for i in range(half) for top in detector.update(bars.iloc[i])]
+    for date, vix, atr in zip(bars.index[half:], bars['VIX'].iloc[half:], bars['atr'].iloc[half:]):
+        result.extend(detector.update_bar(date, vix, atr))
+    assert result == expected
+
+
+def test_saved_state_resumes(bars, expected, tmp_path):
+    detector = VixTopDetector(window_top=WINDOW_TOP, factor_top=FACTOR_TOP)
+    result = []
+    for _, chunk in chunks(bars, 400):
+        result.extend(detector.update(chunk))
+        detector.save(tmp_path / 'tops.json')
+        detector = VixTopDetector.load(tmp_path / 'tops.json')
+    assert result == expected
+
+
+def test_missing_columns():
+    detector = VixTopDetector()
+    with pytest.raises(ValueError):
+        detector.update(pd.DataFrame({'VIX': [1.0]}))
@@ -0,0 +1,97 @@
+# FILE: tests/test_hedging.py
+# Motores de cobertura por arrays vs los bucles originales (strat_hedging_cross y la EMA lenta).
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from strat_OM.strat_hedging_cross import strat_hedging_cross
+from strat_OM.strat_hedging_ema import generate_ema_short_hedging_signals
+
+
+def _cross_loop(df, fast_ma_col, slow_ma_col):
+    """strat_hedging_cross original (iterrows, sin los mensajes)."""
+    required_cols = ['nasdaq', 'high_nasdaq', 'nasdaq_atr', fast_ma_col, slow_ma_col]
+    df_hedge = df.dropna(subset=required_cols).copy()
+    df_hedge['position'] = np.where(df_hedge[fast_ma_col] > df_hedge[slow_ma_col], 1, -1)
+    df_hedge['signal'] = df_hedge['position'].diff()
+
+    records, in_short = [], False
+    entry_date = entry_price = stop_loss = None
+    for date, row in df_hedge.iterrows():
+        if not in_short and row['signal'] == -2:
+            in_short, entry_date, entry_price = True, date, row['nasdaq']
+            stop_loss = entry_price + (2 * row['nasdaq_atr'])
+        elif in_short and row['high_nasdaq'] > stop_loss:
+            profit_points = entry_price - stop_loss
+            records.append({
+                'hedge_entry_date': entry_date, 'hedge_entry_price': round(entry_price, 2),
+                'hedge_exit_date': date, 'hedge_exit_price': round(stop_loss, 2),
+                'hedge_profit_usd': round(profit_points * 50, 2),
+                'hedge_return_pct': profit_points / entry_price if entry_price else 0,
+            })
+            in_short = False
+    return pd.DataFrame(records)
+
+
+def _ema_loop(df, atr_multiplier):
+    """generate_ema_short_hedging_signals original (fila a fila con iloc)."""
+    records, in_trade = [], False
+    entry_price = entry_date = stop_loss = None
+    for i in range(1, len(df)):
+        row_prev, row = df.iloc[i - 1], df.iloc[i]
+        if not in_trade:
+            if row_prev['nasdaq'] > row_prev['sma_slow'] and row['nasdaq'] < row['sma_slow']:
+                in_trade, entry_date, entry_price = True, row.name, row['nasdaq']
+                stop_loss = entry_price + (atr_multiplier * row['nasdaq_atr'])
+        else:
+            stop_hit = 'high_nasdaq' in df.columns and row['high_nasdaq'] > stop_loss
+            cross_exit = row_prev['sma_fast'] < row_prev['sma_slow'] and row['sma_fast'] > row['sma_slow']
+            if stop_hit or cross_exit:
+                exit_price = stop_loss if stop_hit else row['nasdaq']
+                profit_points = entry_price - exit_price
+                records.append({
+                    'hedge_entry_date': entry_date, 'hedge_entry_price': round(entry_price, 2),
+                    'hedge_exit_date': row.name, 'hedge_exit_price': round(exit_price, 2),
+                    'hedge_profit_usd': round(profit_points * 50, 2),
+                    'hedge_return_pct': round(profit_points / entry_price if entry_price != 0 else 0, 4),
+                })
+                in_trade = False
+                entry_price = entry_date = stop_loss = None
+    return pd.DataFrame(records)
+
+
+@pytest.fixture(scope='module')
+def frame(indicators):
+    return indicators.iloc[:3000].drop(columns=['open_nasdaq'])
+
+
+def _quiet(function, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def test_cross_hedge_matches_loop(frame):
+    expected = _cross_loop(frame, 'sma_fast', 'sma_slow')
+    assert len(expected) > 5
+    pd.testing.assert_frame_equal(_quiet(strat_hedging_cross, frame, 'sma_fast', 'sma_slow'), expected,
+                                  check_exact=True)
+
+
+@pytest.mark.parametrize('atr_multiplier', [0.5, 1.0, 3.0])
+def test_ema_hedge_matches_loop(frame, atr_multiplier):
+    expected = _ema_loop(frame, atr_multiplier)
+    assert len(expected) > 5
+    pd.testing.assert_frame_equal(_quiet(generate_ema_short_hedging_signals, frame, atr_multiplier=atr_multiplier),
+                                  expected, check_exact=True)
+
+
+def test_ema_hedge_without_highs_exits_on_cross_only(frame):
+    frame = frame.drop(columns=['high_nasdaq'])
+    expected = _ema_loop(frame, 0.5)
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(_quiet(generate_ema_short_hedging_signals, frame, atr_multiplier=0.5), expected,
+                                  check_exact=True)
@@ -0,0 +1,67 @@
+# FILE: tests/test_indicator_cache.py
+# IndicatorCache: lecturas, extensiones y expulsión LRU vs el cálculo completo de compute_indicators.
+
+import os
+
+import numpy as np
+
+from quant_stat.indicator_cache import IndicatorCache
+from quant_stat.indicators import DERIVED_COLUMNS, compute_indicators
+
+N_INDICATORS = 5        # las dos medias, la del VIX, el ATR y los trailing stops
+
+
+def _assert_indicators_equal(result, expected):
+    for column in DERIVED_COLUMNS:
+        np.testing.assert_array_equal(result[column].to_numpy(), expected[column].to_numpy(), err_msg=column)
+
+
+def _counts(cache):
+    return cache.hits, cache.extensions, cache.misses
+
+
+def test_extension_and_disk_hits(market, indicators, tmp_path):
+    cache = IndicatorCache(str(tmp_path / 'cache'))
+    prefix = len(market) * 2 // 3
+
+    _assert_indicators_equal(compute_indicators(market.iloc[:prefix].copy(), cache=cache), indicators.iloc[:prefix])
+    assert _counts(cache) == (0, 0, N_INDICATORS)
+
+    # Historia ampliada: el ATR y los stops se extienden desde el prefijo, las medias se recalculan
+    _assert_indicators_equal(compute_indicators(market.copy(), cache=cache), indicators)
+    assert cache.extensions == 2 and cache.misses == N_INDICATORS + 3
+
+    # Mismas barras con la caché reabierta: todo se lee de disco
+    reopened = IndicatorCache(str(tmp_path / 'cache'))
+    _assert_indicators_equal(compute_indicators(market.copy(), cache=reopened), indicators)
+    assert _counts(reopened) == (N_INDICATORS, 0, 0)
+
+
+def test_changed_bars_or_params_are_not_served(market, tmp_path):
+    cache = IndicatorCache(str(tmp_path / 'cache'))
+    prefix = market.iloc[:3000].copy()
+    compute_indicators(prefix.copy(), cache=cache)
+
+    # Una barra corregida dentro del prefijo invalida la extensión
+    revised = market.iloc[:4000].copy()
+    revised.iloc[100, revised.columns.get_loc('nasdaq')] += 1.0
+    _assert_indicators_equal(compute_indicators(revised.copy(), cache=cache), compute_indicators(revised.copy()))
+    assert cache.hits == 0 and cache.extensions == 0
+
+    _assert_indicators_equal(compute_indicators(prefix.copy(), f=20, cache=cache), compute_indicators(prefix.copy(), f=20))
+    assert cache.hits == 4
+
+
+def test_lru_eviction(market, tmp_path):
+    cache = IndicatorCache(str(tmp_path / 'cache'))
+    compute_indicators(market.copy(), cache=cache)
+    sizes = sorted(entry['bytes'] for entry in cache._manifest.values())
+
+    small = IndicatorCache(str(tmp_path / 'small'), max_bytes=sizes[-1] + sizes[0])
+    compute_indicators(market.copy(), cache=small)
+    files = [name for name in os.listdir(tmp_path / 'small') if name.endswith('.parquet')]
+    assert 1 <= len(small._manifest) < N_INDICATORS and len(files) == len(small._manifest)
+    assert sum(entry['bytes'] for entry in small._manifest.values()) <= small.max_bytes
+
+    small.clear()
+    assert not small._manifest and not any(name.endswith('.parquet') for name in os.listdir(tmp_path / 'small'))
@@ -0,0 +1,116 @@
+# FILE: tests/test_intraday.py
+# Camino por bloques (ColumnarBarStore -> run_chunked) vs el Pipeline con la historia completa.
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from intraday import run_chunked
+from market_data import ColumnarBarStore, ingest_intraday_csv
+from pipeline import Pipeline
+from quant_stat.indicators import DERIVED_COLUMNS, StreamingIndicators
+from strat_OM.execution import ExecutionModel
+from strat_OM.strat_hedging_cross import HedgeCrossTracker, strat_hedging_cross_ledger
+from strat_OM.strat_hedging_ema import EmaHedgeTracker, ema_short_hedging_ledger
+from strat_OM.trade_ledger import merge_ledgers
+from tests.conftest import N_BARS, chunks
+
+CHUNK_SIZES = [1, 997, N_BARS]
+COSTS = dict(commission=2.5, slippage_ticks=1, slippage_atr=0.1, gap_fills=True)
+# Barras suficientes para varias coberturas de cada tipo y un bloque tranquilo del VIX
+PARAMS = dict(window_top=15, factor_top=1.2, atr_factor=3, quiet_window=20, quiet_threshold=0.9)
+
+
+@pytest.fixture(scope='module')
+def store(market, tmp_path_factory):
+    return ColumnarBarStore.from_frame(market, str(tmp_path_factory.mktemp('intraday') / 'bars'), chunk_size=1000)
+
+
+def _pipeline(market, costs):
+    bt = Pipeline(data=market, hedging_enabled=True, hedging_slow_ema_enable=True, open_browser=False,
+                  **PARAMS, **(COSTS if costs else {}))
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in ('indicators', 'long_ledger', 'hedge_cross_ledger', 'hedge_ema_ledger'):
+            bt.get(name)
+    return bt
+
+
+def _quiet(**kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return kwargs.pop('func')(**kwargs)
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_streaming_indicators_match_batch(market, indicators, chunk_size):
+    streaming = StreamingIndicators()
+    result = pd.concat([streaming.update(chunk.copy()) for _, chunk in chunks(market, chunk_size)])
+    for column in DERIVED_COLUMNS:
+        np.testing.assert_array_equal(result[column].to_numpy(), indicators[column].to_numpy(), err_msg=column)
+
+
+@pytest.mark.parametrize('execution', [None, ExecutionModel(**COSTS)])
+@pytest.mark.parametrize('chunk_size', [1, 7, 997])
+def test_hedge_trackers_match_batch(indicators, execution, chunk_size):
+    cross, ema = HedgeCrossTracker(execution=execution), EmaHedgeTracker(atr_multiplier=0.5, execution=execution)
+    for _, chunk in chunks(indicators, chunk_size):
+        cross.update(chunk)
+        ema.update(chunk)
+
+    expected_cross = _quiet(func=strat_hedging_cross_ledger, df=indicators, fast_ma_col='sma_fast',
+                            slow_ma_col='sma_slow', execution=execution).trades
+    expected_ema = _quiet(func=ema_short_hedging_ledger, df=indicators, atr_multiplier=0.5, execution=execution).trades
+    assert len(expected_cross) > 5 and len(expected_ema) > 5
+    np.testing.assert_array_equal(cross.finish().trades, expected_cross)
+    np.testing.assert_array_equal(ema.finish().trades, expected_ema)
+
+
+@pytest.mark.parametrize('costs', [False, True])
+@pytest.mark.parametrize('chunk_size', [61, 997, N_BARS])
+def test_run_chunked_matches_pipeline(market, store, costs, chunk_size, tmp_path):
+    bt = _pipeline(market, costs)
+    execution = ExecutionModel(**COSTS) if costs else None
+
+    long_only = run_chunked(store, chunk_size=chunk_size, execution=execution, **PARAMS)
+    np.testing.assert_array_equal(long_only.trades, bt.long_ledger.trades)
+
+    ledger = run_chunked(store, chunk_size=chunk_size, execution=execution, indicators_dir=str(tmp_path / 'ind'),
+                         hedging_enabled=True, hedging_slow_ema_enable=True, **PARAMS)
+    expected = merge_ledgers(bt.long_ledger, bt.hedge_cross_ledger, bt.hedge_ema_ledger).trades
+    assert set(np.unique(expected['strategy'])) == {0, 1, 2}
+    np.testing.assert_array_equal(ledger.trades, expected)
+
+    saved = ColumnarBarStore(str(tmp_path / 'ind'))
+    assert len(saved) == N_BARS
+    np.testing.assert_array_equal(saved.dates, market.index.values)
+    assert bt.indicators['vix_spike'].any()
+    np.testing.assert_array_equal(saved.column('vix_spike'), bt.indicators['vix_spike'].to_numpy(dtype=float))
+    for column in DERIVED_COLUMNS:
+        np.testing.assert_array_equal(saved.column(column), bt.indicators[column].to_numpy(dtype=float), err_msg=column)
+
+
+def test_gap_fills_require_open_column(market, tmp_path):
+    store = ColumnarBarStore.from_frame(market.drop(columns='open_nasdaq'), str(tmp_path / 'bars'))
+    with pytest.raises(ValueError, match='open_nasdaq'):
+        run_chunked(store, execution=ExecutionModel(gap_fills=True))
+
+
+def test_ingest_intraday_csv(market, tmp_path):
+    head = market.iloc[:500]
+    prices = pd.DataFrame({'Open': head['open_nasdaq'] / 10, 'High': head['high_nasdaq'] / 10,
+                           'Low': head['low_nasdaq'] / 10, 'Close': head['nasdaq'] / 10,
+                           'Volume': head['nasdaq_volume_M'] * 1e6}, index=head.index.rename('Date'))
+    vix = pd.DataFrame({'Open': head['VIX'], 'High': head['VIX'], 'Low': head['VIX'], 'Close': head['VIX'],
+                        'Volume': 0.0}, index=head.index.rename('Date')).iloc[::2]
+    prices.to_csv(tmp_path / 'qqq.csv')
+    vix.to_csv(tmp_path / 'vix.csv')
+
+    store = ingest_intraday_csv(str(tmp_path / 'qqq.csv'), str(tmp_path / 'vix.csv'), str(tmp_path / 'bars'),
+                                chunksize=64)
+    assert len(store) == 500
+    np.testing.assert_allclose(store.column('nasdaq'), (head['nasdaq'] / 10).round(2) * 10)
+    vix_column = store.column('VIX')
+    np.testing.assert_array_equal(vix_column[::2], head['VIX'].to_numpy()[::2])
+    assert np.isnan(vix_column[1::2]).all()
@@ -0,0 +1,102 @@
+# FILE: tests/test_live.py
+# Paper trading en vivo: barra a barra (y por la fuente CSV / TCP) vs el backtest por lotes.
+
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from live import Bar, CsvOrderLog, FileBarSource, LiveVixLong, SocketBarSource, run_live, serve_replay
+from quant_stat.indicators import DERIVED_COLUMNS, StreamingIndicators
+from strat_OM.execution import ExecutionModel
+from strat_OM.strat_vix_long import simulate_vix_long_ledger
+from strat_OM.trade_ledger import OPEN
+from tests.conftest import ATR_FACTOR, FACTOR_TOP, WINDOW_TOP
+
+EXECUTIONS = [
+    None,
+    ExecutionModel(point_value=20, contracts=3, commission=2.5, slippage_ticks=2, slippage_atr=0.1, gap_fills=True),
+]
+
+
+def _engine(execution=None):
+    return LiveVixLong(window_top=WINDOW_TOP, factor_top=FACTOR_TOP, atr_factor=ATR_FACTOR, execution=execution)
+
+
+def _bars(df):
+    return [Bar(date, r.nasdaq, r.high_nasdaq, r.low_nasdaq, r.VIX, r.open_nasdaq)
+            for date, r in zip(df.index, df.itertuples())]
+
+
+def _expected(indicators, tops, execution=None):
+    return simulate_vix_long_ledger(indicators, tops, atr_factor=ATR_FACTOR, execution=execution).trades
+
+
+@pytest.fixture(scope='module')
+def bars_csv(market, tmp_path_factory):
+    path = tmp_path_factory.mktemp('live') / 'bars.csv'
+    market[['nasdaq', 'high_nasdaq', 'low_nasdaq', 'VIX', 'open_nasdaq']].to_csv(path, index_label='date')
+    return str(path)
+
+
+def test_streaming_indicators_per_bar_match_batch(market, indicators):
+    streaming = StreamingIndicators()
+    rows = [streaming.update_bar(close, high, low, vix)
+            for close, high, low, vix in market[['nasdaq', 'high_nasdaq', 'low_nasdaq', 'VIX']].to_numpy()]
+    result = pd.DataFrame(rows)
+    for column in DERIVED_COLUMNS:
+        np.testing.assert_array_equal(result[column].to_numpy(), indicators[column].to_numpy(), err_msg=column)
+
+
+@pytest.mark.parametrize('execution', EXECUTIONS)
+def test_on_bar_matches_backtest(market, indicators, tops, execution):
+    engine = _engine(execution)
+    orders = [order for bar in _bars(market) for order in engine.on_bar(bar)]
+    trades = engine.ledger().trades
+    np.testing.assert_array_equal(trades, _expected(indicators, tops, execution))
+
+    # Una compra por operación, a su cierre de entrada; una venta por cada stop tocado
+    buys = [order for order in orders if order.side == 'BUY']
+    sells = [order for order in orders if order.side == 'SELL']
+    assert [order.trade_id for order in buys] == list(trades['entry_idx'])
+    assert len(sells) == (trades['outcome'] != OPEN).sum()
+    np.testing.assert_array_equal([order.price for order in buys], indicators['nasdaq'].to_numpy()[trades['entry_idx']])
+    assert all(order.date == market.index[exit_idx] for order, exit_idx
+               in zip(sorted(sells, key=lambda o: o.trade_id), trades['exit_idx'][trades['outcome'] != OPEN]))
+    assert engine.latency_summary()['bars'] == len(market)
+
+
+def test_warm_up_then_live_matches_backtest(market, indicators, tops):
+    engine = _engine()
+    split = len(market) // 3
+    engine.warm_up(market.iloc[:split], chunk_size=997)
+    for bar in _bars(market.iloc[split:]):
+        engine.on_bar(bar)
+    np.testing.assert_array_equal(engine.ledger().trades, _expected(indicators, tops))
+
+
+def test_replay_csv_and_order_log(market, indicators, tops, bars_csv, tmp_path):
+    order_log = CsvOrderLog(str(tmp_path / 'orders.csv'))
+    engine = asyncio.run(run_live(FileBarSource(bars_csv), _engine(), order_log))
+    order_log.close()
+
+    expected = _expected(indicators, tops)
+    np.testing.assert_array_equal(engine.ledger().trades, expected)
+    orders = pd.read_csv(tmp_path / 'orders.csv')
+    assert (orders['side'] == 'BUY').sum() == len(expected)
+
+
+def test_socket_source(market, indicators, tops, bars_csv):
+    async def session():
+        server = await serve_replay(bars_csv, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            orders = []
+            engine = await run_live(SocketBarSource(port=port), _engine(), orders.append)
+        return engine, orders
+
+    engine, orders = asyncio.run(session())
+    expected = _expected(indicators, tops)
+    np.testing.assert_array_equal(engine.ledger().trades, expected)
+    assert sum(order.side == 'BUY' for order in orders) == len(expected)
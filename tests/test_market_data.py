@@ -0,0 +1,111 @@
+# FILE: tests/test_market_data.py
+# MarketDataStore: lecturas desde disco, tramos que faltan y llamadas al proveedor.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import MarketDataStore, _normalize_ohlcv, load_market_data
+
+
+class StubProvider:
+    """Barras diarias sintéticas en días hábiles (sin el 1 de enero) que registra cada llamada."""
+
+    def __init__(self, first='2019-01-02', last='2025-12-31', fail=False):
+        dates = pd.bdate_range(first, last, name='date')
+        dates = dates[~((dates.month == 1) & (dates.day == 1))]
+        close = 100 + np.random.default_rng(0).normal(0, 1, len(dates)).cumsum()
+        self.bars = pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                                  'volume': 1e6}, index=dates)
+        self.fail = fail
+        self.calls = []
+
+    def fetch(self, symbol, start, end):
+        self.calls.append((symbol, pd.Timestamp(start), pd.Timestamp(end)))
+        if self.fail:
+            raise ConnectionError('sin red')
+        bars = self.bars[(self.bars.index >= pd.Timestamp(start)) & (self.bars.index < pd.Timestamp(end))]
+        return _normalize_ohlcv(bars)
+
+
+@pytest.fixture
+def provider():
+    return StubProvider()
+
+
+@pytest.fixture
+def store(tmp_path, provider):
+    return MarketDataStore(str(tmp_path / 'cache'), provider=provider)
+
+
+def _expected(provider, start, end):
+    bars = provider.bars
+    return bars[(bars.index >= pd.Timestamp(start)) & (bars.index < pd.Timestamp(end))]
+
+
+def test_holiday_bounded_range_is_served_from_disk(store, provider):
+    # Empieza en festivo (1 de enero) y acaba en sábado: la segunda lectura no va al proveedor
+    first = store.get('QQQ', '2020-01-01', '2020-03-07')
+    assert len(provider.calls) == 1
+
+    second = store.get('QQQ', '2020-01-01', '2020-03-07')
+    assert len(provider.calls) == 1
+    pd.testing.assert_frame_equal(second, first)
+    pd.testing.assert_frame_equal(second, _expected(provider, '2020-01-01', '2020-03-07'), check_freq=False)
+
+
+def test_load_market_data_repeat_run_is_offline(store, provider):
+    first = load_market_data(store=store)
+    calls = len(provider.calls)
+
+    second = load_market_data(store=store)
+    assert len(provider.calls) == calls
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_hit_and_extensions_fetch_only_the_missing_ranges(store, provider):
+    store.get('QQQ', '2020-02-01', '2020-03-01')
+    subset = store.get('QQQ', '2020-02-10', '2020-02-20')
+    assert len(provider.calls) == 1
+    pd.testing.assert_frame_equal(subset, _expected(provider, '2020-02-10', '2020-02-20'), check_freq=False)
+
+    # Cola y cabeza nuevas: sólo se piden los tramos que faltan
+    extended = store.get('QQQ', '2020-01-01', '2020-05-01')
+    assert provider.calls[1:] == [('QQQ', pd.Timestamp('2020-01-01'), pd.Timestamp('2020-02-01')),
+                                  ('QQQ', pd.Timestamp('2020-03-01'), pd.Timestamp('2020-05-01'))]
+    pd.testing.assert_frame_equal(extended, _expected(provider, '2020-01-01', '2020-05-01'), check_freq=False)
+
+    store.get('QQQ', '2020-01-01', '2020-05-01')
+    assert len(provider.calls) == 3
+
+
+def test_past_range_without_bars_is_covered(tmp_path):
+    provider = StubProvider(last='2020-06-30')
+    store = MarketDataStore(str(tmp_path / 'cache'), provider=provider)
+    store.get('QQQ', '2020-06-01', '2020-06-15')
+    store.get('QQQ', '2020-06-01', '2021-01-01')     # el tramo de julio a diciembre no tiene barras
+    assert len(provider.calls) == 2
+
+    data = store.get('QQQ', '2020-06-01', '2021-01-01')
+    assert len(provider.calls) == 2
+    assert data.index[-1] == pd.Timestamp('2020-06-30')
+
+
+def test_open_end_is_refetched_from_the_last_bar(tmp_path):
+    provider = StubProvider(last='2020-06-30')
+    store = MarketDataStore(str(tmp_path / 'cache'), provider=provider)
+    store.get('QQQ', '2020-06-01', '2100-01-01')
+    store.get('QQQ', '2020-06-01', '2100-01-01')
+
+    # La segunda llamada pide sólo desde el día siguiente a la última barra recibida
+    assert provider.calls[1] == ('QQQ', pd.Timestamp('2020-07-01'), pd.Timestamp('2100-01-01'))
+
+
+def test_provider_failure(tmp_path):
+    with pytest.raises(RuntimeError):
+        MarketDataStore(str(tmp_path / 'cache'), provider=StubProvider(fail=True)).get('QQQ', '2020-01-01', '2020-02-01')
+
+    store = MarketDataStore(str(tmp_path / 'cache'), provider=StubProvider())
+    cached = store.get('QQQ', '2020-01-01', '2020-02-01')
+    store.provider = StubProvider(fail=True)
+    pd.testing.assert_frame_equal(store.get('QQQ', '2020-01-01', '2020-03-01'), cached)
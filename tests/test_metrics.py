@@ -0,0 +1,77 @@
+# FILE: tests/test_metrics.py
+# performance_metrics vs las definiciones de empyrical escritas con pandas, y matriz 2-D vs
+# columna a columna.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quant_stat import metrics
+from quant_stat.metrics import METRIC_NAMES, performance_metrics, returns_from_equity
+
+
+def _reference(returns, ann=252):
+    """Definiciones de empyrical con pandas (empyrical 0.5 no funciona con NumPy 2)."""
+    returns = pd.Series(returns)
+    growth = (1 + returns.fillna(0.0)).cumprod()
+    annual_return = growth.iloc[-1] ** (ann / len(returns)) - 1
+    max_drawdown = (growth / growth.cummax().clip(lower=1.0) - 1).min()
+    valid = returns.dropna()
+    downside = np.sqrt((valid.clip(upper=0.0) ** 2).mean()) * np.sqrt(ann)
+    return {
+        'annual_return': annual_return,
+        'annual_volatility': valid.std() * np.sqrt(ann),
+        'sharpe_ratio': valid.mean() / valid.std() * np.sqrt(ann),
+        'sortino_ratio': valid.mean() * ann / downside,
+        'max_drawdown': max_drawdown,
+        'calmar_ratio': annual_return / abs(max_drawdown),
+    }
+
+
+@pytest.fixture(scope='module')
+def returns(market):
+    return market['nasdaq'].pct_change().iloc[1:].to_numpy()
+
+
+def test_matches_reference(returns):
+    result = performance_metrics(returns)
+    for name, value in _reference(returns).items():
+        assert result[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_nan_returns_are_skipped(returns):
+    holed = returns.copy()
+    holed[::50] = np.nan
+    result = performance_metrics(holed, period='weekly')
+    for name, value in _reference(holed, ann=52).items():
+        assert result[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_matrix_matches_column_by_column(returns):
+    rng = np.random.default_rng(0)
+    matrix = np.column_stack([returns, rng.normal(0.001, 0.02, len(returns)), np.zeros(len(returns))])
+    result = performance_metrics(matrix)
+    for k in range(matrix.shape[1]):
+        # Las sumas por eje de la matriz se agrupan distinto que en 1-D: iguales salvo redondeo
+        single = performance_metrics(matrix[:, k])
+        for name in METRIC_NAMES:
+            np.testing.assert_allclose(result[name][k], single[name], rtol=1e-12, err_msg=f"{name}[{k}]")
+    # Sin pérdidas no hay drawdown ni Calmar
+    assert result['max_drawdown'][2] == 0.0 and np.isnan(result['calmar_ratio'][2])
+
+
+def test_short_series_and_wrappers(returns):
+    one = performance_metrics([0.01])
+    assert one['annual_return'] == pytest.approx(1.01 ** 252 - 1)
+    assert np.isnan(one['sharpe_ratio']) and np.isnan(one['annual_volatility'])
+    assert all(np.isnan(value) for value in performance_metrics([]).values())
+
+    full = performance_metrics(returns)
+    assert metrics.sharpe_ratio(returns) == full['sharpe_ratio']
+    assert metrics.max_drawdown(returns) == full['max_drawdown']
+    assert metrics.calmar_ratio(returns) == full['calmar_ratio']
+
+
+def test_returns_from_equity():
+    equity = np.array([[100.0, 50.0], [110.0, 50.0], [99.0, 75.0]])
+    np.testing.assert_allclose(returns_from_equity(equity), [[0.1, 0.0], [-0.1, 0.5]])
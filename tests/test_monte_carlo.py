@@ -0,0 +1,82 @@
+# FILE: tests/test_monte_carlo.py
+# Monte Carlo: estadísticas por camino a mano, reproducibilidad con semilla y bloques == una pasada.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quant_stat.monte_carlo import DISTRIBUTION_COLUMNS, monte_carlo, path_statistics, resample_matrix
+from summary_stat import main, output_mc_bands, output_mc_summary
+
+PNL = np.random.default_rng(0).normal(15, 120, 80).round(2)
+
+
+def test_path_statistics_by_hand():
+    equity, stats = path_statistics(np.array([[100.0, -300.0, 50.0], [-50.0, 20.0, 40.0]]), initial_capital=1000)
+    np.testing.assert_array_equal(equity, [[1100.0, 800.0, 850.0], [950.0, 970.0, 1010.0]])
+    np.testing.assert_array_equal(stats['final_equity'], [850.0, 1010.0])
+    np.testing.assert_allclose(stats['total_return_pct'], [-15.0, 1.0])
+    np.testing.assert_array_equal(stats['max_drawdown_usd'], [-300.0, -50.0])
+    np.testing.assert_allclose(stats['max_drawdown_pct'], [-300 / 11, -5.0])
+
+
+def test_resample_matrix():
+    rng = np.random.default_rng(1)
+    boot = resample_matrix(PNL, 50, 'bootstrap', rng)
+    assert boot.shape == (50, len(PNL)) and np.isin(boot, PNL).all()
+    shuffled = resample_matrix(PNL, 50, 'shuffle', rng)
+    np.testing.assert_array_equal(np.sort(shuffled, axis=1), np.broadcast_to(np.sort(PNL), shuffled.shape))
+    with pytest.raises(ValueError):
+        resample_matrix(PNL, 5, 'jackknife')
+
+
+@pytest.mark.parametrize('method', ['bootstrap', 'shuffle'])
+def test_seed_makes_results_reproducible(method):
+    first = monte_carlo(PNL, n_samples=2000, method=method, seed=42)
+    again = monte_carlo(PNL, n_samples=2000, method=method, seed=42)
+    for key in ('distribution', 'summary', 'equity_bands'):
+        pd.testing.assert_frame_equal(again[key], first[key], check_exact=True)
+    other = monte_carlo(PNL, n_samples=2000, method=method, seed=43)
+    assert not other['distribution'].equals(first['distribution'])
+
+
+@pytest.mark.parametrize('method', ['bootstrap', 'shuffle'])
+def test_chunked_matches_single_pass(method):
+    """Con poca memoria se procesa por bloques de filas: mismo generador, mismos resultados."""
+    single = monte_carlo(PNL, n_samples=3000, method=method, seed=7, band_samples=500)
+    chunked = monte_carlo(PNL, n_samples=3000, method=method, seed=7, band_samples=500, max_memory_mb=0.1)
+    for key in ('distribution', 'summary', 'equity_bands'):
+        pd.testing.assert_frame_equal(chunked[key], single[key], check_exact=True)
+
+
+def test_summary():
+    result = monte_carlo(PNL, n_samples=2000, method='shuffle', seed=3)
+    summary, distribution = result['summary'], result['distribution']
+    assert list(distribution.columns) == list(DISTRIBUTION_COLUMNS) and len(distribution) == 2000
+    # Reordenar no cambia el resultado final, sólo el camino
+    np.testing.assert_allclose(distribution['final_equity'], 10000 + PNL.sum())
+    assert summary.loc['final_equity', 'prob_below_observed'] == 0.0
+    assert summary.loc['final_equity', 'observed'] == pytest.approx(10000 + PNL.sum())
+    assert summary.loc['max_drawdown_usd', 'p5'] <= summary.loc['max_drawdown_usd', 'p95'] <= 0
+
+    bands = result['equity_bands']
+    assert len(bands) == len(PNL) + 1 and (bands.iloc[0] == 10000).all()
+    assert (bands.diff(axis=1).iloc[:, 1:] >= 0).all().all()
+    with pytest.raises(ValueError):
+        monte_carlo([], n_samples=10)
+
+
+def test_cli_monte_carlo_with_seed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entry = pd.Timestamp('2021-01-04') + pd.to_timedelta(np.arange(len(PNL)) * 2, unit='D')
+    pd.DataFrame({'entry_date': entry, 'exit_date': entry + pd.Timedelta(days=1), 'profit_usd': PNL}).to_csv(
+        'trades.csv', index=False)
+
+    args = ['trades.csv', '--output', '', '--monte-carlo', '500', '--mc-method', 'shuffle', '--seed', '11']
+    assert main(args) == 0
+    summary, bands = pd.read_csv(output_mc_summary, index_col=0), pd.read_csv(output_mc_bands, index_col=0)
+    expected = monte_carlo(PNL, n_samples=500, method='shuffle', seed=11)
+    np.testing.assert_allclose(summary.to_numpy(dtype=float), expected['summary'].to_numpy(dtype=float), equal_nan=True)
+    np.testing.assert_allclose(bands.to_numpy(), expected['equity_bands'].to_numpy())
+    assert main(args) == 0
+    pd.testing.assert_frame_equal(pd.read_csv(output_mc_summary, index_col=0), summary)
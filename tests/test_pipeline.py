@@ -0,0 +1,104 @@
+# FILE: tests/test_pipeline.py
+# Pipeline: resultados de las etapas y qué se recalcula al cambiar un parámetro.
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import make_market_data
+from pipeline import STAGES, Pipeline
+from quant_stat.indicators import COMPACT_COLUMNS, DERIVED_COLUMNS, compact_indicators, compute_indicators
+from strat_OM.strat_vix_long import simulate_vix_long_trades
+
+STRATEGY_STAGES = ['long_trades', 'hedge_cross', 'hedge_ema', 'combined_trades', 'portfolio']
+
+
+@pytest.fixture
+def bt(market):
+    bt = Pipeline(data=market.iloc[:3000], hedging_enabled=True, open_browser=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in STRATEGY_STAGES:
+            bt.get(name)
+    return bt
+
+
+def _cached(bt):
+    return {name for name in STAGES if bt.is_cached(name)}
+
+
+def test_stages_match_direct_calls(bt):
+    indicators, tops = bt.indicators, bt.tops
+    assert bt.data is bt._data_override
+    assert len(tops) > 5
+    expected = simulate_vix_long_trades(indicators, tops, atr_factor=bt.params['atr_factor'])
+    pd.testing.assert_frame_equal(bt.long_trades, expected)
+
+
+def test_set_recomputes_only_dependent_stages(bt):
+    indicators, tops, hedge_cross = bt.indicators, bt.tops, bt.hedge_cross
+    before = _cached(bt)
+
+    bt.set(atr_factor=4)
+    assert before - _cached(bt) == {'long_ledger', 'long_trades', 'combined_trades', 'portfolio'}
+    assert bt.indicators is indicators and bt.tops is tops and bt.hedge_cross is hedge_cross
+    pd.testing.assert_frame_equal(bt.long_trades, simulate_vix_long_trades(indicators, tops, atr_factor=4))
+
+    bt.set(factor_top=1.3)
+    assert 'indicators' in _cached(bt) and 'hedge_ema' in _cached(bt)
+    assert not bt.is_cached('tops') and not bt.is_cached('long_trades')
+
+    bt.set(n=10)
+    assert _cached(bt) == {'data'}
+
+
+def test_previous_parameters_are_served_from_cache(bt):
+    long_trades = bt.long_trades
+    bt.set(atr_factor=4)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert bt.long_trades is not long_trades
+    bt.set(atr_factor=3)
+    assert bt.long_trades is long_trades
+
+
+def test_invalidate_and_errors(bt):
+    bt.invalidate('tops')
+    assert not bt.is_cached('tops') and bt.is_cached('indicators')
+    bt.invalidate()
+    assert not _cached(bt)
+
+    with pytest.raises(ValueError):
+        bt.set(atr_factr=4)
+    with pytest.raises(KeyError):
+        bt.get('trades')
+    with pytest.raises(AttributeError):
+        bt.trades
+
+
+@pytest.mark.parametrize('costs', [{}, dict(commission=2.5, slippage_atr=0.1, gap_fills=True)])
+def test_compact_mode_keeps_the_trades(costs):
+    market = make_market_data(20000, seed=7)
+    ledgers = {}
+    for compact in (False, True):
+        bt = Pipeline(data=market, hedging_enabled=True, open_browser=False, compact=compact, **costs)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ledgers[compact] = [bt.long_ledger.trades, bt.hedge_cross_ledger.trades, bt.hedge_ema_ledger.trades]
+            ledgers[compact].append(bt.combined_trades)
+        if compact:
+            assert all(bt.indicators[column].dtype == np.float32 for column in COMPACT_COLUMNS)
+            assert all(bt.indicators[column].dtype == np.float64
+                       for column in DERIVED_COLUMNS if column not in COMPACT_COLUMNS)
+            with pytest.raises(ValueError):
+                bt.indicators.loc[bt.indicators.index[0], 'nasdaq'] = 0.0
+
+    for default, compact in zip(ledgers[False][:3], ledgers[True][:3]):
+        assert len(default)
+        np.testing.assert_array_equal(compact, default)
+    pd.testing.assert_frame_equal(ledgers[True][3], ledgers[False][3])
+
+
+def test_compact_indicators_only_downcasts_the_moving_averages(market):
+    df = compact_indicators(compute_indicators(market.iloc[:3000].copy()))
+    assert [column for column in df.columns if df[column].dtype == np.float32] == COMPACT_COLUMNS
@@ -0,0 +1,70 @@
+# FILE: tests/test_portfolio.py
+# mark_to_market y to_daily sobre una curva calculada a mano.
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import Pipeline
+from strat_OM.portfolio import mark_to_market, portfolio_summary, to_daily
+from strat_OM.trade_ledger import HEDGE_SHORT_CROSS, STOP, STOP_TRAIL, VIX_LONG, TradeLedger
+
+CLOSE = [100.0, 102.0, 101.0, 105.0, 103.0, 104.0]
+DATES = pd.DatetimeIndex(['2020-01-02 10:00', '2020-01-02 11:00', '2020-01-02 12:00',
+                          '2020-01-03 10:00', '2020-01-03 11:00', '2020-01-03 12:00'])
+
+# Barra a barra, con un largo (entrada 1 a 102, salida 3 a 105: +150 USD) y un corto de
+# cobertura solapado (entrada 2 a 101, salida 4 a 103: -100 USD), 50 USD por punto
+EXPECTED = pd.DataFrame({
+    'equity': [10000.0, 10000.0, 9950.0, 9950.0, 10050.0, 10050.0],
+    'realized': [0.0, 0.0, 0.0, 150.0, 50.0, 50.0],
+    'unrealized': [0.0, 0.0, -50.0, -200.0, 0.0, 0.0],
+    'net_exposure': [0.0, 5100.0, 0.0, -5250.0, 0.0, 0.0],
+    'gross_exposure': [0.0, 5100.0, 10100.0, 5250.0, 0.0, 0.0],
+    'open_trades': [0, 1, 2, 1, 0, 0],
+    'drawdown': [0.0, 0.0, -50.0, -50.0, 0.0, 0.0],
+    'drawdown_pct': [0.0, 0.0, -0.005, -0.005, 0.0, 0.0],
+}, index=DATES)
+
+
+@pytest.fixture
+def ledger():
+    ledger = TradeLedger(dates=DATES)
+    ledger.append(VIX_LONG, 1, 3, 102.0, 105.0, STOP_TRAIL, 150.0)
+    ledger.append(HEDGE_SHORT_CROSS, 2, 4, 101.0, 103.0, STOP, -100.0)
+    return ledger
+
+
+def test_mark_to_market_matches_hand_computed_curve(ledger):
+    pd.testing.assert_frame_equal(mark_to_market(ledger, CLOSE), EXPECTED)
+
+
+def test_to_daily_uses_end_of_day_exposure(ledger):
+    daily = to_daily(mark_to_market(ledger, CLOSE))
+    expected = pd.DataFrame({
+        'equity': [9950.0, 10050.0], 'realized': [0.0, 50.0], 'unrealized': [-50.0, 0.0],
+        'net_exposure': [0.0, 0.0], 'gross_exposure': [10100.0, 0.0], 'open_trades': [2, 1],
+        'drawdown': [-50.0, -50.0], 'drawdown_pct': [-0.005, -0.005],
+    }, index=pd.DatetimeIndex(['2020-01-02', '2020-01-03']))
+    pd.testing.assert_frame_equal(daily, expected, check_names=False)
+
+
+def test_summary(ledger):
+    summary = portfolio_summary(mark_to_market(ledger, CLOSE))
+    assert summary['final_equity'] == 10050.0 and summary['max_drawdown_usd'] == -50.0
+    assert summary['max_gross_exposure'] == 10100.0 and summary['max_open_trades'] == 2
+    assert summary['time_in_market_pct'] == pytest.approx(50.0)
+
+
+def test_pipeline_curve_ends_at_realized_profit(market):
+    bt = Pipeline(data=market, hedging_enabled=True, open_browser=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        portfolio, combined = bt.portfolio, bt.combined_trades
+    total_pnl = sum(ledger['pnl'].sum() for ledger in (bt.long_ledger, bt.hedge_cross_ledger, bt.hedge_ema_ledger))
+    assert len(combined) > 10
+    assert portfolio['equity'].iloc[-1] == pytest.approx(bt.params['initial_capital'] + total_pnl)
+    assert portfolio['realized'].iloc[-1] == pytest.approx(total_pnl)
+    assert np.all(portfolio['drawdown'] <= 0)
@@ -0,0 +1,63 @@
+# FILE: tests/test_strat_vix_long.py
+# Simulador por índices de eventos vs el recorrido barra a barra original.
+
+import numpy as np
+import pandas as pd
+
+from strat_OM.strat_vix_long import simulate_vix_long_ledger, simulate_vix_long_trades
+from tests.conftest import ATR_FACTOR
+
+
+def _bar_loop_trades(df, tops_df, atr_factor):
+    """La simulación original (una operación cada vez, barra a barra) y su DataFrame de operaciones."""
+    close, low = df['nasdaq'].to_numpy(), df['low_nasdaq'].to_numpy()
+    trail, nasdaq_atr = df['atr_trailing_stop'].to_numpy(), df['nasdaq_atr'].to_numpy()
+    n = len(df)
+    records = []
+    for e in df.index.get_indexer(pd.to_datetime(tops_df['top_confirm'])):
+        if e < 0 or np.isnan(nasdaq_atr[e]):
+            continue
+        entry_price = close[e]
+        fixed_stop = entry_price - atr_factor * nasdaq_atr[e]
+        use_trailing_stop = False
+        outcome, exit_idx, exit_price = 'open', (n - 1 if e < n - 1 else e), None
+        for i in range(e + 1, n):
+            if use_trailing_stop:
+                if low[i] < trail[i]:
+                    outcome, exit_idx, exit_price = 'stop_trail', i, trail[i]
+                    break
+            elif low[i] < fixed_stop:
+                outcome, exit_idx, exit_price = 'stop_fixed', i, fixed_stop
+                break
+            if not use_trailing_stop and not np.isnan(trail[i]) and close[i] > trail[i]:
+                use_trailing_stop = True
+        if exit_price is None:
+            exit_price = close[exit_idx]
+        profit_points = exit_price - entry_price
+        records.append({
+            'entry_date': df.index[e], 'entry_price': round(entry_price, 2),
+            'exit_date': df.index[exit_idx], 'exit_price': round(exit_price, 2),
+            'outcome': outcome, 'profit_points': round(profit_points, 2),
+            'profit_usd': round(profit_points * 50, 2), 'return_pct': profit_points / entry_price,
+        })
+    return pd.DataFrame(records)
+
+
+def test_trades_match_bar_loop(indicators, tops):
+    expected = _bar_loop_trades(indicators, tops, ATR_FACTOR)
+    result = simulate_vix_long_trades(indicators, tops, atr_factor=ATR_FACTOR)
+
+    assert len(expected) > 10
+    assert {'stop_fixed', 'stop_trail'} <= set(expected['outcome'])
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_ledger_appends_after_existing_trades(indicators, tops):
+    ledger = simulate_vix_long_ledger(indicators, tops, atr_factor=ATR_FACTOR)
+    twice = simulate_vix_long_ledger(indicators, tops, atr_factor=ATR_FACTOR,
+                                     ledger=simulate_vix_long_ledger(indicators, tops, atr_factor=ATR_FACTOR))
+    np.testing.assert_array_equal(twice.trades, np.concatenate([ledger.trades, ledger.trades]))
+
+
+def test_no_tops_no_trades(indicators, tops):
+    assert len(simulate_vix_long_ledger(indicators, tops.iloc[:0], atr_factor=ATR_FACTOR)) == 0
@@ -0,0 +1,93 @@
+# FILE: tests/test_summary_stat.py
+# summary_stat sin interacción: CLI, tabla consolidada y paralelo == serie.
+
+import builtins
+import webbrowser
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import summary_stat
+from summary_stat import compute_ratios, find_trade_logs, main, summarize_trade_logs
+
+
+def _trade_log(seed, n=60):
+    rng = np.random.default_rng(seed)
+    entry = pd.Timestamp('2021-01-04') + pd.to_timedelta(np.sort(rng.choice(400, n, replace=False)), unit='D')
+    return pd.DataFrame({'entry_date': entry, 'exit_date': entry + pd.Timedelta(hours=20),
+                         'profit_usd': np.round(rng.normal(20, 150, n), 2)})
+
+
+@pytest.fixture(autouse=True)
+def offline(tmp_path, monkeypatch):
+    """Sin stdin ni navegador: cualquier intento falla el test."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(builtins, 'input', lambda *a: pytest.fail("input() llamado"))
+    monkeypatch.setattr(webbrowser, 'open', lambda *a, **k: pytest.fail("navegador abierto"))
+
+
+@pytest.fixture
+def sweep_dir(tmp_path):
+    root = tmp_path / 'sweep_trades'
+    (root / 'sub').mkdir(parents=True)
+    for i in range(3):
+        _trade_log(i).to_csv(root / f'combo_{i}.csv', index=False)
+    _trade_log(3).to_csv(root / 'sub' / 'combo_3.csv', index=False)
+    pd.DataFrame({'a': [1, 2]}).to_csv(root / 'not_a_log.csv', index=False)
+    return root
+
+
+def test_find_trade_logs_skips_other_csv(sweep_dir):
+    found = find_trade_logs([str(sweep_dir)])
+    assert [p.rsplit('/', 1)[-1] for p in found] == ['combo_0.csv', 'combo_1.csv', 'combo_2.csv', 'combo_3.csv']
+    with pytest.raises(FileNotFoundError):
+        find_trade_logs([str(sweep_dir / 'missing.csv')])
+
+
+def test_ratios_by_hand():
+    trades = _trade_log(0)
+    ratios = compute_ratios(trades, initial_capital=10000)
+    profit = trades['profit_usd']
+    assert ratios['Total Profit ($)'] == pytest.approx(profit.sum())
+    # Como el original: rentabilidad desde la equity del primer día con salidas
+    first_day = profit[trades['exit_date'].dt.date == trades['exit_date'].dt.date.iloc[0]].sum()
+    assert ratios['Total Return (%)'] == pytest.approx(((10000 + profit.sum()) / (10000 + first_day) - 1) * 100)
+    assert ratios['Win Rate (%)'] == pytest.approx((profit > 0).mean() * 100)
+    assert ratios['Number of Trades'] == len(trades)
+
+
+def test_parallel_table_matches_serial(sweep_dir):
+    serial = summarize_trade_logs([str(sweep_dir)], max_workers=1)
+    parallel = summarize_trade_logs([str(sweep_dir)], max_workers=2)
+    pd.testing.assert_frame_equal(parallel, serial)
+    one = compute_ratios(summary_stat.load_trade_log(serial.index[1]))
+    assert serial.iloc[1].to_dict() == pytest.approx(one)
+
+
+def test_cli_writes_consolidated_table(sweep_dir, tmp_path):
+    output = tmp_path / 'out' / 'metrics.csv'
+    assert main([str(sweep_dir), '--workers', '1', '--capital', '5000', '--output', str(output)]) == 0
+    table = pd.read_csv(output, index_col='file')
+    assert len(table) == 4
+    expected = summarize_trade_logs([str(sweep_dir)], max_workers=1, initial_capital=5000)
+    np.testing.assert_allclose(table['Total Return (%)'], expected['Total Return (%)'])
+
+
+def test_cli_bad_log_reports_error(tmp_path):
+    bad = tmp_path / 'bad.csv'
+    pd.DataFrame({'exit_date': ['2021-01-04'], 'other': [1]}).to_csv(bad, index=False)
+    assert main([str(bad), '--workers', '1', '--output', '']) == 1
+    good = tmp_path / 'good.csv'
+    _trade_log(1).to_csv(good, index=False)
+    table = summarize_trade_logs([str(bad), str(good)], max_workers=1)
+    assert table['error'].notna().tolist() == [True, False]
+
+
+def test_cli_single_log_options(sweep_dir, tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(sweep_dir), '--workers', '1', '--output', '', '--charts'])
+    log = str(sweep_dir / 'combo_0.csv')
+    assert main([log, '--output', '', '--charts']) == 0
+    assert (tmp_path / summary_stat.output_html_equity).exists()
+    assert (tmp_path / summary_stat.output_html_drawdown).exists()
@@ -0,0 +1,50 @@
+# FILE: tests/test_sweep.py
+# El barrido en paralelo (memoria compartida, bloques de combinaciones) vs una ejecución en serie.
+
+import pandas as pd
+import pytest
+
+from quant_stat.indicators import compute_indicators
+from sweep import INDICATOR_PARAMS, _evaluate_combos, expand_grid, run_sweep
+
+GRID = {
+    'atr_multiplier': [3.0, 4.0],
+    'window_top': [10, 15],
+    'factor_top': [1.2],
+    'atr_factor': [2, 3],
+    'hedge_atr_multiplier': [0.5, 1.0],
+    'hedging_enabled': [True],
+}
+
+
+@pytest.fixture(scope='module')
+def sweep_data(market):
+    return market.iloc[:3000]
+
+
+def _serial_sweep(df, param_grid):
+    """Cada combinación por separado: sus indicadores, sus techos y sus coberturas, sin memoria compartida."""
+    rows = []
+    for params in expand_grid(param_grid):
+        frame = compute_indicators(df.copy(), **{key: params[key] for key in INDICATOR_PARAMS})
+        rows.extend(_evaluate_combos(frame, [params], {}))
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('max_workers', [1, 3])
+def test_sweep_matches_serial_run(sweep_data, max_workers):
+    expected = _serial_sweep(sweep_data, GRID)
+    result = run_sweep(sweep_data, GRID, max_workers=max_workers, output_path=None)
+
+    assert len(result) == len(expand_grid(GRID)) == 16
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_sweep_trade_logs(sweep_data, tmp_path):
+    result = run_sweep(sweep_data, GRID, max_workers=2, output_path=str(tmp_path / 'sweep.csv'),
+                       trade_log_dir=str(tmp_path / 'logs'))
+
+    saved = pd.read_csv(tmp_path / 'sweep.csv')
+    assert list(saved['trade_log']) == list(result['trade_log'])
+    for path, total in zip(result['trade_log'], result['total_trades']):
+        assert len(pd.read_csv(path)) == total
@@ -0,0 +1,79 @@
+# FILE: tests/test_universe.py
+# Universo (matrices T x K): indicadores y operaciones vs la referencia activo a activo.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import make_market_data
+from quant_stat.find_vix_tops import find_vix_tops
+from quant_stat.indicators import DERIVED_COLUMNS, compute_indicators, compute_indicators_2d
+from strat_OM.execution import ExecutionModel
+from strat_OM.strat_vix_long import simulate_vix_long_ledger
+from tests.conftest import ATR_FACTOR, FACTOR_TOP, N_BARS, SEED, TOPS_COLUMNS, WINDOW_TOP
+from universe import UniversePrices, run_universe
+
+
+@pytest.fixture(scope='module')
+def frames(market):
+    return [market] + [make_market_data(N_BARS, seed=SEED + k) for k in (1, 2)]
+
+
+@pytest.fixture(scope='module')
+def prices(frames):
+    """Tres activos y dos índices de volatilidad: el activo 1 lo dirige el segundo."""
+    def matrix(column):
+        return np.column_stack([frame[column].to_numpy() for frame in frames])
+    driver = np.column_stack([frames[0]['VIX'].to_numpy(), frames[1]['VIX'].to_numpy()])
+    return UniversePrices(frames[0].index, ['A', 'B', 'C'], matrix('nasdaq'), matrix('high_nasdaq'),
+                          matrix('low_nasdaq'), matrix('nasdaq_volume_M'), ['VIX', 'VXN'], driver, [0, 1, 0],
+                          open=matrix('open_nasdaq'))
+
+
+def _per_asset(prices, k):
+    return compute_indicators(prices.instrument_frame(prices.symbols[k]))
+
+
+def test_indicators_match_per_asset(prices):
+    result = compute_indicators_2d(prices.close, prices.high, prices.low, prices.driver)
+    for k in range(len(prices.symbols)):
+        expected = _per_asset(prices, k)
+        np.testing.assert_array_equal(result['atr'][:, prices.driver_of[k]], expected['atr'].to_numpy())
+        for column in DERIVED_COLUMNS[1:]:
+            np.testing.assert_array_equal(result[column][:, k], expected[column].to_numpy(), err_msg=column)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+@pytest.mark.parametrize('execution', [None, ExecutionModel(commission=2.5, slippage_ticks=1, gap_fills=True)])
+def test_run_universe_matches_per_asset(prices, max_workers, execution):
+    ledger = run_universe(prices, window_top=WINDOW_TOP, factor_top=FACTOR_TOP, atr_factor=ATR_FACTOR,
+                          execution=execution, max_workers=max_workers)
+    assert ledger.instruments == prices.symbols
+
+    trades = ledger.trades
+    assert np.all(np.diff(trades['entry_idx']) >= 0)
+    for k in range(len(prices.symbols)):
+        frame = _per_asset(prices, k)
+        tops = pd.DataFrame(find_vix_tops(frame, window_top=WINDOW_TOP, factor_top=FACTOR_TOP), columns=TOPS_COLUMNS)
+        expected = simulate_vix_long_ledger(frame, tops, atr_factor=ATR_FACTOR, execution=execution).trades
+        got = trades[trades['instrument'] == k]
+        assert len(expected) > 5
+        for field in ('entry_idx', 'exit_idx', 'entry_price', 'exit_price', 'outcome', 'pnl'):
+            np.testing.assert_array_equal(got[field], expected[field], err_msg=f"{prices.symbols[k]}.{field}")
+
+
+def test_from_frames_alignment():
+    dates = pd.date_range('2021-01-04', periods=4, freq='D')
+    ohlcv = lambda idx, base: pd.DataFrame({'open': base, 'close': base + 1.0, 'high': base + 2.0, 'low': base - 1.0,
+                                            'volume': 2e6}, index=idx)
+    prices = {'A': ohlcv(dates, np.arange(4.0)), 'B': ohlcv(dates[1:], np.arange(3.0))}
+    drivers = {'^VIX': pd.DataFrame({'close': [20.0, 21.0, 22.0, 23.0]}, index=dates)}
+    universe = {'A': '^VIX', 'B': '^VIX'}
+
+    inner = UniversePrices.from_frames(prices, drivers, universe)
+    assert list(inner.dates) == list(dates[1:])
+    np.testing.assert_array_equal(inner.close, [[20.0, 10.0], [30.0, 20.0], [40.0, 30.0]])
+    np.testing.assert_array_equal(inner.driver[:, 0], [21.0, 22.0, 23.0])
+
+    outer = UniversePrices.from_frames(prices, drivers, universe, how='outer')
+    assert len(outer.dates) == 4 and np.isnan(outer.close[0, 1]) and outer.volume[0, 0] == 2.0
@@ -0,0 +1,81 @@
+# FILE: tests/test_vix_spike_indicator.py
+# find_vix_quiet_days vs el bucle por bloques original, y VixQuietDetector vs la versión por lotes.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from quant_stat.vix_spike_indicator import VixQuietDetector, find_vix_quiet_days
+from tests.conftest import chunks
+
+CASES = [(50, 0.8), (20, 0.9), (50, 1.0)]
+
+
+def _groupby_quiet_days(df, window, threshold):
+    """La versión original: un bucle sobre los bloques de groupby."""
+    quiet = (df['VIX'] < threshold * df['VIX'].rolling(window=window).mean()).fillna(False)
+    result = pd.Series(False, index=quiet.index)
+    for _, group in quiet.groupby((quiet != quiet.shift()).cumsum()):
+        if group.iloc[-1]:
+            result.loc[group.index[-1]] = True
+    return result
+
+
+@pytest.fixture(scope='module')
+def plateaus():
+    """VIX con tramos constantes: con umbral 1.0 el VIX empata con su media en muchas barras."""
+    rng = np.random.default_rng(3)
+    values = []
+    for _ in range(40):
+        values += [round(rng.uniform(10, 40), 2)] * int(rng.integers(55, 90))
+        values += list(np.round(rng.uniform(10, 40, 20), 2))
+    return pd.DataFrame({'VIX': values}, index=pd.date_range('2020-01-01', periods=len(values), freq='D'))
+
+
+@pytest.fixture(params=['market', 'plateaus'])
+def vix(request, market, plateaus):
+    return market[['VIX']] if request.param == 'market' else plateaus
+
+
+def _closed_blocks(batch):
+    """Últimos días de los bloques tranquilos que se rompen antes del final de los datos."""
+    ends = batch[batch].index
+    return list(ends[:-1]) if len(batch) and batch.iloc[-1] else list(ends)
+
+
+@pytest.mark.parametrize('window, threshold', CASES)
+def test_batch_matches_groupby_loop(vix, window, threshold):
+    result = find_vix_quiet_days(vix, window=window, threshold=threshold)
+    pd.testing.assert_series_equal(result, _groupby_quiet_days(vix, window, threshold), check_names=False)
+
+
+@pytest.mark.parametrize('window, threshold', CASES)
+@pytest.mark.parametrize('chunk_size', [1, 7, 997, None])
+def test_streaming_matches_batch(vix, window, threshold, chunk_size):
+    batch = find_vix_quiet_days(vix, window=window, threshold=threshold)
+    detector = VixQuietDetector(window=window, threshold=threshold)
+    events = [event for _, chunk in chunks(vix, chunk_size or len(vix)) for event in detector.update(chunk)]
+
+    assert len(events) > 10
+    assert [event[1] for event in events] == _closed_blocks(batch)
+    # La ruptura es la barra siguiente al último día tranquilo
+    positions = vix.index.get_indexer([event[2] for event in events])
+    assert list(vix.index[positions - 1]) == [event[1] for event in events]
+
+
+def test_saved_state_resumes(plateaus, tmp_path):
+    expected = VixQuietDetector(window=50, threshold=1.0).update(plateaus)
+    detector = VixQuietDetector(window=50, threshold=1.0)
+    events = []
+    for i, (_, chunk) in enumerate(chunks(plateaus, 333)):
+        events.extend(detector.update(chunk.iloc[:1]))
+        events.extend(detector.update(chunk.iloc[1:]))
+        detector.save(tmp_path / f'quiet_{i}.json')
+        detector = VixQuietDetector.load(tmp_path / f'quiet_{i}.json')
+    assert events == expected
+
+
+def test_single_bar_series(plateaus):
+    detector = VixQuietDetector(window=50, threshold=1.0)
+    events = [event for i in range(len(plateaus)) for event in detector.update(plateaus.iloc[i])]
+    assert events == VixQuietDetector(window=50, threshold=1.0).update(plateaus)
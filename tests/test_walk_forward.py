@@ -0,0 +1,93 @@
+# FILE: tests/test_walk_forward.py
+# Ventanas walk-forward y optimización: tramos, selección sin mirar al futuro y registro fuera de muestra.
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import make_market_data
+from sweep import expand_grid
+from walk_forward import run_walk_forward, walk_forward_windows
+
+GRID = {'window_top': [10, 15], 'factor_top': [1.1, 1.2], 'atr_factor': [2, 3], 'hedge_atr_multiplier': [0.5, 1.0]}
+
+
+@pytest.fixture(scope='module')
+def daily():
+    return make_market_data(2500, seed=5, freq='D')
+
+
+def _run(df, param_grid=GRID, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_walk_forward(df, param_grid=param_grid, train_months=24, test_months=12, max_workers=1,
+                                output_dir=None, **kwargs)
+
+
+def test_windows_by_hand():
+    index = pd.date_range('2010-01-01', '2013-03-31', freq='D')
+    pos = index.get_loc
+    assert walk_forward_windows(index, train_months=12, test_months=12) == [
+        (0, pos('2011-01-01'), pos('2011-01-01'), pos('2012-01-01')),
+        (pos('2011-01-01'), pos('2012-01-01'), pos('2012-01-01'), pos('2013-01-01')),
+        (pos('2012-01-01'), pos('2013-01-01'), pos('2013-01-01'), len(index)),
+    ]
+    anchored = walk_forward_windows(index, train_months=12, test_months=6, step_months=12, anchored=True)
+    assert [w[0] for w in anchored] == [0, 0, 0]
+    assert [w[2:] for w in anchored] == [(pos('2011-01-01'), pos('2011-07-01')), (pos('2012-01-01'), pos('2012-07-01')),
+                                         (pos('2013-01-01'), len(index))]
+    assert walk_forward_windows(index, train_months=48) == []
+
+
+def test_oos_trades_stay_inside_their_test_windows(daily, tmp_path):
+    windows, oos = _run(daily)
+    assert len(windows) == 5 and len(oos) > 20
+
+    # Tramos de prueba contiguos, cada uno justo después de su entrenamiento
+    assert (windows['test_start'].iloc[1:].to_numpy() > windows['test_end'].iloc[:-1].to_numpy()).all()
+    assert (windows['train_end'] < windows['test_start']).all()
+
+    window_of = np.searchsorted(windows['test_start'].to_numpy(), oos['entry_date'].to_numpy(), side='right') - 1
+    assert (window_of >= 0).all()
+    assert (oos['exit_date'].to_numpy() <= windows['test_end'].to_numpy()[window_of]).all()
+    profit = oos.groupby(window_of)['profit_usd'].sum().reindex(range(len(windows)), fill_value=0.0)
+    np.testing.assert_allclose(profit, windows['test_total_profit_usd'], atol=0.01 * len(oos))
+    assert windows['test_trades'].sum() == len(oos)
+
+
+def test_selection_does_not_look_ahead(daily):
+    """La ventana 0 (elección y operaciones de prueba) no cambia si se quita la historia posterior."""
+    windows, oos = _run(daily)
+    cut = daily.index.searchsorted(windows['test_end'].iloc[0], side='right')
+    first, first_oos = _run(daily.iloc[:cut])
+    assert len(first) == 1
+    pd.testing.assert_series_equal(first.iloc[0], windows.iloc[0], check_names=False)
+    pd.testing.assert_frame_equal(first_oos, oos[oos['entry_date'] <= windows['test_end'].iloc[0]].reset_index(drop=True))
+
+
+def test_objective_picks_the_best_train_score(daily):
+    windows, _ = _run(daily, objective='total_profit_usd')
+    # Cada combinación sola: la elegida en cada ventana es la de mayor beneficio de entrenamiento
+    scores = []
+    for combo in expand_grid(GRID):
+        fixed, _ = _run(daily, objective='total_profit_usd',
+                        param_grid={key: [value] for key, value in combo.items() if key in GRID})
+        scores.append(fixed['train_total_profit_usd'].to_numpy())
+    scores = np.array(scores)
+    np.testing.assert_array_equal(windows['train_total_profit_usd'], scores.max(axis=0))
+    assert len(set(map(tuple, windows[list(GRID)].to_numpy()))) > 1
+
+
+def test_outputs_and_errors(daily, tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        windows, oos = run_walk_forward(daily, param_grid=GRID, train_months=24, test_months=12, max_workers=1,
+                                        output_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'walk_forward_windows.csv', parse_dates=[0, 1, 2, 3]), windows)
+    assert len(pd.read_csv(tmp_path / 'walk_forward_oos_trades.csv')) == len(oos)
+
+    with pytest.raises(ValueError):
+        run_walk_forward(daily, param_grid={'n': [5, 10]}, max_workers=1, output_dir=None)
+    with pytest.raises(ValueError):
+        run_walk_forward(daily.iloc[:300], train_months=24, max_workers=1, output_dir=None)
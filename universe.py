@@ -0,0 +1,207 @@
+# FILE: universe.py
+# Estrategia VIX-top sobre un universo de activos (SPY, IWM, sectoriales, futuros...) en un
+# solo proceso padre.
+#
+# Todos los activos se guardan en matrices (T, K) alineadas por fecha, con un activo por
+# columna; cada activo tiene su índice de volatilidad (VIX, VXN, RVX...). Los indicadores
+# de todo el universo se calculan en una sola llamada vectorizada, los techos se buscan
+# una vez por índice de volatilidad, y las operaciones de cada activo se simulan en
+# paralelo con la misma `simulate_vix_long_ledger`. El resultado es un único TradeLedger
+# con la columna `instrument`.
+#
+#   prices = load_universe({'QQQ': '^VXN', 'SPY': '^VIX', 'IWM': '^RVX'}, start='2015-01-01', end='2025-08-01')
+#   ledger = run_universe(prices, window_top=15, factor_top=1.2)
+#   ledger.to_frame()
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from market_data import MarketDataStore, instrument_columns, normalize_instrument
+from quant_stat.find_vix_tops import find_vix_tops
+from quant_stat.indicators import compute_indicators_2d
+from strat_OM.strat_vix_long import simulate_vix_long_ledger
+from strat_OM.trade_ledger import TradeLedger, merge_ledgers
+
+DEFAULT_UNIVERSE = {
+    'QQQ': '^VXN',
+    'SPY': '^VIX',
+    'IWM': '^RVX',
+    'XLK': '^VIX',
+    'XLF': '^VIX',
+}
+PRICE_SCALE = 10
+TOPS_COLUMNS = ['tag', 'index_top_pos', 'VIX_top', 'top_confirm']
+
+# Matrices que necesita cada simulación: (campo, columna del esquema del sistema)
+SIM_FIELDS = [('close', 'nasdaq'), ('high', 'high_nasdaq'), ('low', 'low_nasdaq'),
+              ('atr_trailing_stop', 'atr_trailing_stop'), ('nasdaq_atr', 'nasdaq_atr'), ('open', 'open_nasdaq')]
+
+# Estado del proceso hijo: matrices del universo montadas sobre la memoria compartida
+_worker_fields = None
+_worker_dates = None
+_worker_shm = []
+
+
+class UniversePrices:
+    """
+    Precios de un universo alineados por fecha.
+
+    Attributes:
+        dates: DatetimeIndex común (T barras).
+        symbols: nombres de los K activos (orden de las columnas).
+        close, high, low, volume: matrices (T, K), precios x `PRICE_SCALE` como en `normalize_instrument`.
+        open: matriz (T, K) de aperturas (NaN si la fuente no las trae: sin gaps).
+        drivers: nombres de los D índices de volatilidad.
+        driver: matriz (T, D) con el cierre de cada índice de volatilidad.
+        driver_of: array de K posiciones: el índice de volatilidad de cada activo.
+    """
+
+    def __init__(self, dates, symbols, close, high, low, volume, drivers, driver, driver_of, open=None):
+        self.dates = dates
+        self.symbols = tuple(symbols)
+        self.close, self.high, self.low, self.volume = close, high, low, volume
+        self.open = open if open is not None else np.full_like(close, np.nan)
+        self.drivers = tuple(drivers)
+        self.driver = driver
+        self.driver_of = np.asarray(driver_of, dtype=np.int64)
+
+    @classmethod
+    def from_frames(cls, prices, driver_prices, universe, scale=PRICE_SCALE, how='inner'):
+        """
+        Construye el universo a partir de datos OHLCV por símbolo (formato de `MarketDataStore.get`).
+
+        Args:
+            prices: dict símbolo -> OHLCV del activo.
+            driver_prices: dict índice de volatilidad -> OHLCV.
+            universe: dict símbolo -> índice de volatilidad que lo dirige.
+            how: 'inner' (sólo fechas comunes a todos los activos) u 'outer' (unión, con NaN).
+        """
+        symbols = list(universe)
+        drivers = list(dict.fromkeys(universe.values()))
+        frames = {sym: normalize_instrument(prices[sym].rename_axis('date'), name=sym, scale=scale).set_index('date')
+                  for sym in symbols}
+
+        dates = frames[symbols[0]].index
+        for sym in symbols[1:]:
+            dates = dates.intersection(frames[sym].index) if how == 'inner' else dates.union(frames[sym].index)
+        dates = dates.sort_values()
+
+        def matrix(field):
+            columns = [frames[sym].get(instrument_columns(sym)[field]) for sym in symbols]
+            return np.column_stack([column.reindex(dates).to_numpy(dtype=float) if column is not None
+                                    else np.full(len(dates), np.nan) for column in columns])
+
+        # Los índices de volatilidad se alinean a las fechas de los activos (como el left join de main.py)
+        driver = np.column_stack([driver_prices[name]['close'].reindex(dates).to_numpy(dtype=float)
+                                  for name in drivers])
+        return cls(dates, symbols, matrix('close'), matrix('high'), matrix('low'), matrix('volume'),
+                   drivers, driver, [drivers.index(universe[sym]) for sym in symbols], open=matrix('open'))
+
+    def instrument_frame(self, symbol, indicators=None):
+        """DataFrame de un activo con las columnas del sistema ('open_nasdaq', 'nasdaq', ..., 'VIX')."""
+        k = self.symbols.index(symbol)
+        d = self.driver_of[k]
+        frame = pd.DataFrame({
+            'open_nasdaq': self.open[:, k], 'nasdaq': self.close[:, k], 'high_nasdaq': self.high[:, k], 'low_nasdaq': self.low[:, k],
+            'nasdaq_volume_M': self.volume[:, k], 'VIX': self.driver[:, d],
+        }, index=self.dates)
+        for name, values in (indicators or {}).items():
+            frame[name] = values[:, d] if name == 'atr' else values[:, k]
+        return frame
+
+
+def load_universe(universe=None, start='2020-01-01', end='2025-08-01', store=None, how='inner'):
+    """Descarga (o lee de la caché) todos los activos y sus índices de volatilidad."""
+    universe = universe or DEFAULT_UNIVERSE
+    store = store if store is not None else MarketDataStore()
+    prices = {sym: store.get(sym, start, end) for sym in universe}
+    driver_prices = {name: store.get(name, start, end) for name in dict.fromkeys(universe.values())}
+    return UniversePrices.from_frames(prices, driver_prices, universe, how=how)
+
+
+def _share_fields(fields, dates):
+    """Copia las matrices de simulación y las fechas a memoria compartida."""
+    values = np.ascontiguousarray(np.stack(fields))
+    dates = dates.values.astype('datetime64[ns]').view(np.int64)
+    shm_values = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    shm_dates = shared_memory.SharedMemory(create=True, size=max(dates.nbytes, 1))
+    np.ndarray(values.shape, dtype=np.float64, buffer=shm_values.buf)[:] = values
+    np.ndarray(dates.shape, dtype=np.int64, buffer=shm_dates.buf)[:] = dates
+    return [shm_values, shm_dates], (shm_values.name, shm_dates.name, values.shape)
+
+
+def _attach_fields(spec):
+    """Inicializador de cada proceso hijo: monta las matrices sobre la memoria compartida."""
+    global _worker_fields, _worker_dates, _worker_shm
+    values_name, dates_name, shape = spec
+    shm_values = shared_memory.SharedMemory(name=values_name)
+    shm_dates = shared_memory.SharedMemory(name=dates_name)
+    _worker_shm = [shm_values, shm_dates]
+    _worker_fields = np.ndarray(shape, dtype=np.float64, buffer=shm_values.buf)
+    _worker_dates = pd.DatetimeIndex(np.ndarray((shape[1],), dtype=np.int64, buffer=shm_dates.buf).view('datetime64[ns]'))
+
+
+def _simulate_instrument(k, tops_df, atr_factor, execution=None):
+    """Tarea de un proceso hijo: operaciones del activo `k` (array estructurado del ledger)."""
+    frame = pd.DataFrame({column: _worker_fields[i, :, k] for i, (_, column) in enumerate(SIM_FIELDS)},
+                         index=_worker_dates)
+    return simulate_vix_long_ledger(frame, tops_df, atr_factor=atr_factor, execution=execution).trades.copy()
+
+
+def run_universe(prices, n=5, f=40, s=200, atr_multiplier=3.5, window_top=15, factor_top=1.2,
+                 atr_factor=3, execution=None, max_workers=None):
+    """
+    Ejecuta la estrategia principal (techos del VIX -> largos) en todos los activos del universo.
+
+    Args:
+        prices: UniversePrices (ver `load_universe`).
+        execution: ExecutionModel con los llenados y costes (el mismo para todos los activos).
+            Con `gap_fills`, los activos sin aperturas se evalúan como sin gaps.
+        max_workers: procesos hijos (por defecto, todos los núcleos; 1 = en este proceso).
+
+    Returns:
+        TradeLedger: Todas las operaciones, ordenadas por barra de entrada, con
+        `instrument` = posición en `prices.symbols` (`ledger.instruments`).
+    """
+    indicators = compute_indicators_2d(prices.close, prices.high, prices.low, prices.driver,
+                                       n=n, f=f, s=s, atr_multiplier=atr_multiplier)
+
+    # Techos una vez por índice de volatilidad (los comparten todos los activos que dirige)
+    tops = [
+        pd.DataFrame(find_vix_tops(pd.DataFrame({'VIX': prices.driver[:, d], 'atr': indicators['atr'][:, d]},
+                                                index=prices.dates),
+                                   window_top=window_top, factor_top=factor_top), columns=TOPS_COLUMNS)
+        for d in range(len(prices.drivers))
+    ]
+
+    fields = [prices.close, prices.high, prices.low, indicators['atr_trailing_stop'], indicators['nasdaq_atr'],
+              prices.open]
+    tasks = [(k, tops[prices.driver_of[k]], atr_factor, execution) for k in range(len(prices.symbols))]
+
+    workers = min(max_workers or os.cpu_count(), len(tasks))
+    if workers <= 1:
+        global _worker_fields, _worker_dates
+        _worker_fields, _worker_dates = np.stack(fields), prices.dates
+        try:
+            results = [_simulate_instrument(*task) for task in tasks]
+        finally:
+            _worker_fields = _worker_dates = None
+    else:
+        shm_blocks, spec = _share_fields(fields, prices.dates)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_fields, initargs=(spec,)) as pool:
+                results = list(pool.map(_simulate_instrument, *zip(*tasks)))
+        finally:
+            for shm in shm_blocks:
+                shm.close()
+                shm.unlink()
+
+    ledgers = []
+    for k, trades in enumerate(results):
+        trades['instrument'] = k
+        ledgers.append(TradeLedger.from_trades(trades, dates=prices.dates, instruments=prices.symbols))
+    return merge_ledgers(*ledgers)
@@ -0,0 +1,234 @@
+# FILE: walk_forward.py
+# Optimización walk-forward: ventanas de entrenamiento y prueba que avanzan por la historia.
+#
+# En cada ventana se barre la rejilla de parámetros de los techos del VIX y de la cobertura
+# sobre el tramo de entrenamiento, se elige la mejor combinación según `objective` y se
+# ejecuta sobre el tramo de prueba siguiente. Las operaciones de todos los tramos de prueba
+# se unen en un único registro fuera de muestra (formato de `strats_outputs_join`).
+#
+# Los indicadores y los techos del VIX son causales (el valor en una barra sólo depende de
+# las anteriores), así que se calculan UNA vez sobre toda la historia: los indicadores se
+# comparten con los procesos hijos por memoria compartida y cada ventana es una vista
+# `iloc[inicio:fin]` de esos arrays, sin recalcular ni copiar nada.
+
+import os
+import io
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from quant_stat.find_vix_tops import find_vix_tops
+from quant_stat.indicators import compute_indicators
+from quant_stat.metrics import performance_metrics, returns_from_equity
+from strat_OM.trade_ledger import TradeLedger, merge_ledgers
+from strat_OM.portfolio import mark_to_market
+from strat_OM.execution import DEFAULT_EXECUTION
+from pipeline import DEFAULT_PARAMS
+from sweep import (PARAM_GRID, INDICATOR_PARAMS, TOPS_COLUMNS, expand_grid, _share_market_data, _attach_market_data,
+                   _evaluate_combos, _simulate_combo, _summary_metrics)
+
+# -------- CONFIG --------
+WF_GRID = {
+    'window_top': [10, 15, 20],
+    'factor_top': [1.1, 1.2, 1.3],
+    'atr_factor': [2, 3, 4],
+    'hedge_atr_multiplier': [0.5, 1.0],
+}
+
+# Estado del proceso hijo: los indicadores de toda la historia sobre la memoria compartida
+_worker_df = None
+
+
+def _attach_indicators(spec):
+    global _worker_df
+    _worker_df = _attach_market_data(spec)
+
+
+def walk_forward_windows(index, train_months=24, test_months=6, step_months=None, anchored=False):
+    """
+    Ventanas walk-forward sobre un índice de fechas ordenado.
+
+    Args:
+        train_months: meses del tramo de entrenamiento.
+        test_months: meses del tramo de prueba (empieza donde acaba el de entrenamiento).
+        step_months: avance entre ventanas (por defecto `test_months`: tramos de prueba contiguos).
+        anchored: si es True, el entrenamiento empieza siempre en la primera barra (ventana creciente).
+
+    Returns:
+        list: tuplas (train_start, train_end, test_start, test_end) en posiciones de barra,
+        intervalos semiabiertos [inicio, fin). El último tramo de prueba puede ser más corto.
+    """
+    index = pd.DatetimeIndex(index)
+    step_months = step_months or test_months
+    first, n = index[0], len(index)
+    windows = []
+    k = 0
+    while True:
+        start_date = first + pd.DateOffset(months=k * step_months)
+        split_date = start_date + pd.DateOffset(months=train_months)
+        train_start = 0 if anchored else index.searchsorted(start_date)
+        test_start = index.searchsorted(split_date)
+        test_end = min(index.searchsorted(split_date + pd.DateOffset(months=test_months)), n)
+        if test_start >= n:
+            break
+        windows.append((int(train_start), int(test_start), int(test_start), int(test_end)))
+        if test_end >= n:
+            break
+        k += 1
+    return windows
+
+
+def _find_tops(window_top, factor_top):
+    """Techos del VIX de toda la historia para un par (window_top, factor_top)."""
+    return pd.DataFrame(find_vix_tops(_worker_df, window_top=window_top, factor_top=factor_top),
+                        columns=TOPS_COLUMNS)
+
+
+def _tops_between(tops_df, dates):
+    """Techos confirmados dentro del tramo `dates`."""
+    confirm = pd.to_datetime(tops_df['top_confirm'])
+    return tops_df[(confirm >= dates[0]) & (confirm <= dates[-1])]
+
+
+def _evaluate_train(bounds, combos, tops_df, execution=None):
+    """Métricas de cada combinación (mismo par de techos) sobre un tramo de entrenamiento."""
+    df = _worker_df.iloc[bounds[0]:bounds[1]]
+    key = (combos[0]['window_top'], combos[0]['factor_top'])
+    return _evaluate_combos(df, combos, {key: _tops_between(tops_df, df.index)}, execution=execution)
+
+
+def _run_test(bounds, params, tops_df, execution=None):
+    """
+    Ejecuta `params` sobre un tramo de prueba. Devuelve las operaciones (posiciones sobre
+    toda la historia) y las métricas del tramo. Las operaciones que siguen abiertas al final
+    del tramo se cierran en su última barra (outcome 'open').
+    """
+    start, stop = bounds
+    execution = execution or DEFAULT_EXECUTION
+    df = _worker_df.iloc[start:stop]
+    with contextlib.redirect_stdout(io.StringIO()):
+        ledgers = _simulate_combo(df, params, _tops_between(tops_df, df.index), {}, {}, execution)
+    combined = merge_ledgers(*ledgers)
+    equity = mark_to_market(combined, df['nasdaq'].to_numpy(dtype=float),
+                            point_value=execution.contract_value)['equity'].to_numpy()
+
+    trades = combined.trades.copy()
+    trades['entry_idx'] += start
+    trades['exit_idx'] += start
+    return trades, {**_summary_metrics(*ledgers), **performance_metrics(returns_from_equity(equity))}
+
+
+def run_walk_forward(df, param_grid=None, indicator_params=None, train_months=24, test_months=6,
+                     step_months=None, anchored=False, objective='sharpe_ratio', execution=None, max_workers=None,
+                     output_dir='outputs'):
+    """
+    Optimización walk-forward de los parámetros de techos del VIX y de la cobertura.
+
+    Args:
+        df: DataFrame indexado por fecha con las columnas de `sweep.BASE_COLUMNS`.
+        param_grid: dict parámetro -> lista de valores (por defecto `WF_GRID`). Los que falten
+            quedan fijos en su valor de `pipeline.DEFAULT_PARAMS`.
+        indicator_params: n, f, s y atr_multiplier (fijos: los indicadores se calculan una vez).
+        train_months / test_months / step_months / anchored: ver `walk_forward_windows`.
+        objective: métrica del barrido que se maximiza en entrenamiento ('sharpe_ratio',
+            'total_profit_usd', 'calmar_ratio'...).
+        execution: ExecutionModel de entrenamiento y prueba (por defecto, sin costes).
+        max_workers: procesos hijos (por defecto, todos los núcleos).
+        output_dir: carpeta de los CSV de resultados (None para no guardar).
+
+    Returns:
+        tuple: (windows, oos_trades). `windows` tiene una fila por ventana con sus fechas, la
+        combinación elegida y las métricas de entrenamiento y de prueba; `oos_trades` es el
+        registro fuera de muestra de todos los tramos de prueba unidos.
+    """
+    grid = {**{key: [DEFAULT_PARAMS[key]] for key in PARAM_GRID}, **WF_GRID, **(param_grid or {})}
+    for key, value in (indicator_params or {}).items():
+        grid[key] = [value]
+    varying = [key for key in INDICATOR_PARAMS if len(grid.get(key, [None])) > 1]
+    if varying:
+        raise ValueError(f"El walk-forward calcula los indicadores una vez: {varying} deben tener un único valor "
+                         f"(usa `indicator_params`).")
+    combos = expand_grid(grid)
+    searched = [key for key in {**WF_GRID, **(param_grid or {})} if key not in INDICATOR_PARAMS]
+    indicator_params = {key: combos[0][key] for key in INDICATOR_PARAMS}
+
+    windows = walk_forward_windows(df.index, train_months, test_months, step_months, anchored)
+    if not windows:
+        raise ValueError(f"La historia ({df.index[0].date()} - {df.index[-1].date()}) no cubre "
+                         f"{train_months} meses de entrenamiento más un tramo de prueba.")
+
+    groups = {}
+    for params in combos:
+        groups.setdefault((params['window_top'], params['factor_top']), []).append(params)
+
+    print(f"🚶 Walk-forward: {len(windows)} ventanas x {len(combos)} combinaciones (objetivo: {objective})")
+
+    indicators = compute_indicators(df.copy(deep=False), **indicator_params)
+    columns = [col for col in indicators.columns if pd.api.types.is_float_dtype(indicators[col])]
+    shm_blocks, spec = _share_market_data(indicators, columns)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                 initializer=_attach_indicators, initargs=(spec,)) as pool:
+            # 1. Techos de toda la historia, una vez por par (window_top, factor_top)
+            tops = dict(zip(groups, pool.map(_find_tops, *zip(*groups))))
+
+            # 2. Barrido de cada tramo de entrenamiento
+            futures = {
+                (w, key): pool.submit(_evaluate_train, window[:2], group, tops[key], execution)
+                for w, window in enumerate(windows) for key, group in groups.items()
+            }
+            best = []
+            for w in range(len(windows)):
+                train = pd.DataFrame([row for key in groups for row in futures[(w, key)].result()])
+                scores = train[objective].to_numpy(dtype=float)
+                choice = int(np.nanargmax(scores)) if not np.isnan(scores).all() else 0
+                best.append(train.iloc[choice])
+
+            # 3. La mejor combinación de cada ventana sobre su tramo de prueba
+            tests = [
+                pool.submit(_run_test, window[2:], {key: row[key] for key in combos[0]},
+                            tops[(row['window_top'], row['factor_top'])], execution)
+                for window, row in zip(windows, best)
+            ]
+            tests = [future.result() for future in tests]
+    finally:
+        for shm in shm_blocks:
+            shm.close()
+            shm.unlink()
+
+    dates = indicators.index
+    rows = []
+    for (train_start, train_end, test_start, test_end), row, (_, test) in zip(windows, best, tests):
+        rows.append({
+            'train_start': dates[train_start], 'train_end': dates[train_end - 1],
+            'test_start': dates[test_start], 'test_end': dates[test_end - 1],
+            **{key: row[key] for key in searched},
+            f'train_{objective}': row[objective],
+            'train_total_profit_usd': row['total_profit_usd'],
+            'test_trades': test['total_trades'],
+            'test_total_profit_usd': test['total_profit_usd'],
+            f'test_{objective}': test.get(objective, np.nan),
+        })
+    windows_df = pd.DataFrame(rows)
+
+    oos = merge_ledgers(*(TradeLedger.from_trades(trades, dates=dates) for trades, _ in tests))
+    oos_trades = oos.to_frame()
+    print(f"✅ Fuera de muestra: {len(oos_trades)} operaciones, "
+          f"profit ${oos_trades['profit_usd'].sum():,.2f}")
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        windows_df.to_csv(os.path.join(output_dir, 'walk_forward_windows.csv'), index=False)
+        oos_trades.to_csv(os.path.join(output_dir, 'walk_forward_oos_trades.csv'), index=False)
+        print(f"💾 Ventanas y operaciones fuera de muestra guardadas en: '{output_dir}'")
+    return windows_df, oos_trades
+
+
+if __name__ == '__main__':
+    from market_data import load_market_data
+
+    market_df = load_market_data(start='2015-01-01', vix_end='2025-08-01', nasdaq_end='2025-07-30')
+    wf_windows, wf_trades = run_walk_forward(market_df, train_months=36, test_months=6)
+    print(wf_windows.to_string())